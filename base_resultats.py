@@ -0,0 +1,203 @@
+"""Base SQLite locale des résultats d'extraction.
+
+Stocke les montants extraits par (entreprise, année, code) et les ratios calculés par
+(entreprise, année, ratio), avec des index sur les codes/ratios et les années pour
+interroger un portefeuille sans ré-extraire les PDFs ni ouvrir les fichiers Excel.
+
+Exemple :
+    python base_resultats.py ratio gearing_net ">" 3 --annee 2024
+"""
+import argparse
+import sqlite3
+from contextlib import contextmanager
+from itertools import groupby
+from pathlib import Path
+
+from main import convertir_en_codes, calculer_ratios_financiers, CODES_PAR_SECTION
+
+CHEMIN_BASE_DEFAUT = Path("resultats") / "liasses.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS valeurs (
+    entreprise TEXT NOT NULL,
+    annee      TEXT NOT NULL,
+    section    TEXT NOT NULL,
+    code       TEXT NOT NULL,
+    montant    REAL,
+    PRIMARY KEY (entreprise, annee, code)
+);
+CREATE INDEX IF NOT EXISTS idx_valeurs_code ON valeurs (code, annee, montant);
+CREATE INDEX IF NOT EXISTS idx_valeurs_annee ON valeurs (annee);
+
+CREATE TABLE IF NOT EXISTS ratios (
+    entreprise TEXT NOT NULL,
+    annee      TEXT NOT NULL,
+    ratio      TEXT NOT NULL,
+    valeur     REAL,
+    PRIMARY KEY (entreprise, annee, ratio)
+);
+CREATE INDEX IF NOT EXISTS idx_ratios_ratio ON ratios (ratio, annee, valeur);
+CREATE INDEX IF NOT EXISTS idx_ratios_annee ON ratios (annee);
+"""
+
+# Opérateurs autorisés dans les requêtes (jamais interpolés depuis l'entrée utilisateur)
+OPERATEURS = {">": ">", ">=": ">=", "<": "<", "<=": "<=", "=": "=", "!=": "!="}
+
+
+@contextmanager
+def ouvrir_base(chemin=CHEMIN_BASE_DEFAUT):
+    """Ouvre (et crée si besoin) la base des résultats, puis la referme en sortie du bloc."""
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(chemin)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        yield conn
+    finally:
+        conn.close()
+
+
+def _lignes_entreprise(entreprise, donnees_par_annee):
+    """Prépare les lignes (valeurs, ratios) d'une entreprise pour l'insertion en masse."""
+    lignes_valeurs = []
+    for annee, donnees in donnees_par_annee.items():
+        for section, valeurs in convertir_en_codes(donnees).items():
+            for code, montant in valeurs.items():
+                lignes_valeurs.append((entreprise, str(annee), section, code, montant))
+
+    lignes_ratios = []
+    for annee, ratios in calculer_ratios_financiers(donnees_par_annee).items():
+        for ratio, valeur in ratios.items():
+            lignes_ratios.append((entreprise, str(annee), ratio, valeur))
+
+    return lignes_valeurs, lignes_ratios
+
+
+def enregistrer_portefeuille(conn, donnees_par_entreprise):
+    """Insère (ou remplace) en une seule transaction les résultats de plusieurs entreprises.
+
+    Args:
+        conn: Connexion ouverte par ouvrir_base
+        donnees_par_entreprise: Dict {entreprise: donnees_par_annee}
+
+    Returns:
+        int: Nombre de lignes écrites (valeurs + ratios)
+    """
+    nb_lignes = 0
+    with conn:
+        for entreprise, donnees_par_annee in donnees_par_entreprise.items():
+            lignes_valeurs, lignes_ratios = _lignes_entreprise(entreprise, donnees_par_annee)
+            conn.executemany(
+                "INSERT OR REPLACE INTO valeurs (entreprise, annee, section, code, montant) VALUES (?, ?, ?, ?, ?)",
+                lignes_valeurs
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO ratios (entreprise, annee, ratio, valeur) VALUES (?, ?, ?, ?)",
+                lignes_ratios
+            )
+            nb_lignes += len(lignes_valeurs) + len(lignes_ratios)
+    return nb_lignes
+
+
+def enregistrer_resultats(conn, entreprise, donnees_par_annee):
+    """Insère (ou remplace) les résultats d'une entreprise pour toutes ses années."""
+    return enregistrer_portefeuille(conn, {entreprise: donnees_par_annee})
+
+
+def rechercher_ratio(conn, ratio, operateur, seuil, annee=None):
+    """Liste les entreprises dont un ratio vérifie une condition (ex: gearing_net > 3 en 2024).
+
+    Returns:
+        list: Tuples (entreprise, annee, valeur) triés par entreprise puis année
+    """
+    return _rechercher(conn, "ratios", "ratio", "valeur", ratio, operateur, seuil, annee)
+
+
+def rechercher_code(conn, code, operateur, seuil, annee=None):
+    """Liste les entreprises dont le montant d'un code vérifie une condition (ex: FL >= 1e6).
+
+    Returns:
+        list: Tuples (entreprise, annee, montant) triés par entreprise puis année
+    """
+    return _rechercher(conn, "valeurs", "code", "montant", code.upper(), operateur, seuil, annee)
+
+
+def _rechercher(conn, table, colonne_cle, colonne_valeur, cle, operateur, seuil, annee):
+    if operateur not in OPERATEURS:
+        raise ValueError(f"Opérateur non supporté : {operateur} (attendu : {', '.join(OPERATEURS)})")
+
+    requete = (f"SELECT entreprise, annee, {colonne_valeur} FROM {table} "
+               f"WHERE {colonne_cle} = ? AND {colonne_valeur} {OPERATEURS[operateur]} ?")
+    parametres = [cle, seuil]
+    if annee is not None:
+        requete += " AND annee = ?"
+        parametres.append(str(annee))
+    requete += " ORDER BY entreprise, annee"
+    return conn.execute(requete, parametres).fetchall()
+
+
+def charger_entreprise(conn, entreprise):
+    """Relit toutes les valeurs d'une entreprise.
+
+    Returns:
+        dict: {annee: {section: {code: montant}}}
+    """
+    resultats = {}
+    lignes = conn.execute(
+        "SELECT annee, section, code, montant FROM valeurs WHERE entreprise = ? ORDER BY annee",
+        (entreprise,)
+    )
+    for annee, section, code, montant in lignes:
+        resultats.setdefault(annee, {}).setdefault(section, {})[code] = montant
+    return resultats
+
+
+def iterer_portefeuille(conn):
+    """Parcourt la base entreprise par entreprise, sans tout charger en mémoire.
+
+    Les montants sont remis au format de extraire_un_pdf (libellés dans l'ordre des formulaires),
+    prêts pour creer_fichier_portefeuille.
+
+    Yields:
+        tuple: (entreprise, donnees_par_annee)
+    """
+    lignes = conn.execute("SELECT entreprise, annee, section, code, montant FROM valeurs ORDER BY entreprise, annee")
+    for entreprise, lignes_entreprise in groupby(lignes, key=lambda ligne: ligne[0]):
+        valeurs = {}
+        for _, annee, section, code, montant in lignes_entreprise:
+            valeurs.setdefault(annee, {}).setdefault(section, {})[code] = montant
+
+        donnees_par_annee = {}
+        for annee, sections in valeurs.items():
+            donnees_par_annee[annee] = {
+                section: [(libelle, sections[section][code]) for code, libelle in codes.items()
+                          if code in sections.get(section, {})]
+                for section, codes in CODES_PAR_SECTION.items()
+            }
+        yield entreprise, donnees_par_annee
+
+
+def main(argv=None):
+    """Interrogation de la base en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Requêtes sur la base SQLite des résultats")
+    parser.add_argument("--base", type=Path, default=CHEMIN_BASE_DEFAUT, help="Chemin de la base SQLite")
+    parser.add_argument("type", choices=["ratio", "code"], help="Chercher sur un ratio ou sur un code de la liasse")
+    parser.add_argument("cle", help="Nom du ratio (ex: gearing_net) ou code (ex: FL)")
+    parser.add_argument("operateur", choices=sorted(OPERATEURS), help="Opérateur de comparaison")
+    parser.add_argument("seuil", type=float, help="Valeur de comparaison")
+    parser.add_argument("--annee", help="Limiter à une année")
+    args = parser.parse_args(argv)
+
+    with ouvrir_base(args.base) as conn:
+        rechercher = rechercher_ratio if args.type == "ratio" else rechercher_code
+        lignes = rechercher(conn, args.cle, args.operateur, args.seuil, args.annee)
+
+    for entreprise, annee, valeur in lignes:
+        print(f"{entreprise}\t{annee}\t{valeur:,.2f}")
+    print(f"\n📊 {len(lignes)} résultat(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Étalonnage des réglages pdfplumber (table_settings) pour chaque formulaire de la liasse.
+
+Essaie chaque jeu de réglages candidat sur un corpus de liasses, formulaire par formulaire
+(2050, 2051, 2052/2053, 2057, 2058-C), et retient le plus rapide qui retrouve tous les codes
+attendus et les mêmes montants que les réglages actuels. Les profils retenus sont écrits
+dans profils_tableaux.json, lu par main.extraire_tableaux.
+
+Exemples :
+    python etalonnage_tableaux.py liasses/*.pdf
+    python etalonnage_tableaux.py --par-editeur --simulation corpus/*.pdf
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+import pdfplumber
+
+from main import (CHEMIN_PROFILS_TABLEAUX, CODES_PAR_SECTION, CRITERES_PAGES, EDITEUR_PAR_DEFAUT,
+                  PAGES_PAR_SECTION, VERSION_PROFILS_TABLEAUX, charger_profils_tableaux, editeur_pdf,
+                  extraire_section, extraire_tableaux, identifier_pages)
+
+# Réglages essayés pour chaque formulaire ({} : réglages par défaut de pdfplumber)
+CANDIDATS_TABLE_SETTINGS = {
+    'defaut': {},
+    'lignes_strictes': {"vertical_strategy": "lines_strict", "horizontal_strategy": "lines_strict"},
+    'lignes_tolerantes': {"vertical_strategy": "lines", "horizontal_strategy": "lines",
+                          "snap_tolerance": 5, "join_tolerance": 5},
+    'texte': {"vertical_strategy": "text", "horizontal_strategy": "text"},
+    'lignes_et_texte': {"vertical_strategy": "lines", "horizontal_strategy": "text"},
+}
+
+REPETITIONS_DEFAUT = 3      # Mesures par (fichier, formulaire, candidat) ; la plus courte est retenue
+GAIN_MINIMUM = 0.10         # Un candidat doit être 10 % plus rapide que les réglages par défaut pour les remplacer
+
+SECTION_PAR_ROLE = {role: section for section, roles in PAGES_PAR_SECTION.items() for role in roles}
+
+
+def _codes_du_tableau(table, role):
+    """Codes de la section du formulaire présents dans les cellules du tableau."""
+    codes = CODES_PAR_SECTION[SECTION_PAR_ROLE[role]]
+    return {str(cellule).strip().upper() for ligne in table or [] for cellule in ligne or [] if cellule} & set(codes)
+
+
+def _reference(chemin_pdf):
+    """Pages, éditeur, tableaux, codes et montants obtenus avec les réglages actuels."""
+    with pdfplumber.open(chemin_pdf) as pdf:
+        pages = identifier_pages(pdf)
+        editeur = editeur_pdf(pdf)
+        tableaux = extraire_tableaux(pdf, pages, list(CRITERES_PAGES))
+    return {
+        'pages': pages,
+        'editeur': editeur,
+        'tableaux': tableaux,
+        'codes': {role: _codes_du_tableau(table, role) for role, table in tableaux.items()},
+        'donnees': {section: extraire_section(chemin_pdf, section, tableaux)[0] for section in PAGES_PAR_SECTION},
+    }
+
+
+def _mesurer_candidats(chemin_pdf, reference, candidats, repetitions):
+    """Durée de la recherche des tableaux et validité de chaque formulaire d'un PDF, pour chaque candidat.
+
+    Le contenu de chaque page est lu avant les mesures : seule la recherche des tableaux est chronométrée.
+    Un formulaire est valide si son tableau contient tous les codes du tableau de référence
+    et si la section donne les mêmes montants qu'avec les réglages actuels.
+
+    Returns:
+        dict: {candidat: {role: (durée en secondes, valide)}}
+    """
+    mesures = {nom: {} for nom in candidats}
+    with pdfplumber.open(chemin_pdf) as pdf:
+        for role, index in reference['pages'].items():
+            if index == -1:
+                continue
+            page = pdf.pages[index]
+            page.objects  # Lecture du contenu de la page, hors chronométrage
+            section = SECTION_PAR_ROLE[role]
+            for nom, reglages in candidats.items():
+                durees = []
+                for _ in range(repetitions):
+                    debut = time.perf_counter()
+                    tables = page.extract_tables(reglages)
+                    durees.append(time.perf_counter() - debut)
+                table = tables[0] if tables else None
+
+                tableaux = dict(reference['tableaux'], **{role: table})
+                valide = (reference['codes'][role] <= _codes_du_tableau(table, role)
+                          and extraire_section(chemin_pdf, section, tableaux)[0] == reference['donnees'][section])
+                mesures[nom][role] = (min(durees), valide)
+    return mesures
+
+
+def etalonner(fichiers_pdf, candidats=CANDIDATS_TABLE_SETTINGS, repetitions=REPETITIONS_DEFAUT, par_editeur=False):
+    """Mesure chaque candidat sur le corpus et choisit le meilleur réglage par formulaire.
+
+    Args:
+        fichiers_pdf: Corpus de liasses (de préférence de plusieurs éditeurs et exercices)
+        candidats: Dict {nom: table_settings}
+        par_editeur: Si True, un profil est choisi pour chaque éditeur de PDF en plus du profil commun
+
+    Returns:
+        tuple: (profils {éditeur: {role: profil}}, mesures {éditeur: {role: {candidat: (durée, nb valides, nb fichiers)}}})
+    """
+    mesures = {}
+    for chemin_pdf in fichiers_pdf:
+        print(f"⏱️ {Path(chemin_pdf).name}")
+        # Les extracteurs sont bavards : seules les mesures sont affichées
+        with contextlib.redirect_stdout(io.StringIO()):
+            reference = _reference(chemin_pdf)
+            resultats = _mesurer_candidats(chemin_pdf, reference, candidats, repetitions)
+
+        groupes = [EDITEUR_PAR_DEFAUT] + ([reference['editeur']] if par_editeur else [])
+        for nom, mesures_roles in resultats.items():
+            for role, (duree, valide) in mesures_roles.items():
+                for groupe in groupes:
+                    cumul = mesures.setdefault(groupe, {}).setdefault(role, {}).setdefault(nom, [0.0, 0, 0])
+                    cumul[0] += duree
+                    cumul[1] += valide
+                    cumul[2] += 1
+
+    profils = {}
+    for groupe, mesures_roles in mesures.items():
+        for role, mesures_candidats in mesures_roles.items():
+            valides = [(duree, nom) for nom, (duree, nb_valides, nb_fichiers) in mesures_candidats.items()
+                       if nb_valides == nb_fichiers]
+            if not valides:
+                print(f"⚠️ [{groupe}] {role} : aucun candidat ne retrouve tous les codes, réglages actuels conservés")
+                continue
+            duree, nom = min(valides)
+            duree_defaut = mesures_candidats.get('defaut', [None, 0, 0])
+            if duree_defaut[1] == duree_defaut[2] and duree > duree_defaut[0] * (1 - GAIN_MINIMUM):
+                duree, nom = duree_defaut[0], 'defaut'
+            profils.setdefault(groupe, {})[role] = {
+                'candidat': nom,
+                'table_settings': candidats[nom],
+                'duree_ms': round(duree * 1000 / mesures_candidats[nom][2], 2),
+                'nb_fichiers': mesures_candidats[nom][2],
+            }
+    return profils, mesures
+
+
+def enregistrer_profils_tableaux(profils, chemin=CHEMIN_PROFILS_TABLEAUX):
+    """Fusionne les profils avec ceux déjà enregistrés et écrit le fichier de façon atomique."""
+    chemin = Path(chemin)
+    contenu = {'version': VERSION_PROFILS_TABLEAUX, 'profils': charger_profils_tableaux(chemin)}
+    for groupe, roles in profils.items():
+        contenu['profils'].setdefault(groupe, {}).update(roles)
+
+    chemin_temp = chemin.with_suffix('.tmp')
+    chemin_temp.write_text(json.dumps(contenu, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(chemin_temp, chemin)
+    return chemin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Étalonnage des réglages d'extraction des tableaux par formulaire")
+    parser.add_argument("pdfs", nargs="*", type=Path, help="Corpus de liasses (défaut : liasses/*.pdf)")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS_DEFAUT,
+                        help="Mesures par fichier et par candidat (défaut : %(default)s)")
+    parser.add_argument("--par-editeur", action="store_true",
+                        help="Choisit aussi un profil par logiciel producteur des PDFs")
+    parser.add_argument("--simulation", action="store_true", help="Affiche le choix sans écrire les profils")
+    parser.add_argument("--profils", type=Path, default=CHEMIN_PROFILS_TABLEAUX,
+                        help="Fichier des profils (défaut : %(default)s)")
+    args = parser.parse_args(argv)
+
+    fichiers_pdf = args.pdfs or sorted(Path("liasses").glob("*.pdf"))
+    if not fichiers_pdf:
+        parser.error("aucun PDF à étalonner")
+
+    print(f"🧪 Étalonnage de {len(CANDIDATS_TABLE_SETTINGS)} réglage(s) sur {len(fichiers_pdf)} fichier(s)")
+    profils, mesures = etalonner(fichiers_pdf, repetitions=args.repetitions, par_editeur=args.par_editeur)
+
+    for groupe, mesures_roles in mesures.items():
+        print(f"\n📐 Éditeur : {groupe}")
+        for role, mesures_candidats in mesures_roles.items():
+            retenu = profils.get(groupe, {}).get(role, {}).get('candidat')
+            for nom, (duree, nb_valides, nb_fichiers) in sorted(mesures_candidats.items(), key=lambda m: m[1][0]):
+                marque = "✅" if nom == retenu else ("  " if nb_valides == nb_fichiers else "❌")
+                print(f"   {marque} {role:<12} {nom:<18} {duree * 1000 / nb_fichiers:8.1f} ms/page  "
+                      f"{nb_valides}/{nb_fichiers} conforme(s)")
+
+    if args.simulation:
+        print("\nℹ️ Simulation : profils non enregistrés")
+        return
+    chemin = enregistrer_profils_tableaux(profils, args.profils)
+    print(f"\n💾 Profils enregistrés : {chemin}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""File de travail partagée pour répartir l'extraction sur plusieurs processus et plusieurs machines.
+
+Les PDFs sont mis en file dans une base SQLite ; chaque travailleur (sur n'importe quel
+poste qui voit la base et les PDFs) réserve une tâche par un bail à durée limitée, l'extrait
+et écrit le résultat dans la base. Un bail expiré (travailleur arrêté, machine perdue) rend
+la tâche aux autres ; au-delà de MAX_TENTATIVES, elle part en échec définitif (lettre morte)
+et peut être relancée à la main.
+
+Sur un seul poste, la base est en mode WAL. Sur un partage réseau (plusieurs machines),
+utiliser --partage : le mode WAL exige une mémoire partagée locale, la base passe alors
+en journal classique.
+
+Exemples :
+    python file_travail.py ajouter resultats/file.db liasses/*/*.pdf
+    python file_travail.py travailler resultats/file.db --processus 4
+    python file_travail.py rapport resultats/file.db
+    python file_travail.py exporter resultats/file.db resultats/portefeuille.xlsx
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import groupby
+from multiprocessing import Process
+from pathlib import Path
+
+from main import SECTIONS, empreinte_fichier, extraire_un_pdf_isole
+
+DUREE_BAIL = 600            # Secondes avant qu'une tâche réservée soit rendue aux autres travailleurs
+MAX_TENTATIVES = 3          # Au-delà, la tâche passe en échec définitif
+ATTENTE_FILE_VIDE = 5       # Secondes entre deux scrutations d'une file vide (mode --continu)
+MOTIF_ANNEE = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS taches (
+    id          INTEGER PRIMARY KEY,
+    chemin      TEXT NOT NULL,
+    sha256      TEXT NOT NULL UNIQUE,
+    entreprise  TEXT NOT NULL,
+    annee       TEXT NOT NULL,
+    statut      TEXT NOT NULL DEFAULT 'en_attente',
+    tentatives  INTEGER NOT NULL DEFAULT 0,
+    bail_expire REAL,
+    travailleur TEXT,
+    erreur      TEXT,
+    cree        REAL NOT NULL,
+    debut       REAL,
+    fin         REAL,
+    resultats   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_taches_statut ON taches (statut, bail_expire);
+CREATE INDEX IF NOT EXISTS idx_taches_fin ON taches (fin);
+"""
+
+STATUTS = ['en_attente', 'en_cours', 'terminee', 'echec_definitif']
+
+
+@contextmanager
+def ouvrir_file(chemin, partage=False):
+    """Ouvre (et crée si besoin) la base de la file, puis la referme en sortie du bloc."""
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(chemin, timeout=60, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA journal_mode={'DELETE' if partage else 'WAL'}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _transaction(conn):
+    """Transaction à verrou d'écriture immédiat : deux travailleurs ne réservent jamais la même tâche."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# ============================================
+# MISE EN FILE
+# ============================================
+
+def ajouter_taches(conn, pdfs, entreprise=None, annees=None):
+    """Met des PDFs en file (un PDF déjà en file, même renommé, n'est pas ajouté deux fois).
+
+    Args:
+        pdfs: Chemins des PDFs (enregistrés en absolu : ils doivent être visibles des autres postes)
+        entreprise: Identifiant commun ; par défaut, le nom du dossier de chaque PDF
+        annees: Année de chaque PDF (même ordre) ; par défaut, l'année lue dans le nom du fichier
+
+    Returns:
+        tuple: (nombre de tâches ajoutées, liste des fichiers ignorés avec la raison)
+    """
+    lignes = []
+    ignores = []
+    for idx, chemin in enumerate(pdfs):
+        chemin = Path(chemin).resolve()
+        if annees:
+            annee = str(annees[idx])
+        else:
+            correspondance = MOTIF_ANNEE.search(chemin.stem)
+            if not correspondance:
+                ignores.append((chemin.name, "année introuvable dans le nom (utiliser --annee)"))
+                continue
+            annee = correspondance.group(1)
+        lignes.append((str(chemin), empreinte_fichier(chemin), entreprise or chemin.parent.name, annee, time.time()))
+
+    with _transaction(conn):
+        avant = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO taches (chemin, sha256, entreprise, annee, cree) VALUES (?, ?, ?, ?, ?)",
+            lignes
+        )
+        ajoutees = conn.total_changes - avant
+    return ajoutees, ignores
+
+
+def relancer_lettres_mortes(conn):
+    """Remet en file les tâches en échec définitif (compteur de tentatives remis à zéro)."""
+    with _transaction(conn):
+        curseur = conn.execute(
+            "UPDATE taches SET statut = 'en_attente', tentatives = 0, bail_expire = NULL "
+            "WHERE statut = 'echec_definitif'"
+        )
+    return curseur.rowcount
+
+
+# ============================================
+# TRAVAILLEURS
+# ============================================
+
+def reserver_tache(conn, travailleur, duree_bail=DUREE_BAIL, max_tentatives=MAX_TENTATIVES):
+    """Réserve la plus ancienne tâche disponible (en attente, ou bail expiré).
+
+    Une tâche dont le bail a expiré après MAX_TENTATIVES réservations part en échec définitif.
+
+    Returns:
+        tuple: (id, chemin, entreprise, annee) ou None si la file est vide
+    """
+    maintenant = time.time()
+    with _transaction(conn):
+        conn.execute(
+            "UPDATE taches SET statut = 'echec_definitif', erreur = 'bail expiré ' || tentatives || ' fois' "
+            "WHERE statut = 'en_cours' AND bail_expire < ? AND tentatives >= ?",
+            (maintenant, max_tentatives)
+        )
+        tache = conn.execute(
+            "SELECT id, chemin, entreprise, annee FROM taches "
+            "WHERE statut = 'en_attente' OR (statut = 'en_cours' AND bail_expire < ?) "
+            "ORDER BY id LIMIT 1",
+            (maintenant,)
+        ).fetchone()
+        if tache is None:
+            return None
+        conn.execute(
+            "UPDATE taches SET statut = 'en_cours', travailleur = ?, bail_expire = ?, "
+            "tentatives = tentatives + 1, debut = ? WHERE id = ?",
+            (travailleur, maintenant + duree_bail, maintenant, tache[0])
+        )
+    return tache
+
+
+def _prolonger_bail(chemin_file, partage, id_tache, travailleur, arret, duree_bail):
+    """Prolonge le bail tant que l'extraction dure (thread du travailleur, avec sa propre connexion)."""
+    with ouvrir_file(chemin_file, partage) as conn:
+        while not arret.wait(duree_bail / 3):
+            conn.execute("UPDATE taches SET bail_expire = ? WHERE id = ? AND travailleur = ?",
+                         (time.time() + duree_bail, id_tache, travailleur))
+
+
+def terminer_tache(conn, id_tache, travailleur, resultats, erreur=None, max_tentatives=MAX_TENTATIVES):
+    """Écrit le résultat d'une tâche, ou la remet en file (échec définitif au-delà de MAX_TENTATIVES).
+
+    Une tâche reprise entre-temps par un autre travailleur (bail expiré) n'est pas modifiée.
+    """
+    with _transaction(conn):
+        if resultats:
+            conn.execute(
+                "UPDATE taches SET statut = 'terminee', fin = ?, resultats = ?, erreur = NULL, bail_expire = NULL "
+                "WHERE id = ? AND travailleur = ?",
+                (time.time(), json.dumps(resultats, ensure_ascii=False, default=str), id_tache, travailleur)
+            )
+        else:
+            conn.execute(
+                "UPDATE taches SET statut = CASE WHEN tentatives >= ? THEN 'echec_definitif' ELSE 'en_attente' END, "
+                "fin = ?, erreur = ?, bail_expire = NULL WHERE id = ? AND travailleur = ?",
+                (max_tentatives, time.time(), erreur or "échec de l'extraction", id_tache, travailleur)
+            )
+
+
+def travailler(chemin_file, partage=False, continu=False, duree_bail=DUREE_BAIL):
+    """Boucle d'un travailleur : réserve, extrait (sous-processus limité), écrit, recommence.
+
+    Args:
+        continu: Si True, attend de nouvelles tâches quand la file est vide (sinon s'arrête)
+
+    Returns:
+        int: Nombre de tâches traitées par ce travailleur
+    """
+    travailleur = f"{socket.gethostname()}:{os.getpid()}"
+    nb_taches = 0
+    with ouvrir_file(chemin_file, partage) as conn:
+        while True:
+            tache = reserver_tache(conn, travailleur, duree_bail)
+            if tache is None:
+                if not continu:
+                    break
+                time.sleep(ATTENTE_FILE_VIDE)
+                continue
+
+            id_tache, chemin, entreprise, annee = tache
+            print(f"🔧 [{travailleur}] {entreprise} {annee} : {Path(chemin).name}")
+
+            arret = threading.Event()
+            bail = threading.Thread(target=_prolonger_bail,
+                                    args=(chemin_file, partage, id_tache, travailleur, arret, duree_bail),
+                                    daemon=True)
+            bail.start()
+            erreur = None
+            try:
+                resultats = extraire_un_pdf_isole(Path(chemin))
+            except Exception as e:
+                resultats, erreur = None, str(e)
+            finally:
+                arret.set()
+                bail.join()
+
+            terminer_tache(conn, id_tache, travailleur, resultats, erreur)
+            nb_taches += 1
+    print(f"🏁 [{travailleur}] {nb_taches} tâche(s) traitée(s)")
+    return nb_taches
+
+
+def lancer_travailleurs(chemin_file, nb_processus, partage=False, continu=False):
+    """Lance plusieurs travailleurs sur ce poste et attend leur fin."""
+    processus = [Process(target=travailler, args=(chemin_file, partage, continu)) for _ in range(nb_processus)]
+    for p in processus:
+        p.start()
+    for p in processus:
+        p.join()
+
+
+# ============================================
+# RAPPORT ET RÉSULTATS
+# ============================================
+
+def rapport(conn, fenetre=3600):
+    """Avancement de la file et débit par travailleur sur la dernière fenêtre (en secondes).
+
+    Returns:
+        dict: {'statuts': {statut: nombre}, 'debit_par_heure', 'duree_moyenne_s', 'reste_estime_s',
+               'travailleurs': [(travailleur, tâches, durée moyenne)], 'lettres_mortes': [(chemin, erreur)]}
+    """
+    statuts = dict.fromkeys(STATUTS, 0)
+    statuts.update(conn.execute("SELECT statut, COUNT(*) FROM taches GROUP BY statut").fetchall())
+
+    depuis = time.time() - fenetre
+    travailleurs = conn.execute(
+        "SELECT travailleur, COUNT(*), AVG(fin - debut) FROM taches "
+        "WHERE statut = 'terminee' AND fin >= ? GROUP BY travailleur ORDER BY travailleur",
+        (depuis,)
+    ).fetchall()
+    nb_recents = sum(nombre for _, nombre, _ in travailleurs)
+    debut_fenetre = conn.execute("SELECT MIN(debut) FROM taches WHERE statut = 'terminee' AND fin >= ?",
+                                 (depuis,)).fetchone()[0]
+    duree_observee = time.time() - debut_fenetre if debut_fenetre else 0
+    debit = nb_recents * 3600 / duree_observee if duree_observee else 0
+    duree_moyenne = conn.execute("SELECT AVG(fin - debut) FROM taches WHERE statut = 'terminee'").fetchone()[0]
+
+    reste = statuts['en_attente'] + statuts['en_cours']
+    return {
+        'statuts': statuts,
+        'debit_par_heure': debit,
+        'duree_moyenne_s': duree_moyenne or 0,
+        'reste_estime_s': reste * 3600 / debit if debit else None,
+        'travailleurs': travailleurs,
+        'lettres_mortes': conn.execute(
+            "SELECT chemin, erreur FROM taches WHERE statut = 'echec_definitif' ORDER BY id"
+        ).fetchall(),
+    }
+
+
+def iterer_resultats(conn):
+    """Parcourt les résultats terminés entreprise par entreprise.
+
+    Yields:
+        tuple: (entreprise, donnees_par_annee)
+    """
+    lignes = conn.execute(
+        "SELECT entreprise, annee, resultats FROM taches WHERE statut = 'terminee' ORDER BY entreprise, annee"
+    )
+    for entreprise, lignes_entreprise in groupby(lignes, key=lambda ligne: ligne[0]):
+        donnees_par_annee = {}
+        for _, annee, resultats in lignes_entreprise:
+            resultats = json.loads(resultats)
+            for section in SECTIONS:
+                resultats[section] = [tuple(ligne) for ligne in resultats.get(section, [])]
+            donnees_par_annee[annee] = resultats
+        yield entreprise, donnees_par_annee
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File de travail partagée pour l'extraction des liasses")
+    parser.add_argument("--partage", action="store_true",
+                        help="Base sur un partage réseau utilisé par plusieurs machines (pas de mode WAL)")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    ajouter = commandes.add_parser("ajouter", help="Met des PDFs en file")
+    ajouter.add_argument("file", type=Path, help="Base SQLite de la file")
+    ajouter.add_argument("pdfs", nargs="+", type=Path)
+    ajouter.add_argument("--entreprise", help="Identifiant commun (défaut : nom du dossier de chaque PDF)")
+    ajouter.add_argument("--annee", action="append", default=[], help="Année de chaque PDF (même ordre)")
+
+    travail = commandes.add_parser("travailler", help="Lance des travailleurs sur ce poste")
+    travail.add_argument("file", type=Path)
+    travail.add_argument("--processus", type=int, default=1, help="Nombre de travailleurs sur ce poste")
+    travail.add_argument("--continu", action="store_true", help="Attend de nouvelles tâches quand la file est vide")
+
+    commande_rapport = commandes.add_parser("rapport", help="Avancement, débit et lettres mortes")
+    commande_rapport.add_argument("file", type=Path)
+
+    relancer = commandes.add_parser("relancer", help="Remet en file les tâches en échec définitif")
+    relancer.add_argument("file", type=Path)
+
+    exporter = commandes.add_parser("exporter", help="Écrit les résultats dans un classeur de portefeuille")
+    exporter.add_argument("file", type=Path)
+    exporter.add_argument("excel", type=Path)
+    exporter.add_argument("--base", type=Path, metavar="SQLITE", help="Enregistre aussi les résultats dans cette base")
+    args = parser.parse_args(argv)
+
+    if args.commande == "travailler":
+        lancer_travailleurs(args.file, args.processus, args.partage, args.continu)
+        return
+
+    with ouvrir_file(args.file, args.partage) as conn:
+        if args.commande == "ajouter":
+            if args.annee and len(args.annee) != len(args.pdfs):
+                parser.error("autant de --annee que de PDFs attendus")
+            ajoutees, ignores = ajouter_taches(conn, args.pdfs, args.entreprise, args.annee)
+            for nom, raison in ignores:
+                print(f"⚠️ {nom} ignoré : {raison}")
+            print(f"📥 {ajoutees} tâche(s) ajoutée(s)")
+
+        elif args.commande == "rapport":
+            infos = rapport(conn)
+            print("📊 " + ", ".join(f"{statut} : {nombre}" for statut, nombre in infos['statuts'].items()))
+            print(f"⏱️ {infos['debit_par_heure']:.0f} fichier(s)/h sur la dernière heure, "
+                  f"{infos['duree_moyenne_s']:.1f} s par fichier")
+            if infos['reste_estime_s'] is not None:
+                print(f"⏳ Reste estimé : {infos['reste_estime_s'] / 60:.0f} min")
+            for travailleur, nombre, duree in infos['travailleurs']:
+                print(f"   {travailleur}\t{nombre} fichier(s)\t{duree:.1f} s")
+            for chemin, erreur in infos['lettres_mortes']:
+                print(f"💀 {chemin} : {erreur}")
+
+        elif args.commande == "relancer":
+            print(f"🔁 {relancer_lettres_mortes(conn)} tâche(s) remise(s) en file")
+
+        elif args.commande == "exporter":
+            from main import creer_fichier_portefeuille
+            creer_fichier_portefeuille(iterer_resultats(conn), args.excel)
+            if args.base:
+                from base_resultats import ouvrir_base, enregistrer_portefeuille
+                with ouvrir_base(args.base) as base:
+                    nb_lignes = enregistrer_portefeuille(base, dict(iterer_resultats(conn)))
+                print(f"💾 {nb_lignes} ligne(s) enregistrée(s) dans {args.base}")
+
+
+if __name__ == "__main__":
+    main()
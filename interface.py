@@ -1,8 +1,16 @@
 import streamlit as st
 import tempfile
 import shutil
+import hashlib
+import queue
+import time
+import multiprocessing
+import uuid
 from pathlib import Path
-from main import extraire_un_pdf, creer_fichier_excel
+from main import (extraire_contenu_pdf, creer_fichier_excel, lire_donnees_excel, fusionner_exercices_precedents,
+                  SuiviProgression, ProgressionVersFile, CHEMIN_CODES_COMPTABLES, charger_index_codes,
+                  appliquer_index_codes, classer_pdf_brut, REFUS_PAR_CLASSEMENT)
+from pool_extraction import PoolExtraction
 
 # Configuration de la page
 st.set_page_config(
@@ -11,6 +19,92 @@ st.set_page_config(
     layout="wide"
 )
 
+def signature_classeur_codes():
+    """Date et taille de codes_comptables.xlsx (None s'il est absent), relues à chaque réexécution."""
+    try:
+        etat = CHEMIN_CODES_COMPTABLES.stat()
+    except OSError:
+        return None
+    return etat.st_mtime_ns, etat.st_size
+
+
+# Index des codes comptables partagé par toutes les sessions : rechargé seulement si le classeur change
+@st.cache_resource(max_entries=1, show_spinner=False)
+def obtenir_index_codes(signature):
+    index = charger_index_codes()
+    if index:
+        appliquer_index_codes(index)
+    return index
+
+
+# Pool d'extraction préchauffé partagé par toutes les sessions, servies à tour de rôle ;
+# recréé si les tables de codes changent (les workers forkés gardent les tables en vigueur à leur création)
+@st.cache_resource(max_entries=1, show_spinner=False, on_release=lambda pool: pool.fermer())
+def obtenir_pool_extraction(signature_codes):
+    return PoolExtraction()
+
+
+def identifiant_session():
+    """Identifiant de la session, utilisé par le pool pour répartir les workers entre utilisateurs."""
+    return st.session_state.setdefault('identifiant_session', uuid.uuid4().hex)
+
+
+# Gestionnaire de files inter-processus pour remonter la progression des workers
+@st.cache_resource
+def obtenir_gestionnaire_progression():
+    return multiprocessing.Manager()
+
+
+def obtenir_file_progression():
+    """File de progression propre à la session, alimentée par les workers d'extraction."""
+    if 'file_progression' not in st.session_state:
+        st.session_state['file_progression'] = obtenir_gestionnaire_progression().Queue()
+    return st.session_state['file_progression']
+
+
+def vider_file_progression(file_progression, suivi):
+    """Transmet au suivi tous les événements reçus depuis le dernier appel."""
+    while True:
+        try:
+            suivi(file_progression.get_nowait())
+        except queue.Empty:
+            return
+
+
+def lancer_extraction_anticipee(uploaded_file):
+    """Démarre l'extraction d'un fichier dès son téléversement, avant la saisie de l'année.
+    
+    Les extractions sont indexées par le contenu du fichier : un même PDF n'est extrait
+    qu'une fois par session, même s'il est renommé ou re-téléversé.
+    """
+    contenu = uploaded_file.getvalue()
+    cle = hashlib.sha256(contenu).hexdigest()
+    extractions = st.session_state.setdefault('extractions', {})
+    if cle not in extractions:
+        extractions[cle] = obtenir_pool_extraction(signature_codes).soumettre(
+            identifiant_session(), extraire_contenu_pdf, contenu, uploaded_file.name,
+            progression=ProgressionVersFile(obtenir_file_progression())
+        )
+    return cle
+
+
+def refus_televersement(uploaded_file, cle):
+    """Raison du refus du PDF par le classement préalable (scan sans couche texte), ou None.
+    
+    Le classement ne lit que la structure brute du fichier (quelques millisecondes) et
+    n'est fait qu'une fois par session pour un même contenu.
+    """
+    classements = st.session_state.setdefault('classements', {})
+    if cle not in classements:
+        classements[cle] = classer_pdf_brut(uploaded_file.getvalue())['type']
+    return REFUS_PAR_CLASSEMENT.get(classements[cle])
+
+
+# Tables de codes à jour (un simple stat du classeur quand il n'a pas changé)
+signature_codes = signature_classeur_codes()
+obtenir_index_codes(signature_codes)
+obtenir_pool_extraction(signature_codes)   # Workers démarrés dès la première visite, avant tout téléversement
+
 # Titre principal
 st.title("📊 Extraction Automatique de Liasses Fiscales")
 st.markdown("---")
@@ -18,7 +112,7 @@ st.markdown("---")
 # Instructions
 st.markdown("""
 ### 📋 Instructions
-1. **Téléversez** vos fichiers PDF (liasses fiscales)
+1. **Téléversez** vos fichiers PDF (liasses fiscales) : l'extraction démarre aussitôt en arrière-plan
 2. **Indiquez l'année** pour chaque fichier
 3. **Cliquez** sur "Extraire les données"
 4. **Téléchargez** le fichier Excel généré
@@ -48,9 +142,24 @@ if uploaded_files:
     # Créer une colonne pour chaque fichier
     cols = st.columns(min(len(uploaded_files), 3))
     
+    # Extraction anticipée : démarre en arrière-plan pendant que l'utilisateur saisit les années
+    cles_extraction = {uploaded_file.name: lancer_extraction_anticipee(uploaded_file) for uploaded_file in uploaded_files}
+    
+    # Oublier les extractions des fichiers retirés
+    extractions = st.session_state['extractions']
+    for cle in set(extractions) - set(cles_extraction.values()):
+        extractions.pop(cle).cancel()
+    
     for idx, uploaded_file in enumerate(uploaded_files):
         with cols[idx % 3]:
             st.markdown(f"**{uploaded_file.name}**")
+            refus = refus_televersement(uploaded_file, cles_extraction[uploaded_file.name])
+            if refus:
+                st.caption(f"🚫 Ignoré : {refus}")
+            elif extractions[cles_extraction[uploaded_file.name]].done():
+                st.caption("✅ Extraction prête")
+            else:
+                st.caption("⏳ Extraction en cours...")
             annee = st.text_input(
                 "Année",
                 value="",
@@ -60,11 +169,24 @@ if uploaded_files:
             )
             fichiers_annees[uploaded_file.name] = {
                 'file': uploaded_file,
-                'annee': annee
+                'annee': annee,
+                'cle': cles_extraction[uploaded_file.name],
+                'extraction': extractions[cles_extraction[uploaded_file.name]],
+                'refus': refus
             }
     
     st.markdown("---")
     
+    # Mise à jour d'un fichier existant (optionnel)
+    with st.expander("🔄 Compléter un fichier Excel existant (optionnel)"):
+        fichier_existant = st.file_uploader(
+            "Fichier Excel généré précédemment",
+            type=['xlsx'],
+            help="Les années déjà présentes dans ce fichier sont reprises sans ré-extraire leurs PDFs"
+        )
+    
+    st.markdown("---")
+    
     # Nom du fichier de sortie
     st.subheader("📝 Nom du fichier Excel")
     
@@ -100,7 +222,7 @@ if uploaded_files:
         if st.button("🚀 Extraire les données", type="primary", use_container_width=True):
             
             # Vérifier que toutes les années sont renseignées
-            annees_manquantes = [nom for nom, data in fichiers_annees.items() if not data['annee']]
+            annees_manquantes = [nom for nom, data in fichiers_annees.items() if not data['annee'] and not data['refus']]
             
             if annees_manquantes:
                 st.error(f"❌ Veuillez renseigner l'année pour : {', '.join(annees_manquantes)}")
@@ -116,22 +238,61 @@ if uploaded_files:
                     donnees_par_annee = {}
                     total_files = len(fichiers_annees)
                     
-                    # Traiter chaque fichier
+                    # Reprendre les années d'un fichier existant
+                    if fichier_existant:
+                        temp_excel_path = temp_path / fichier_existant.name
+                        with open(temp_excel_path, 'wb') as f:
+                            f.write(fichier_existant.getbuffer())
+                        donnees_par_annee = lire_donnees_excel(temp_excel_path)
+                        if donnees_par_annee:
+                            st.info(f"📂 Années reprises de {fichier_existant.name} : {', '.join(sorted(donnees_par_annee.keys()))}")
+                        else:
+                            st.warning(f"⚠️ {fichier_existant.name} ne contient pas de données réutilisables")
+                    
+                    # Suivre page par page les extractions encore en cours, avec estimation du temps restant
+                    suivi = SuiviProgression(total_files)
+                    file_progression = obtenir_file_progression()
+                    while True:
+                        vider_file_progression(file_progression, suivi)
+                        for nom_fichier, data in fichiers_annees.items():
+                            if data['extraction'].done():
+                                suivi.terminer(nom_fichier)
+                        progress_bar.progress(suivi.fraction)
+                        status_text.text(f"⏳ {suivi.description()}")
+                        if all(data['extraction'].done() for data in fichiers_annees.values()):
+                            break
+                        time.sleep(0.2)
+                    
+                    # Récupérer les extractions lancées au téléversement
                     for idx, (nom_fichier, data) in enumerate(fichiers_annees.items()):
                         status_text.text(f"⏳ Traitement de {nom_fichier}...")
                         
-                        # Sauvegarder le fichier temporairement
-                        temp_pdf_path = temp_path / nom_fichier
-                        with open(temp_pdf_path, 'wb') as f:
-                            f.write(data['file'].getbuffer())
-                        
-                        # Extraire les données
-                        resultats = extraire_un_pdf(temp_pdf_path)
+                        try:
+                            resultats = data['extraction'].result()
+                        except Exception as e:
+                            print(f"❌ Erreur lors du traitement de {nom_fichier} : {e}")
+                            # Relancer l'extraction au prochain affichage
+                            st.session_state['extractions'].pop(data['cle'], None)
+                            resultats = None
                         
                         if resultats:
                             annee = data['annee'].strip()
                             donnees_par_annee[annee] = resultats
                             st.success(f"✅ {nom_fichier} → Année {annee} : Extraction réussie")
+                            
+                            # Signaler les identités comptables non vérifiées
+                            controles_invalides = [nom for nom, controle in resultats.get('controles', {}).items()
+                                                   if controle['statut'] == 'invalide']
+                            if controles_invalides:
+                                st.warning(f"⚠️ {nom_fichier} : contrôles comptables non vérifiés ({', '.join(controles_invalides)}), vérifiez les montants")
+                            
+                            # Signaler une extraction partielle faute de temps
+                            niveaux_ignores = resultats.get('niveaux_ignores', [])
+                            if niveaux_ignores:
+                                etapes = ", ".join(f"{ignore['etape']} ({ignore['niveau']})" for ignore in niveaux_ignores)
+                                st.warning(f"⏳ {nom_fichier} : extraction partielle, budget de temps épuisé avant {etapes}")
+                        elif data['refus']:
+                            st.warning(f"🚫 {nom_fichier} ignoré : {data['refus']}")
                         else:
                             st.error(f"❌ {nom_fichier} : Échec de l'extraction")
                         
@@ -146,6 +307,15 @@ if uploaded_files:
                         resultats_dir = Path("resultats")
                         resultats_dir.mkdir(exist_ok=True)
                         
+                        # Intégrer les colonnes N-1 (années manquantes et contrôle des retraitements)
+                        annees_extraites = set(donnees_par_annee)
+                        conflits = fusionner_exercices_precedents(donnees_par_annee)
+                        annees_reconstituees = sorted(set(donnees_par_annee) - annees_extraites)
+                        if annees_reconstituees:
+                            st.info(f"📅 Année(s) reconstituée(s) depuis la colonne N-1 : {', '.join(annees_reconstituees)}")
+                        for annee_conflit, section, code, montant_retenu, montant_n_1 in conflits:
+                            st.warning(f"⚠️ {annee_conflit} – {section} {code} : {montant_retenu:,.0f} retenu, {montant_n_1:,.0f} en N-1 de l'année suivante")
+                        
                         nom_excel = resultats_dir / "extraction_multi_annees.xlsx"
                         creer_fichier_excel(donnees_par_annee, nom_excel)
                         
@@ -1,5 +1,15 @@
-import pdfplumber
-import openpyxl
+import argparse
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import time
+import zlib
+from contextlib import contextmanager
 from pathlib import Path
 
 # ============================================
@@ -347,6 +357,77 @@ LIBELLES_BILAN_PASSIF = {
     "TOTAL GENERAL (I à V)": "TOTAL GENERAL (I à V)"
 }
 
+# --- Sections extraites pour chaque liasse (ordre d'affichage dans l'Excel) ---
+SECTIONS = ['actif', 'passif', 'cr', 'echeances', 'affectation']
+
+# --- Dictionnaire des codes par section (même découpage que les résultats d'extraction) ---
+CODES_PAR_SECTION = {
+    'actif': CODES_BILAN_ACTIF,
+    'passif': CODES_BILAN_PASSIF,
+    'cr': CODES_COMPTE_RESULTAT,
+    'echeances': {**CODES_ETAT_ECHEANCES_CREANCES, **CODES_ETAT_ECHEANCES_DETTES},
+    'affectation': {**CODES_AFFECTATION_RESULTAT, **CODES_RENSEIGNEMENTS_DIVERS},
+}
+
+# --- Catégories du classeur codes_comptables.xlsx → tables de codes alimentées au démarrage ---
+CHEMIN_CODES_COMPTABLES = Path(__file__).with_name("codes_comptables.xlsx")
+CHEMIN_CACHE_INDEX_CODES = Path(__file__).parent / "__pycache__" / "codes_comptables.index.pickle"
+VERSION_INDEX_CODES = 2
+CATEGORIES_CODES = {
+    'BILAN ACTIF': CODES_BILAN_ACTIF,
+    'BILAN PASSIF': CODES_BILAN_PASSIF,
+    'COMPTE DE RÉSULTAT': CODES_COMPTE_RESULTAT,
+    'ÉCHÉANCES CRÉANCES': CODES_ETAT_ECHEANCES_CREANCES,
+    'ÉCHÉANCES DETTES': CODES_ETAT_ECHEANCES_DETTES,
+    'AFFECTATION RÉSULTAT': CODES_AFFECTATION_RESULTAT,
+    'RENSEIGNEMENTS DIVERS': CODES_RENSEIGNEMENTS_DIVERS,
+}
+
+# --- Critères d'identification des pages de la liasse (texte de la page → bool) ---
+CRITERES_PAGES = {
+    'actif': lambda texte: "Brut" in texte and "Net" in texte,
+    'passif': lambda texte: "Capital social ou individuel" in texte,
+    'cr_page1': lambda texte: "Ventes de marchandises" in texte or "Ventes" in texte,
+    'cr_page2': lambda texte: "Produits exceptionnels" in texte or "PRODUITS EXCEPTIONNELS" in texte,
+    'echeances': lambda texte: "ÉTAT DES ÉCHÉANCES" in texte.upper() or "ETAT DES ECHEANCES" in texte.upper(),
+    'affectation': lambda texte: ("AFFECTATION DU RÉSULTAT" in texte.upper() or
+                                  "AFFECTATION DU RESULTAT" in texte.upper() or
+                                  "RENSEIGNEMENTS DIVERS" in texte.upper()),
+}
+
+# --- Position attendue de chaque page dans une liasse standard (2050, 2051, 2052, 2053, ..., 2057, ..., 2058-C) ---
+PAGES_ATTENDUES = {
+    'actif': 0,
+    'passif': 1,
+    'cr_page1': 2,
+    'cr_page2': 3,
+    'echeances': 8,
+    'affectation': 11,
+}
+
+# Écarts testés autour de la position attendue avant de parcourir tout le document
+ECARTS_VOISINAGE = [0, 1, -1, 2, -2]
+
+# --- Pages nécessaires à chaque section ---
+PAGES_PAR_SECTION = {
+    'actif': ['actif'],
+    'passif': ['passif'],
+    'cr': ['cr_page1', 'cr_page2'],
+    'echeances': ['echeances'],
+    'affectation': ['affectation'],
+}
+
+# --- Réglages d'extraction des tableaux par formulaire (choisis par etalonnage_tableaux.py) ---
+CHEMIN_PROFILS_TABLEAUX = Path(__file__).with_name("profils_tableaux.json")
+VERSION_PROFILS_TABLEAUX = 1
+EDITEUR_PAR_DEFAUT = "*"     # Profils valables quel que soit le logiciel qui a produit le PDF
+
+# --- Codes extraits par défaut en mode triage (CA, résultat net, totaux du bilan, capitaux propres) ---
+CODES_TRIAGE_DEFAUT = ['FL', 'HN', 'CO', 'EE', 'DL']
+
+# --- Onglet masqué contenant les données brutes (pour les mises à jour incrémentales) ---
+NOM_ONGLET_DONNEES = "_donnees"
+
 # --- Seuils pour décider si l'extraction par codes est un succès ---
 SEUIL_REUSSITE_CODES = 5
 SEUIL_REUSSITE_CODES_PASSIF = 5
@@ -354,6 +435,65 @@ SEUIL_REUSSITE_CODES_COMPTE_RESULTAT = 10  # Plus de codes dans le Compte de Ré
 SEUIL_REUSSITE_CODES_ETAT_ECHEANCES = 3  # Au moins 3 valeurs sur 4 pour l'État des échéances
 SEUIL_REUSSITE_CODES_AFFECTATION_RESULTAT = 4  # Au moins 4 valeurs sur 5 (1 affectation + 4 renseignements)
 
+# --- Identités comptables de la liasse : (libellé, codes ajoutés, codes retranchés, code du total) ---
+IDENTITES_COMPTABLES = {
+    'actif': [
+        ("BJ + CJ + CM + CW = CO", ['BJ', 'CJ', 'CM', 'CW'], [], 'CO'),
+    ],
+    'passif': [
+        ("DL + DO + DR + EC + ED = EE", ['DL', 'DO', 'DR', 'EC', 'ED'], [], 'EE'),
+    ],
+    'cr': [
+        ("FR - GF = GG", ['FR'], ['GF'], 'GG'),
+        ("GP - GU = GV", ['GP'], ['GU'], 'GV'),
+        ("GG + GH - GI + GV = GW", ['GG', 'GH', 'GV'], ['GI'], 'GW'),
+        ("HD - HH = HI", ['HD'], ['HH'], 'HI'),
+        ("HL - HM = HN", ['HL'], ['HM'], 'HN'),
+        ("GW + HI - HJ - HK = HN", ['GW', 'HI'], ['HJ', 'HK'], 'HN'),
+    ],
+}
+
+# Écart toléré sur une identité (arrondis à l'euro des sous-totaux)
+TOLERANCE_ECART_ABSOLU = 2.0
+TOLERANCE_ECART_RELATIF = 0.001
+
+# Ordre de préférence des statuts de contrôle
+RANG_STATUT_CONTROLE = {'invalide': 0, 'indetermine': 1, 'valide': 2}
+
+# --- Limites des contrôles préalables (une liasse 2050-2059 fait une vingtaine de pages, sans images lourdes) ---
+LIMITE_TAILLE_FICHIER = 50 * 1024 * 1024    # Octets
+LIMITE_NB_PAGES = 300
+LIMITE_VOLUME_IMAGES = 100 * 1024 * 1024    # Octets de flux d'images déclarés
+LIMITE_FLUX_OBJETS = 2000                   # Flux d'objets compressés (/ObjStm)
+
+# --- Classement préalable (couche texte, scan ou autre document) ---
+MARQUEURS_LIASSE = ["2050", "2051", "2052", "2053", "2057", "2058", "2059", "DGFiP"]
+MIN_MARQUEURS_LIASSE = 2                    # Marqueurs distincts pour reconnaître une liasse
+MIN_CHAINES_LISIBLES = 20                   # Chaînes en clair au-delà desquelles l'absence de marqueur est probante
+LIMITE_DECOMPRESSION_CLASSEMENT = 16 * 1024 * 1024  # Octets décompressés au plus pour classer un PDF
+# Seul un scan (images sans aucune police) est refusé : l'absence de marqueur n'est qu'un indice
+REFUS_PAR_CLASSEMENT = {
+    'scan': "document scanné sans couche texte (OCR nécessaire)",
+}
+AVERTISSEMENTS_PAR_CLASSEMENT = {
+    'hors_liasse': "aucun formulaire 2050-2059 reconnu, ce n'est peut-être pas une liasse fiscale",
+}
+
+# --- Limites de l'extraction isolée (sous-processus) ---
+LIMITE_TEMPS_CPU = 120                      # Secondes de CPU
+LIMITE_MEMOIRE = 2 * 1024 * 1024 * 1024     # Octets d'espace d'adressage
+DELAI_MAX_ISOLE = 300                       # Secondes d'horloge avant arrêt forcé
+
+# --- Budget de temps par fichier (0 ou None : pas de limite, voir BudgetTemps) ---
+BUDGET_TEMPS_FICHIER = 60.0                 # Secondes pour l'ensemble du fichier
+BUDGET_TEMPS_SECTION = 10.0                 # Secondes pour chaque section
+
+# --- Profilage à la demande (voir activer_profilage) ---
+DOSSIER_PROFILS_DEFAUT = Path("resultats") / "profils"
+SEUIL_PROFILAGE = 10.0                      # Secondes : seuls les appels plus longs gardent leur profil
+INTERVALLE_ECHANTILLONNAGE = 0.005          # Secondes entre deux relevés de pile
+NB_FONCTIONS_PROFIL = 25                    # Fonctions listées dans le résumé
+
 
 # ============================================
 # FONCTIONS OUTILS
@@ -524,6 +664,524 @@ def normaliser_texte(texte):
     return "".join(char for char in texte if char.isalnum())
 
 
+def convertir_en_codes(donnees):
+    """Convertit les résultats d'un PDF (libellé, montant) en valeurs indexées par code.
+    
+    Les extractions produisent une ligne par code, dans l'ordre de CODES_PAR_SECTION : le code
+    est lu à la position de la ligne, car plusieurs codes partagent un libellé (GM et HC :
+    « Reprises sur provisions et transferts de charges »). Une ligne hors de cet ordre
+    (repli par libellés, tables modifiées depuis l'extraction) est rattachée par son libellé.
+    
+    Args:
+        donnees: Dict {'actif': [(libelle, montant), ...], 'passif': [...], ...}
+        
+    Returns:
+        dict: {section: {code: montant}} (les libellés sans code connu sont ignorés)
+    """
+    valeurs = {}
+    for section in CODES_PAR_SECTION:
+        code_par_libelle = INDEX_CODES['code_par_libelle'][section]
+        codes = list(CODES_PAR_SECTION[section].items())
+        valeurs_section = {}
+        for position, (libelle, montant) in enumerate(donnees.get(section, [])):
+            if position < len(codes) and codes[position][1] == libelle:
+                code = codes[position][0]
+            else:
+                code = code_par_libelle.get(libelle)
+            if code and code not in valeurs_section:
+                valeurs_section[code] = montant or 0
+        valeurs[section] = valeurs_section
+    return valeurs
+
+
+# ============================================
+# PROFILAGE À LA DEMANDE
+# ============================================
+
+# Réglages du profilage (désactivé tant que 'dossier' est vide, voir activer_profilage)
+PROFILAGE = {'dossier': None, 'seuil': SEUIL_PROFILAGE, 'methode': 'echantillonnage'}
+
+
+def activer_profilage(dossier=DOSSIER_PROFILS_DEFAUT, seuil=SEUIL_PROFILAGE, methode='echantillonnage'):
+    """Active le profilage de extraire_un_pdf et creer_fichier_excel pour ce processus (et ses fils).
+    
+    Args:
+        dossier: Dossier des profils (None pour désactiver)
+        seuil: Durée en secondes au-delà de laquelle le profil d'un appel est conservé (0 : toujours)
+        methode: 'echantillonnage' (surcoût faible, adapté au déclenchement sur seuil)
+                 ou 'cprofile' (comptage exact des appels, ralentit l'extraction)
+    """
+    if methode not in ('echantillonnage', 'cprofile'):
+        raise ValueError(f"Méthode de profilage inconnue : {methode}")
+    PROFILAGE.update(dossier=dossier, seuil=seuil, methode=methode)
+
+
+class EchantillonneurPile:
+    """Profileur par échantillonnage : relève la pile d'un thread à intervalle régulier.
+    
+    Les piles sont comptées au format « replié » (fonction;fonction;... nombre), lisible
+    par flamegraph.pl ou speedscope.
+    """
+    
+    def __init__(self, intervalle=INTERVALLE_ECHANTILLONNAGE):
+        import threading
+        self.intervalle = intervalle
+        self.piles = {}
+        self.nb_echantillons = 0
+        self._id_thread = threading.get_ident()
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._echantillonner, daemon=True)
+    
+    def _echantillonner(self):
+        import sys
+        while not self._arret.wait(self.intervalle):
+            frame = sys._current_frames().get(self._id_thread)
+            pile = []
+            while frame is not None:
+                code = frame.f_code
+                pile.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            pile = tuple(reversed(pile))
+            self.piles[pile] = self.piles.get(pile, 0) + 1
+            self.nb_echantillons += 1
+    
+    def demarrer(self):
+        self._thread.start()
+    
+    def arreter(self):
+        self._arret.set()
+        self._thread.join()
+    
+    def ecrire(self, chemin):
+        with open(chemin, 'w', encoding='utf-8') as f:
+            for pile, nombre in sorted(self.piles.items(), key=lambda p: -p[1]):
+                f.write(f"{';'.join(pile)} {nombre}\n")
+    
+    def resume(self, nb_fonctions):
+        """Fonctions les plus présentes : en propre (haut de pile) et en cumulé (n'importe où dans la pile)."""
+        propre, cumule = {}, {}
+        for pile, nombre in self.piles.items():
+            if not pile:
+                continue
+            propre[pile[-1]] = propre.get(pile[-1], 0) + nombre
+            for fonction in set(pile):
+                cumule[fonction] = cumule.get(fonction, 0) + nombre
+        
+        total = max(self.nb_echantillons, 1)
+        lignes = [f"{self.nb_echantillons} échantillon(s), un toutes les {self.intervalle * 1000:.0f} ms", ""]
+        for titre, compteurs in (("Temps propre", propre), ("Temps cumulé", cumule)):
+            lignes.append(f"--- {titre} ---")
+            for fonction, nombre in sorted(compteurs.items(), key=lambda c: -c[1])[:nb_fonctions]:
+                lignes.append(f"{100 * nombre / total:6.1f} %  {fonction}")
+            lignes.append("")
+        return "\n".join(lignes)
+
+
+@contextmanager
+def profiler(nom, dossier, seuil=SEUIL_PROFILAGE, methode='echantillonnage', nb_fonctions=NB_FONCTIONS_PROFIL):
+    """Profile le bloc et, s'il a duré au moins `seuil` secondes, enregistre le profil et son résumé.
+    
+    Artefacts écrits dans `dossier` : <horodatage>_<nom>.prof (cProfile, pour pstats/snakeviz)
+    ou .piles.txt (échantillonnage, piles repliées), et <horodatage>_<nom>.resume.txt
+    (les nb_fonctions fonctions les plus coûteuses).
+    """
+    if methode == 'cprofile':
+        import cProfile
+        profil = cProfile.Profile()
+        profil.enable()
+    else:
+        profil = EchantillonneurPile()
+        profil.demarrer()
+    debut = time.perf_counter()
+    
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        if methode == 'cprofile':
+            profil.disable()
+        else:
+            profil.arreter()
+        
+        if duree >= seuil:
+            dossier = Path(dossier)
+            dossier.mkdir(parents=True, exist_ok=True)
+            nom_fichier = re.sub(r"[^\w.-]+", "_", nom)
+            base = dossier / f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{nom_fichier}"
+            entete = f"{nom} : {duree:.2f} s (seuil {seuil} s), méthode {methode}\n\n"
+            
+            if methode == 'cprofile':
+                import io
+                import pstats
+                chemin_profil = base.with_name(base.name + ".prof")
+                profil.dump_stats(chemin_profil)
+                sortie = io.StringIO()
+                stats = pstats.Stats(profil, stream=sortie).strip_dirs()
+                stats.sort_stats('cumulative').print_stats(nb_fonctions)
+                stats.sort_stats('tottime').print_stats(nb_fonctions)
+                resume = sortie.getvalue()
+            else:
+                chemin_profil = base.with_name(base.name + ".piles.txt")
+                profil.ecrire(chemin_profil)
+                resume = profil.resume(nb_fonctions)
+            
+            base.with_name(base.name + ".resume.txt").write_text(entete + resume, encoding='utf-8')
+            print(f"🐢 {nom} : {duree:.1f} s, profil enregistré : {chemin_profil}")
+
+
+def profilable(argument_nom):
+    """Décorateur : profile la fonction lorsque le profilage est activé (voir activer_profilage).
+    
+    Args:
+        argument_nom: Paramètre de la fonction (un chemin) dont le nom de fichier identifie l'artefact
+    """
+    def decorer(fonction):
+        signature = inspect.signature(fonction)
+        
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not PROFILAGE['dossier']:
+                return fonction(*args, **kwargs)
+            chemin = signature.bind(*args, **kwargs).arguments.get(argument_nom)
+            nom = f"{fonction.__name__}_{Path(str(chemin)).stem}" if chemin else fonction.__name__
+            with profiler(nom, PROFILAGE['dossier'], PROFILAGE['seuil'], PROFILAGE['methode']):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorer
+
+
+# ============================================
+# BUDGET DE TEMPS PAR FICHIER
+# ============================================
+
+class BudgetTemps:
+    """Temps alloué à l'extraction d'un fichier et de chacune de ses sections.
+    
+    Une fois le budget épuisé, les niveaux coûteux (balayage complet du document, tableaux
+    des pages secondaires, repli par libellés, fuzzy matching) sont sautés : le résultat
+    reste partiel et la liste des niveaux ignorés est ajoutée aux résultats.
+    """
+    
+    def __init__(self, duree_fichier=BUDGET_TEMPS_FICHIER, duree_section=BUDGET_TEMPS_SECTION):
+        self.debut = time.monotonic()
+        self.fin_fichier = self.debut + duree_fichier if duree_fichier else None
+        self.duree_section = duree_section
+        self.fin_section = None
+        self.niveaux_ignores = []
+    
+    def commencer_section(self):
+        """Démarre le budget d'une section (le budget du fichier continue de courir)."""
+        self.fin_section = time.monotonic() + self.duree_section if self.duree_section else None
+    
+    def epuise(self):
+        maintenant = time.monotonic()
+        return any(fin is not None and maintenant >= fin for fin in (self.fin_fichier, self.fin_section))
+    
+    def ignorer(self, etape, niveau):
+        """Indique s'il faut sauter un niveau coûteux ; si oui, le note pour les résultats.
+        
+        Args:
+            etape: Section ou page concernée (ex: 'cr', 'echeances')
+            niveau: Niveau sauté ('balayage_complet', 'tableau', 'libelles', 'fuzzy')
+        """
+        if not self.epuise():
+            return False
+        ignore = {'etape': etape, 'niveau': niveau}
+        if ignore not in self.niveaux_ignores:
+            self.niveaux_ignores.append(ignore)
+            print(f"⏳ Budget de temps épuisé : niveau '{niveau}' ignoré pour '{etape}'")
+        return True
+
+
+# ============================================
+# INDEX DES CODES COMPTABLES
+# ============================================
+
+# Ordre des codes tel qu'écrit dans ce fichier (ordre des formulaires, repris dans l'Excel)
+_ORDRE_LITTERAL = {categorie: list(codes) for categorie, codes in CATEGORIES_CODES.items()}
+
+
+def _lire_classeur_codes(chemin):
+    """Lit les lignes (Catégorie, Code, Description) de codes_comptables.xlsx.
+    
+    Returns:
+        dict: {categorie: [(code, libelle), ...]} dans l'ordre du classeur
+    """
+    import openpyxl
+    
+    wb = openpyxl.load_workbook(chemin, read_only=True)
+    try:
+        categories = {}
+        for ligne in wb.worksheets[0].iter_rows(min_row=2, values_only=True):
+            categorie, code, libelle = (list(ligne) + [None] * 3)[:3]
+            if categorie in CATEGORIES_CODES and code and libelle:
+                categories.setdefault(categorie, []).append((str(code).strip().upper(), str(libelle).strip()))
+        return categories
+    finally:
+        wb.close()
+
+
+def compiler_index_codes(categories):
+    """Construit l'index des codes à partir des lignes du classeur.
+    
+    Le classeur fixe la liste des codes et leurs libellés ; l'ordre d'affichage reste celui
+    des formulaires (_ORDRE_LITTERAL), les codes ajoutés au classeur venant à la suite.
+    Une catégorie absente du classeur garde les codes écrits dans ce fichier.
+    
+    Returns:
+        dict: {'tables': {categorie: {code: libelle}},
+               'code_par_libelle': {section: {libelle: premier code portant ce libellé}},
+               'libelles_normalises': {section: {libelle normalisé: libelle}},
+               'regles': {code: (section, role de la page)}}
+    """
+    tables = {}
+    for categorie, ordre in _ORDRE_LITTERAL.items():
+        lignes = dict(categories.get(categorie, []))
+        if not lignes:
+            tables[categorie] = dict(CATEGORIES_CODES[categorie])
+            continue
+        codes = [code for code in ordre if code in lignes] + [code for code in lignes if code not in ordre]
+        tables[categorie] = {code: lignes[code] for code in codes}
+    
+    sections = {
+        'actif': tables['BILAN ACTIF'],
+        'passif': tables['BILAN PASSIF'],
+        'cr': tables['COMPTE DE RÉSULTAT'],
+        'echeances': {**tables['ÉCHÉANCES CRÉANCES'], **tables['ÉCHÉANCES DETTES']},
+        'affectation': {**tables['AFFECTATION RÉSULTAT'], **tables['RENSEIGNEMENTS DIVERS']},
+    }
+    
+    regles = {}
+    for section, codes in sections.items():
+        for code in codes:
+            if section == 'cr':
+                # 2052 : codes FA à GW ; 2053 : HA à HQ et A1
+                role = 'cr_page1' if code[0] in "FG" else 'cr_page2'
+            else:
+                role = PAGES_PAR_SECTION[section][0]
+            regles.setdefault(code, (section, role))
+    
+    return {
+        'tables': tables,
+        'code_par_libelle': {section: {libelle: code for code, libelle in reversed(codes.items())}
+                             for section, codes in sections.items()},
+        'libelles_normalises': {
+            'actif': {normaliser_texte(lib): lib for lib in LIBELLES_BILAN_ACTIF},
+            'passif': {normaliser_texte(lib): lib for lib in LIBELLES_BILAN_PASSIF},
+            'cr': {normaliser_texte(lib): lib for lib in sections['cr'].values()},
+        },
+        'regles': regles,
+    }
+
+
+def _signature_sources():
+    """Empreinte des tables écrites dans ce fichier qui entrent dans l'index (invalide le cache si elles changent)."""
+    sources = [_ORDRE_LITTERAL, list(LIBELLES_BILAN_ACTIF), list(LIBELLES_BILAN_PASSIF), VERSION_INDEX_CODES]
+    return hashlib.sha256(json.dumps(sources, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def charger_index_codes(chemin=CHEMIN_CODES_COMPTABLES, chemin_cache=CHEMIN_CACHE_INDEX_CODES):
+    """Charge l'index des codes depuis le cache binaire, ou le recompile depuis le classeur.
+    
+    Le cache est réutilisé tel quel si la date et la taille du classeur n'ont pas changé ;
+    sinon l'empreinte SHA-256 du classeur décide (un simple enregistrement sans modification
+    ne force pas de recompilation).
+    
+    Returns:
+        dict: Index (voir compiler_index_codes), ou None si le classeur est absent ou illisible
+    """
+    chemin, chemin_cache = Path(chemin), Path(chemin_cache)
+    try:
+        etat = chemin.stat()
+    except FileNotFoundError:
+        print(f"⚠️ {chemin.name} introuvable : tables de codes intégrées utilisées")
+        return None
+    signature = _signature_sources()
+    
+    cache = None
+    try:
+        with open(chemin_cache, 'rb') as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError):
+        pass
+    
+    if cache and cache.get('signature') == signature:
+        if (cache['mtime_ns'], cache['taille']) == (etat.st_mtime_ns, etat.st_size):
+            return cache['index']
+        sha256 = hashlib.sha256(chemin.read_bytes()).hexdigest()
+        if cache['sha256'] == sha256:
+            index = cache['index']
+        else:
+            index = None
+    else:
+        sha256 = hashlib.sha256(chemin.read_bytes()).hexdigest()
+        index = None
+    
+    if index is None:
+        try:
+            index = compiler_index_codes(_lire_classeur_codes(chemin))
+        except Exception as e:
+            print(f"⚠️ Lecture de {chemin.name} impossible ({e}) : tables de codes intégrées utilisées")
+            return None
+    
+    try:
+        chemin_cache.parent.mkdir(parents=True, exist_ok=True)
+        chemin_temp = chemin_cache.with_suffix('.tmp')
+        with open(chemin_temp, 'wb') as f:
+            pickle.dump({'signature': signature, 'mtime_ns': etat.st_mtime_ns, 'taille': etat.st_size,
+                         'sha256': sha256, 'index': index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(chemin_temp, chemin_cache)
+    except OSError as e:
+        print(f"⚠️ Cache de l'index des codes non écrit : {e}")
+    return index
+
+
+def appliquer_index_codes(index):
+    """Remplace sur place le contenu des tables de codes (les modules qui les ont importées voient la mise à jour)."""
+    global INDEX_CODES
+    for categorie, codes in CATEGORIES_CODES.items():
+        codes.clear()
+        codes.update(index['tables'][categorie])
+    CODES_PAR_SECTION['echeances'].clear()
+    CODES_PAR_SECTION['echeances'].update({**CODES_ETAT_ECHEANCES_CREANCES, **CODES_ETAT_ECHEANCES_DETTES})
+    CODES_PAR_SECTION['affectation'].clear()
+    CODES_PAR_SECTION['affectation'].update({**CODES_AFFECTATION_RESULTAT, **CODES_RENSEIGNEMENTS_DIVERS})
+    INDEX_CODES = index
+
+
+# Index du classeur (le plus souvent relu du cache binaire) ou, à défaut, des tables écrites dans ce fichier
+_index_classeur = charger_index_codes()
+if _index_classeur:
+    appliquer_index_codes(_index_classeur)
+else:
+    INDEX_CODES = compiler_index_codes({})
+
+
+# ============================================
+# CONTRÔLES COMPTABLES
+# ============================================
+
+def valider_section(section, donnees, roles_lus=None):
+    """Vérifie les identités comptables d'une section extraite.
+    
+    Une identité dont tous les montants sont nuls est indéterminée (rien n'a été lu), comme
+    une identité portant sur un code absent des données : le niveau par libellés ne connaît
+    pas tous les sous-totaux (ex: TOTAL (II) du passif), il ne peut pas les contredire.
+    
+    Args:
+        section: Nom de la section
+        donnees: Liste de tuples (libellé, montant)
+        roles_lus: Pages de la section effectivement lues (toutes par défaut) ; une identité
+                   portant sur un code d'une autre page n'est pas vérifiée (triage d'une seule page)
+    
+    Returns:
+        dict: {'statut': 'valide' | 'invalide' | 'indetermine',
+               'ecarts': [(libellé de l'identité, écart)] pour les identités non vérifiées}
+    """
+    identites = IDENTITES_COMPTABLES.get(section, [])
+    valeurs = convertir_en_codes({section: donnees})[section]
+    
+    identites = [(libelle, ajouts, retraits, code_total)
+                 for libelle, ajouts, retraits, code_total in identites
+                 if all(code in valeurs for code in ajouts + retraits + [code_total])]
+    if roles_lus is not None:
+        regles = INDEX_CODES['regles']
+        identites = [(libelle, ajouts, retraits, code_total)
+                     for libelle, ajouts, retraits, code_total in identites
+                     if all(code not in regles or regles[code][1] in roles_lus
+                            for code in ajouts + retraits + [code_total])]
+    
+    nb_verifiees = 0
+    ecarts = []
+    for libelle, ajouts, retraits, code_total in identites:
+        montants = [valeurs.get(code, 0) for code in ajouts + retraits + [code_total]]
+        if not any(montants):
+            continue
+        
+        total = valeurs.get(code_total, 0)
+        calcule = sum(valeurs.get(code, 0) for code in ajouts) - sum(valeurs.get(code, 0) for code in retraits)
+        ecart = calcule - total
+        tolerance = max(TOLERANCE_ECART_ABSOLU, TOLERANCE_ECART_RELATIF * abs(total))
+        if abs(ecart) <= tolerance:
+            nb_verifiees += 1
+        else:
+            ecarts.append((libelle, ecart))
+    
+    if ecarts:
+        statut = 'invalide'
+    elif nb_verifiees:
+        statut = 'valide'
+    else:
+        statut = 'indetermine'
+    return {'statut': statut, 'ecarts': ecarts}
+
+
+def controler_equilibre_bilan(donnees):
+    """Vérifie que le total de l'actif (CO) est égal au total du passif (EE).
+    
+    Returns:
+        dict: Même format que valider_section
+    """
+    valeurs = convertir_en_codes(donnees)
+    total_actif = valeurs['actif'].get('CO', 0)
+    total_passif = valeurs['passif'].get('EE', 0)
+    if not total_actif or not total_passif:
+        return {'statut': 'indetermine', 'ecarts': []}
+    
+    ecart = total_actif - total_passif
+    tolerance = max(TOLERANCE_ECART_ABSOLU, TOLERANCE_ECART_RELATIF * abs(total_actif))
+    if abs(ecart) <= tolerance:
+        return {'statut': 'valide', 'ecarts': []}
+    return {'statut': 'invalide', 'ecarts': [("CO = EE", ecart)]}
+
+
+def _choisir_avec_controles(section, donnees_codes, nb_trouves, seuil, repli, budget=None, roles_lus=None):
+    """Décide s'il faut passer au niveau de secours (libellés) à partir des identités comptables.
+    
+    - Identités vérifiées : le résultat par codes est conservé, quel que soit le nombre de valeurs.
+    - Identités fausses : bascule sur le niveau de secours.
+    - Identités indéterminées : on revient à la règle du seuil de valeurs non nulles.
+    Un résultat par codes insuffisant (sous le seuil ou indéterminé) cède la place au niveau
+    de secours, sauf si celui-ci est invalide ; sinon le niveau de secours n'est retenu que
+    si son contrôle est meilleur (à égalité d'invalidité, les codes sont conservés).
+    
+    Args:
+        repli: Fonction sans argument renvoyant le résultat du niveau de secours
+        budget: BudgetTemps du fichier ; une fois épuisé, le résultat par codes est conservé
+        roles_lus: Pages de la section effectivement lues (voir valider_section)
+        
+    Returns:
+        tuple: (donnees, controle)
+    """
+    controle = valider_section(section, donnees_codes, roles_lus)
+    
+    if controle['statut'] == 'valide':
+        print("✅ Identités comptables vérifiées, extraction par codes conservée.")
+        return donnees_codes, controle
+    if controle['statut'] == 'indetermine' and nb_trouves >= seuil:
+        print("✅ Succès de l'extraction par codes.")
+        return donnees_codes, controle
+    
+    if controle['statut'] == 'invalide':
+        identites = ", ".join(f"{libelle} (écart {ecart:,.2f})" for libelle, ecart in controle['ecarts'])
+        print(f"⚠️ Identités non vérifiées : {identites}. Basculement sur libellés.")
+    else:
+        print(f"⚠️ Échec par codes ({nb_trouves} valeurs). Basculement sur libellés.")
+    
+    if budget and budget.ignorer(section, 'libelles'):
+        return donnees_codes, controle
+    
+    donnees_repli = repli()
+    controle_repli = valider_section(section, donnees_repli, roles_lus)
+    rang, rang_repli = RANG_STATUT_CONTROLE[controle['statut']], RANG_STATUT_CONTROLE[controle_repli['statut']]
+    codes_insuffisants = nb_trouves < seuil or controle['statut'] == 'indetermine'
+    if controle_repli['statut'] != 'invalide' and (codes_insuffisants or rang_repli > rang):
+        return donnees_repli, controle_repli
+    
+    print("⚠️ Les libellés ne font pas mieux, extraction par codes conservée.")
+    return donnees_codes, controle
+
+
 # ============================================
 # FONCTIONS D'EXTRACTION - ACTIF
 # ============================================
@@ -562,7 +1220,7 @@ def extraire_bilan_actif_par_codes(chemin_pdf, table_actif):
     resultats = [(CODES_BILAN_ACTIF[code], codes_trouves.get(code, 0)) for code in CODES_BILAN_ACTIF.keys()]
     return resultats, nb_trouves
 
-def extraire_bilan_actif_par_libelles(chemin_pdf, table_actif):
+def extraire_bilan_actif_par_libelles(chemin_pdf, table_actif, budget=None):
     """Extrait le Bilan Actif en cherchant les LIBELLÉS dans le tableau (méthode de secours)."""
     print("   → Extraction par LIBELLÉS...")
     
@@ -571,10 +1229,12 @@ def extraire_bilan_actif_par_libelles(chemin_pdf, table_actif):
         print("   ⚠️ Colonne 'Net' introuvable.")
         return []
 
-    libelles_normalises = {normaliser_texte(lib): lib for lib in LIBELLES_BILAN_ACTIF.keys()}
+    libelles_normalises = INDEX_CODES['libelles_normalises']['actif']
     libelles_trouves = {}
 
     for row in table_actif:
+        if budget and budget.ignorer('actif', 'libelles'):
+            break
         if not row: continue
         
         libelle_trouve = None
@@ -639,7 +1299,7 @@ def extraire_bilan_passif_par_codes(chemin_pdf, table_passif):
     resultats = [(CODES_BILAN_PASSIF[code], codes_trouves.get(code, 0)) for code in CODES_BILAN_PASSIF.keys()]
     return resultats, nb_trouves
 
-def extraire_bilan_passif_par_libelles(chemin_pdf, table_passif):
+def extraire_bilan_passif_par_libelles(chemin_pdf, table_passif, budget=None):
     """Extrait le Bilan Passif en cherchant les LIBELLÉS dans le tableau (méthode de secours)."""
     print("   → Extraction par LIBELLÉS...")
     
@@ -648,10 +1308,12 @@ def extraire_bilan_passif_par_libelles(chemin_pdf, table_passif):
         print("   ⚠️ Colonne 'Exercice N' introuvable.")
         return []
 
-    libelles_normalises = {normaliser_texte(lib): lib for lib in LIBELLES_BILAN_PASSIF.keys()}
+    libelles_normalises = INDEX_CODES['libelles_normalises']['passif']
     libelles_trouves = {}
 
     for row in table_passif:
+        if budget and budget.ignorer('passif', 'libelles'):
+            break
         if not row: continue
         
         libelle_trouve = None
@@ -752,12 +1414,16 @@ def _trouver_colonne_compte_resultat_page2(table_cr):
         print("   ⚠️ [PAGE 2] Impossible de trouver 'Exercice N'")
         return None
 
-def extraire_compte_resultat_par_codes(chemin_pdf, pdf_obj):
+def extraire_compte_resultat_par_codes(chemin_pdf, table_page1, table_page2):
     """Extrait le Compte de Résultat en cherchant les CODES dans les tableaux des DEUX pages.
     
     Le Compte de Résultat est sur 2 pages :
     - PAGE 3 du PDF (page 1 du CR) : Codes FA à GW
     - PAGE 4 du PDF (page 2 du CR) : Codes HA à HN + HP, HQ, A1
+    
+    Args:
+        table_page1: Premier tableau de la page 1 du CR (None si page absente)
+        table_page2: Premier tableau de la page 2 du CR (None si page absente)
     """
     print("   → Tentative d'extraction par CODES (2 pages)...")
     
@@ -768,64 +1434,40 @@ def extraire_compte_resultat_par_codes(chemin_pdf, pdf_obj):
     # ========================================
     print("\n   📄 Traitement de la PAGE 1 du Compte de Résultat...")
     
-    # Trouver la page 1
-    cr_page1_index = -1
-    for i, page in enumerate(pdf_obj.pages):
-        text = page.extract_text()
-        if text and ("Ventes de marchandises" in text or "Ventes" in text):
-            cr_page1_index = i
-            print(f"   ✓ Page 1 identifiée : page {i + 1} du PDF")
-            break
-    
-    if cr_page1_index != -1:
-        tables_page1 = pdf_obj.pages[cr_page1_index].extract_tables()
-        if tables_page1:
-            table_page1 = tables_page1[0]
-            idx_montant_page1 = _trouver_colonne_compte_resultat_page1(table_page1)
-            
-            if idx_montant_page1 is not None:
-                # Extraire les codes de la page 1
-                for row in table_page1:
-                    if not row: continue
-                    for idx, cell in enumerate(row):
-                        if cell:
-                            cell_text = str(cell).strip().upper()
-                            if cell_text in CODES_COMPTE_RESULTAT:
-                                montant_brut = nettoyer_montant(row[idx_montant_page1]) if idx_montant_page1 < len(row) else None
-                                montant = montant_brut if montant_brut is not None else 0.0
-                                codes_trouves[cell_text] = montant
+    if table_page1:
+        idx_montant_page1 = _trouver_colonne_compte_resultat_page1(table_page1)
+        
+        if idx_montant_page1 is not None:
+            # Extraire les codes de la page 1
+            for row in table_page1:
+                if not row: continue
+                for idx, cell in enumerate(row):
+                    if cell:
+                        cell_text = str(cell).strip().upper()
+                        if cell_text in CODES_COMPTE_RESULTAT:
+                            montant_brut = nettoyer_montant(row[idx_montant_page1]) if idx_montant_page1 < len(row) else None
+                            montant = montant_brut if montant_brut is not None else 0.0
+                            codes_trouves[cell_text] = montant
     
     # ========================================
     # ÉTAPE 2 : TRAITER LA PAGE 2 (PAGE 4 DU PDF)
     # ========================================
     print("\n   📄 Traitement de la PAGE 2 du Compte de Résultat...")
     
-    # Trouver la page 2
-    cr_page2_index = -1
-    for i, page in enumerate(pdf_obj.pages):
-        text = page.extract_text()
-        if text and ("Produits exceptionnels" in text or "PRODUITS EXCEPTIONNELS" in text):
-            cr_page2_index = i
-            print(f"   ✓ Page 2 identifiée : page {i + 1} du PDF")
-            break
-    
-    if cr_page2_index != -1:
-        tables_page2 = pdf_obj.pages[cr_page2_index].extract_tables()
-        if tables_page2:
-            table_page2 = tables_page2[0]
-            idx_montant_page2 = _trouver_colonne_compte_resultat_page2(table_page2)
-            
-            if idx_montant_page2 is not None:
-                # Extraire les codes de la page 2
-                for row in table_page2:
-                    if not row: continue
-                    for idx, cell in enumerate(row):
-                        if cell:
-                            cell_text = str(cell).strip().upper()
-                            if cell_text in CODES_COMPTE_RESULTAT:
-                                montant_brut = nettoyer_montant(row[idx_montant_page2]) if idx_montant_page2 < len(row) else None
-                                montant = montant_brut if montant_brut is not None else 0.0
-                                codes_trouves[cell_text] = montant
+    if table_page2:
+        idx_montant_page2 = _trouver_colonne_compte_resultat_page2(table_page2)
+        
+        if idx_montant_page2 is not None:
+            # Extraire les codes de la page 2
+            for row in table_page2:
+                if not row: continue
+                for idx, cell in enumerate(row):
+                    if cell:
+                        cell_text = str(cell).strip().upper()
+                        if cell_text in CODES_COMPTE_RESULTAT:
+                            montant_brut = nettoyer_montant(row[idx_montant_page2]) if idx_montant_page2 < len(row) else None
+                            montant = montant_brut if montant_brut is not None else 0.0
+                            codes_trouves[cell_text] = montant
 
     nb_trouves = len([v for v in codes_trouves.values() if v != 0.0])
     print(f"\n   ℹ️ Codes détectés : {len(codes_trouves)} | Valeurs non-nulles : {nb_trouves}")
@@ -833,88 +1475,324 @@ def extraire_compte_resultat_par_codes(chemin_pdf, pdf_obj):
     resultats = [(CODES_COMPTE_RESULTAT[code], codes_trouves.get(code, 0)) for code in CODES_COMPTE_RESULTAT.keys()]
     return resultats, nb_trouves
 
-def extraire_compte_resultat_par_libelles(chemin_pdf, table_cr):
-    """Extrait le Compte de Résultat en cherchant les LIBELLÉS dans le tableau (méthode de secours)."""
+def extraire_compte_resultat_par_libelles(chemin_pdf, table_page1, table_page2, budget=None):
+    """Extrait le Compte de Résultat en cherchant les LIBELLÉS dans les tableaux des deux pages (méthode de secours)."""
     print("   → Extraction par LIBELLÉS...")
     
-    idx_montant = _trouver_colonne_compte_resultat(table_cr)
-    if idx_montant is None:
-        print("   ⚠️ Colonne de montants introuvable.")
-        return []
-
-    libelles_normalises = {normaliser_texte(lib): lib for lib in CODES_COMPTE_RESULTAT.values()}
+    libelles_normalises = INDEX_CODES['libelles_normalises']['cr']
     libelles_trouves = {}
 
-    for row in table_cr:
-        if not row: continue
+    pages = [
+        (table_page1, _trouver_colonne_compte_resultat_page1),
+        (table_page2, _trouver_colonne_compte_resultat_page2),
+    ]
+    for table_cr, trouver_colonne in pages:
+        if not table_cr:
+            continue
         
-        libelle_trouve = None
-        for cell in row:
-            if cell:
-                cell_normalise = normaliser_texte(str(cell).strip())
-                if cell_normalise in libelles_normalises:
-                    libelle_trouve = libelles_normalises[cell_normalise]
-                    break
+        idx_montant = trouver_colonne(table_cr)
+        if idx_montant is None:
+            print("   ⚠️ Colonne de montants introuvable.")
+            continue
 
-        if libelle_trouve:
-            montant_brut = nettoyer_montant(row[idx_montant]) if idx_montant < len(row) else None
-            montant = montant_brut if montant_brut is not None else 0.0
-            libelles_trouves[libelle_trouve] = montant
+        for row in table_cr:
+            if budget and budget.ignorer('cr', 'libelles'):
+                break
+            if not row: continue
+            
+            libelle_trouve = None
+            for cell in row:
+                if cell:
+                    cell_normalise = normaliser_texte(str(cell).strip())
+                    if cell_normalise in libelles_normalises:
+                        libelle_trouve = libelles_normalises[cell_normalise]
+                        break
+
+            if libelle_trouve:
+                montant_brut = nettoyer_montant(row[idx_montant]) if idx_montant < len(row) else None
+                montant = montant_brut if montant_brut is not None else 0.0
+                libelles_trouves[libelle_trouve] = montant
 
     resultats = [(libelle, libelles_trouves.get(libelle, 0)) for libelle in CODES_COMPTE_RESULTAT.values()]
     return resultats
 
 
 # ============================================
-# FONCTIONS PRINCIPALES
+# FONCTIONS D'EXTRACTION - EXERCICE N-1
 # ============================================
 
-def creer_fichier_excel(donnees_par_annee, nom_fichier):
-    """Crée le fichier Excel avec UN SEUL onglet structuré par catégories.
+# En-tête de la colonne N-1 : tiret simple, demi-cadratin, cadratin, insécable ou signe moins selon l'éditeur
+MOTIF_EXERCICE_PRECEDENT = re.compile(r"N\s*[-\u2010\u2011\u2012\u2013\u2014\u2212]\s*1|EXERCICE\s+PR[ÉE]C[ÉE]DENT",
+                                      re.IGNORECASE)
+
+
+def _trouver_colonne_n_1(table, idx_colonne_n):
+    """Trouve l'index de la colonne 'Exercice N-1', située à droite de la colonne de l'exercice N.
     
-    Args:
-        donnees_par_annee: Dict avec structure {
-            'annee1': {'actif': [...], 'passif': [...], 'cr': [...], 'echeances': [...], 'affectation': [...]},
-            'annee2': {...}
-        }
-        nom_fichier: Path du fichier Excel à créer
+    Selon les éditeurs, l'en-tête est fusionné avec la colonne des codes ou placé juste
+    au-dessus des montants : on retient, entre l'en-tête et la colonne suivante, celle qui
+    contient le plus de montants.
     """
-    print(f"📊 Création du fichier : {nom_fichier.name}")
-    wb = openpyxl.Workbook()
+    if idx_colonne_n is None:
+        return None
     
-    # Trier les années chronologiquement
-    annees_triees = sorted(donnees_par_annee.keys())
-    print(f"   📅 Années détectées : {', '.join(annees_triees)}")
+    idx_entete = None
+    for row in table[:10]:
+        for idx, cell in enumerate(row):
+            if idx > idx_colonne_n and cell and MOTIF_EXERCICE_PRECEDENT.search(str(cell)):
+                idx_entete = idx
+                break
+        if idx_entete is not None:
+            break
     
-    # ========================================
-    # ONGLET UNIQUE avec colonne Catégorie
-    # ========================================
-    ws = wb.active
-    ws.title = "Données Fiscales"
+    if idx_entete is None:
+        return None
     
-    # En-têtes
-    ws['A1'] = "Catégorie"
-    ws['A1'].font = openpyxl.styles.Font(bold=True, size=12)
-    ws['B1'] = "Libellé"
-    ws['B1'].font = openpyxl.styles.Font(bold=True, size=12)
+    candidats = [idx for idx in (idx_entete, idx_entete + 1) if idx != idx_colonne_n]
+    nb_montants = {
+        idx: sum(1 for row in table if idx < len(row) and nettoyer_montant(row[idx]) is not None)
+        for idx in candidats
+    }
+    idx_montants = max(candidats, key=lambda idx: nb_montants[idx])
+    print(f"   ✓ Colonne 'Exercice N-1' : index {idx_montants}")
+    return idx_montants
+
+
+def _lire_codes_colonne(table, codes, idx_montant):
+    """Lit le montant de chaque code présent dans le tableau, dans la colonne indiquée."""
+    codes_trouves = {}
+    for row in table:
+        if not row: continue
+        for cell in row:
+            if cell:
+                cell_text = str(cell).strip().upper()
+                if cell_text in codes:
+                    montant_brut = nettoyer_montant(row[idx_montant]) if idx_montant < len(row) else None
+                    codes_trouves[cell_text] = montant_brut if montant_brut is not None else 0.0
+    return codes_trouves
+
+
+def extraire_exercice_precedent(tableaux):
+    """Extrait la colonne 'Exercice N-1' des pages 2050, 2051, 2052 et 2053 lorsqu'elle existe.
     
-    for col_idx, annee in enumerate(annees_triees, start=3):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.value = annee
-        cell.font = openpyxl.styles.Font(bold=True, size=12)
+    Returns:
+        dict: {'actif': [...], 'passif': [...], 'cr': [...]} limité aux sections où la colonne
+              N-1 a été trouvée (dict vide si la liasse n'imprime pas l'exercice précédent)
+    """
+    print("\n--- 🚀 EXTRACTION DE L'EXERCICE N-1 ---")
     
-    # Ligne actuelle
-    current_row = 2
+    pages = [
+        ('actif', tableaux.get('actif'), _trouver_colonne_net, CODES_BILAN_ACTIF),
+        ('passif', tableaux.get('passif'), _trouver_colonne_passif_n, CODES_BILAN_PASSIF),
+        ('cr', tableaux.get('cr_page1'), _trouver_colonne_compte_resultat_page1, CODES_COMPTE_RESULTAT),
+        ('cr', tableaux.get('cr_page2'), _trouver_colonne_compte_resultat_page2, CODES_COMPTE_RESULTAT),
+    ]
     
-    # ========================================
-    # SECTION 1: BILAN ACTIF
-    # ========================================
-    if annees_triees:
-        premiere_annee = annees_triees[0]
-        donnees_actif = donnees_par_annee[premiere_annee].get('actif', [])
-        
-        for libelle, _ in donnees_actif:
-            ws[f'A{current_row}'] = "BILAN ACTIF"
+    codes_par_section = {}
+    for section, table, trouver_colonne_n, codes in pages:
+        if not table:
+            continue
+        idx_n_1 = _trouver_colonne_n_1(table, trouver_colonne_n(table))
+        if idx_n_1 is None:
+            continue
+        codes_par_section.setdefault(section, {}).update(_lire_codes_colonne(table, codes, idx_n_1))
+    
+    if not codes_par_section:
+        print("   ℹ️ Pas de colonne 'Exercice N-1' dans cette liasse.")
+    
+    return {
+        section: [(libelle, codes_trouves.get(code, 0)) for code, libelle in CODES_PAR_SECTION[section].items()]
+        for section, codes_trouves in codes_par_section.items()
+    }
+
+
+def fusionner_exercices_precedents(donnees_par_annee):
+    """Intègre les colonnes N-1 extraites dans donnees_par_annee (modifié en place).
+    
+    Règles de fusion pour l'année N-1 d'un PDF :
+    - Année absente : elle est créée à partir de la colonne N-1.
+    - Année déjà extraite de son propre PDF : sa colonne N fait foi ; une section vide
+      (aucun montant) est complétée par la colonne N-1, et les écarts sont signalés.
+    - Même année N-1 fournie par deux PDFs : le PDF le plus récent l'emporte.
+    
+    Returns:
+        list: Conflits (annee, section, code, montant retenu, montant N-1 écarté)
+    """
+    conflits = []
+    
+    # Du plus récent au plus ancien, pour que le PDF le plus récent l'emporte
+    for annee in sorted(donnees_par_annee, reverse=True):
+        precedent = donnees_par_annee[annee].get('exercice_precedent')
+        if not precedent or not str(annee).isdigit():
+            continue
+        
+        annee_precedente = str(int(annee) - 1)
+        cible = donnees_par_annee.get(annee_precedente)
+        
+        if cible is None:
+            donnees_par_annee[annee_precedente] = {
+                **{section: [] for section in SECTIONS},
+                **precedent,
+                'origine': f"N-1 de {annee}",
+            }
+            print(f"📅 Année {annee_precedente} reconstituée à partir de la colonne N-1 de {annee}")
+            continue
+        
+        for section, donnees in precedent.items():
+            retenues = convertir_en_codes({section: cible.get(section, [])})[section]
+            if not any(retenues.values()):
+                cible[section] = donnees
+                print(f"📅 Année {annee_precedente} : section '{section}' complétée par la colonne N-1 de {annee}")
+                continue
+            
+            for code, montant in convertir_en_codes({section: donnees})[section].items():
+                montant_retenu = retenues.get(code, 0)
+                tolerance = max(TOLERANCE_ECART_ABSOLU, TOLERANCE_ECART_RELATIF * abs(montant_retenu))
+                if montant and abs(montant_retenu - montant) > tolerance:
+                    conflits.append((annee_precedente, section, code, montant_retenu, montant))
+    
+    for annee, section, code, montant_retenu, montant in conflits:
+        print(f"⚠️ Année {annee}, {section} {code} : {montant_retenu:,.2f} retenu, "
+              f"{montant:,.2f} en N-1 de l'année suivante (retraitement ?)")
+    
+    return conflits
+
+
+# ============================================
+# FONCTIONS PRINCIPALES
+# ============================================
+
+def _libelles_section(donnees_par_annee, annees, section):
+    """Liste les libellés d'une section présents dans au moins une année, dans l'ordre d'apparition."""
+    libelles = {}
+    for annee in annees:
+        for libelle, _ in donnees_par_annee[annee].get(section, []):
+            libelles.setdefault(libelle, None)
+    return list(libelles)
+
+
+# Structure de l'onglet "Analyse Financière" : (libellé, clé du ratio, format)
+STRUCTURE_ANALYSE = [
+    ("=== ACTIVITÉ & RENTABILITÉ (K€) ===", None, None),
+    ("Durée (en mois)", "duree_mois", None),
+    ("CA", "ca", None),
+    ("Production stockée + immobilisée", "prod_stockee_immo", None),
+    ("Production globale", "prod_globale", None),
+    ("AACE", "aace", None),
+    ("Dont sous-traitance", "sous_traitance", None),
+    ("% Production globale", "pct_sous_traitance", "%"),
+    ("Production interne", "prod_interne", None),
+    ("Consommation de matières premières et marchandises", "conso_matieres", None),
+    ("% production interne", "pct_conso_matieres", "%"),
+    ("Charge de personnel", "charge_personnel", None),
+    ("Intérim", "interim", None),
+    ("% production interne", "pct_charge_personnel", "%"),
+    ("EBE", "ebe", None),
+    ("% production interne", "pct_ebe", "%"),
+    ("Résultat d'exploitation", "resultat_exploitation", None),
+    ("% production interne", "pct_resultat_exploitation", "%"),
+    ("Charges financières", "charges_financieres", None),
+    ("%EBE", "pct_charges_financieres", "%"),
+    ("Résultat exceptionnel", "resultat_exceptionnel", None),
+    ("Résultat net", "resultat_net", None),
+    ("%PI", "pct_resultat_net", "%"),
+    ("CAF (y.c crédit bail)", "caf", None),
+    ("", None, None),  # Ligne vide
+    ("=== BILAN (K€) ===", None, None),
+    ("Durée (en mois)", "duree_mois", None),
+    ("Non-valeurs", "non_valeurs", None),
+    ("Total bilan", "total_bilan", None),
+    ("Capitaux propres", "capitaux_propres", None),
+    ("Solvabilité (%)", "solvabilite", "%"),
+    ("Couverture de l'activité (%)", "couverture_activite", "%"),
+    ("Dette brute", "dette_brute", None),
+    ("Gearing brut", "gearing_brut", None),
+    ("Leverage brut", "leverage_brut", None),
+    ("Dont MLT", "dont_mlt", None),
+    ("Dont crédit bail", "dont_cb", None),
+    ("Capacité de remboursement", "capacite_remboursement", None),
+    ("Annuités à venir", "annuites", None),
+    ("Couverture des annuités à venir avec la CAF", "couverture_annuites", None),
+    ("Dette nette", "dette_nette", None),
+    ("Gearing net", "gearing_net", None),
+    ("Leverage net", "leverage_net", None),
+    ("C/C Actif", "cc_actif", None),
+    ("C/C Passif", "cc_passif", None),
+    ("Dividendes", "dividendes", None),
+    ("", None, None),  # Ligne vide
+    ("=== CYCLE D'EXPLOITATION (K€) ===", None, None),
+    ("Durée (en mois)", "duree_mois", None),
+    ("FRNG", "frng", None),
+    ("BFR", "bfr", None),
+    ("Dont BFRE", "bfre", None),
+    ("Nb jours", "nb_jours_bfre", "jours"),
+    ("Dont Stocks", "stocks", None),
+    ("Nb jours", "nb_jours_stocks", "jours"),
+    ("Dont créances clients", "creances_clients", None),
+    ("Nb jours", "nb_jours_creances", "jours"),
+    ("% créances douteuses", "pct_creances_douteuses", "%"),
+    ("% créances douteuses provisionnées", "pct_creances_douteuses_prov", "%"),
+    ("Dont dettes fournisseurs", "dettes_fournisseurs", None),
+    ("Nb jours", "nb_jours_fournisseurs", "jours"),
+    ("Trésorerie nette", "tresorerie_nette", None),
+]
+
+# Catégorie affichée et mots signalant une ligne de total (en gras) pour chaque section
+PRESENTATION_SECTIONS = {
+    'actif': ("BILAN ACTIF", ["TOTAL"]),
+    'passif': ("BILAN PASSIF", ["TOTAL"]),
+    'cr': ("COMPTE RÉSULTAT", ["TOTAL", "RÉSULTAT", "CHIFFRE D'AFFAIRES", "BÉNÉFICE", "PERTE"]),
+    'echeances': ("ÉCHÉANCES", []),
+    'affectation': ("AFFECTATION", []),
+}
+
+
+@profilable('nom_fichier')
+def creer_fichier_excel(donnees_par_annee, nom_fichier):
+    """Crée le fichier Excel avec UN SEUL onglet structuré par catégories.
+    
+    Args:
+        donnees_par_annee: Dict avec structure {
+            'annee1': {'actif': [...], 'passif': [...], 'cr': [...], 'echeances': [...], 'affectation': [...]},
+            'annee2': {...}
+        }
+        nom_fichier: Path du fichier Excel à créer
+    """
+    import openpyxl
+    
+    print(f"📊 Création du fichier : {nom_fichier.name}")
+    wb = openpyxl.Workbook()
+    
+    # Trier les années chronologiquement
+    annees_triees = sorted(donnees_par_annee.keys())
+    print(f"   📅 Années détectées : {', '.join(annees_triees)}")
+    
+    # ========================================
+    # ONGLET UNIQUE avec colonne Catégorie
+    # ========================================
+    ws = wb.active
+    ws.title = "Données Fiscales"
+    
+    # En-têtes
+    ws['A1'] = "Catégorie"
+    ws['A1'].font = openpyxl.styles.Font(bold=True, size=12)
+    ws['B1'] = "Libellé"
+    ws['B1'].font = openpyxl.styles.Font(bold=True, size=12)
+    
+    for col_idx, annee in enumerate(annees_triees, start=3):
+        cell = ws.cell(row=1, column=col_idx)
+        cell.value = annee
+        cell.font = openpyxl.styles.Font(bold=True, size=12)
+    
+    # Ligne actuelle
+    current_row = 2
+    
+    # ========================================
+    # SECTION 1: BILAN ACTIF
+    # ========================================
+    if annees_triees:
+        for libelle in _libelles_section(donnees_par_annee, annees_triees, 'actif'):
+            ws[f'A{current_row}'] = "BILAN ACTIF"
             ws[f'B{current_row}'] = libelle
             
             # Mettre en gras les TOTAUX
@@ -943,10 +1821,7 @@ def creer_fichier_excel(donnees_par_annee, nom_fichier):
     # SECTION 2: BILAN PASSIF
     # ========================================
     if annees_triees:
-        premiere_annee = annees_triees[0]
-        donnees_passif = donnees_par_annee[premiere_annee].get('passif', [])
-        
-        for libelle, _ in donnees_passif:
+        for libelle in _libelles_section(donnees_par_annee, annees_triees, 'passif'):
             ws[f'A{current_row}'] = "BILAN PASSIF"
             ws[f'B{current_row}'] = libelle
             
@@ -976,10 +1851,7 @@ def creer_fichier_excel(donnees_par_annee, nom_fichier):
     # SECTION 3: COMPTE DE RÉSULTAT
     # ========================================
     if annees_triees:
-        premiere_annee = annees_triees[0]
-        donnees_cr = donnees_par_annee[premiere_annee].get('cr', [])
-        
-        for libelle, _ in donnees_cr:
+        for libelle in _libelles_section(donnees_par_annee, annees_triees, 'cr'):
             ws[f'A{current_row}'] = "COMPTE RÉSULTAT"
             ws[f'B{current_row}'] = libelle
             
@@ -1009,10 +1881,7 @@ def creer_fichier_excel(donnees_par_annee, nom_fichier):
     # SECTION 4: ÉTAT DES ÉCHÉANCES
     # ========================================
     if annees_triees:
-        premiere_annee = annees_triees[0]
-        donnees_echeances = donnees_par_annee[premiere_annee].get('echeances', [])
-        
-        for libelle, _ in donnees_echeances:
+        for libelle in _libelles_section(donnees_par_annee, annees_triees, 'echeances'):
             ws[f'A{current_row}'] = "ÉCHÉANCES"
             ws[f'B{current_row}'] = libelle
             
@@ -1034,10 +1903,7 @@ def creer_fichier_excel(donnees_par_annee, nom_fichier):
     # SECTION 5: AFFECTATION & RENSEIGNEMENTS
     # ========================================
     if annees_triees:
-        premiere_annee = annees_triees[0]
-        donnees_affectation = donnees_par_annee[premiere_annee].get('affectation', [])
-        
-        for libelle, _ in donnees_affectation:
+        for libelle in _libelles_section(donnees_par_annee, annees_triees, 'affectation'):
             ws[f'A{current_row}'] = "AFFECTATION"
             ws[f'B{current_row}'] = libelle
             
@@ -1080,74 +1946,8 @@ def creer_fichier_excel(donnees_par_annee, nom_fichier):
     
     current_row = 2
     
-    # Structure des données à afficher
-    structure_analyse = [
-        ("=== ACTIVITÉ & RENTABILITÉ (K€) ===", None, None),
-        ("Durée (en mois)", "duree_mois", None),
-        ("CA", "ca", None),
-        ("Production stockée + immobilisée", "prod_stockee_immo", None),
-        ("Production globale", "prod_globale", None),
-        ("AACE", "aace", None),
-        ("Dont sous-traitance", "sous_traitance", None),
-        ("% Production globale", "pct_sous_traitance", "%"),
-        ("Production interne", "prod_interne", None),
-        ("Consommation de matières premières et marchandises", "conso_matieres", None),
-        ("% production interne", "pct_conso_matieres", "%"),
-        ("Charge de personnel", "charge_personnel", None),
-        ("Intérim", "interim", None),
-        ("% production interne", "pct_charge_personnel", "%"),
-        ("EBE", "ebe", None),
-        ("% production interne", "pct_ebe", "%"),
-        ("Résultat d'exploitation", "resultat_exploitation", None),
-        ("% production interne", "pct_resultat_exploitation", "%"),
-        ("Charges financières", "charges_financieres", None),
-        ("%EBE", "pct_charges_financieres", "%"),
-        ("Résultat exceptionnel", "resultat_exceptionnel", None),
-        ("Résultat net", "resultat_net", None),
-        ("%PI", "pct_resultat_net", "%"),
-        ("CAF (y.c crédit bail)", "caf", None),
-        ("", None, None),  # Ligne vide
-        ("=== BILAN (K€) ===", None, None),
-        ("Durée (en mois)", "duree_mois", None),
-        ("Non-valeurs", "non_valeurs", None),
-        ("Total bilan", "total_bilan", None),
-        ("Capitaux propres", "capitaux_propres", None),
-        ("Solvabilité (%)", "solvabilite", "%"),
-        ("Couverture de l'activité (%)", "couverture_activite", "%"),
-        ("Dette brute", "dette_brute", None),
-        ("Gearing brut", "gearing_brut", None),
-        ("Leverage brut", "leverage_brut", None),
-        ("Dont MLT", "dont_mlt", None),
-        ("Dont crédit bail", "dont_cb", None),
-        ("Capacité de remboursement", "capacite_remboursement", None),
-        ("Annuités à venir", "annuites", None),
-        ("Couverture des annuités à venir avec la CAF", "couverture_annuites", None),
-        ("Dette nette", "dette_nette", None),
-        ("Gearing net", "gearing_net", None),
-        ("Leverage net", "leverage_net", None),
-        ("C/C Actif", "cc_actif", None),
-        ("C/C Passif", "cc_passif", None),
-        ("Dividendes", "dividendes", None),
-        ("", None, None),  # Ligne vide
-        ("=== CYCLE D'EXPLOITATION (K€) ===", None, None),
-        ("Durée (en mois)", "duree_mois", None),
-        ("FRNG", "frng", None),
-        ("BFR", "bfr", None),
-        ("Dont BFRE", "bfre", None),
-        ("Nb jours", "nb_jours_bfre", "jours"),
-        ("Dont Stocks", "stocks", None),
-        ("Nb jours", "nb_jours_stocks", "jours"),
-        ("Dont créances clients", "creances_clients", None),
-        ("Nb jours", "nb_jours_creances", "jours"),
-        ("% créances douteuses", "pct_creances_douteuses", "%"),
-        ("% créances douteuses provisionnées", "pct_creances_douteuses_prov", "%"),
-        ("Dont dettes fournisseurs", "dettes_fournisseurs", None),
-        ("Nb jours", "nb_jours_fournisseurs", "jours"),
-        ("Trésorerie nette", "tresorerie_nette", None),
-    ]
-    
     # Remplir les données
-    for libelle, cle_ratio, format_type in structure_analyse:
+    for libelle, cle_ratio, format_type in STRUCTURE_ANALYSE:
         ws_analyse[f'A{current_row}'] = libelle
         
         # Titres de sections en gras
@@ -1187,10 +1987,211 @@ def creer_fichier_excel(donnees_par_annee, nom_fichier):
     # Figer en-têtes
     ws_analyse.freeze_panes = 'B2'
     
+    # ========================================
+    # ONGLET MASQUÉ: DONNÉES BRUTES
+    # ========================================
+    # Permet de relire les années déjà extraites sans repasser par les PDFs
+    ws_donnees = wb.create_sheet(NOM_ONGLET_DONNEES)
+    ws_donnees.append(["Année", "Section", "Libellé", "Montant"])
+    for annee in annees_triees:
+        for section in SECTIONS:
+            for libelle, montant in donnees_par_annee[annee].get(section, []):
+                ws_donnees.append([annee, section, libelle, montant])
+    ws_donnees.sheet_state = 'hidden'
+    
     wb.save(nom_fichier)
     print(f"✅ Fichier créé avec 2 onglets (Données + Analyse) et {len(annees_triees)} année(s)\n")
 
 
+def lire_donnees_excel(nom_fichier):
+    """Relit les données brutes embarquées dans un fichier Excel généré par creer_fichier_excel.
+    
+    Args:
+        nom_fichier: Path du fichier Excel existant
+        
+    Returns:
+        dict: donnees_par_annee avec la même structure que celle passée à creer_fichier_excel
+              (dict vide si le fichier ne contient pas l'onglet des données brutes)
+    """
+    import openpyxl
+    
+    wb = openpyxl.load_workbook(nom_fichier, read_only=True)
+    try:
+        if NOM_ONGLET_DONNEES not in wb.sheetnames:
+            print(f"⚠️ Onglet '{NOM_ONGLET_DONNEES}' absent de {Path(nom_fichier).name} (fichier généré par une ancienne version ?)")
+            return {}
+        
+        donnees_par_annee = {}
+        lignes = wb[NOM_ONGLET_DONNEES].iter_rows(min_row=2, values_only=True)
+        for annee, section, libelle, montant in lignes:
+            if annee is None or section not in SECTIONS:
+                continue
+            donnees_annee = donnees_par_annee.setdefault(str(annee), {s: [] for s in SECTIONS})
+            donnees_annee[section].append((libelle, montant if montant is not None else 0))
+        
+        return donnees_par_annee
+    finally:
+        wb.close()
+
+
+def mettre_a_jour_fichier_excel(nom_fichier, nouveaux_pdfs, nom_sortie=None):
+    """Ajoute de nouvelles années à un fichier Excel existant sans ré-extraire les anciennes.
+    
+    Les années déjà présentes sont relues depuis l'onglet des données brutes, seuls les
+    nouveaux PDFs sont extraits, puis les ratios et le classeur sont entièrement recalculés.
+    
+    Args:
+        nom_fichier: Path du fichier Excel existant
+        nouveaux_pdfs: Dict {annee: chemin_pdf} des PDFs à ajouter (une année existante est remplacée)
+        nom_sortie: Path du fichier à écrire (par défaut, le fichier existant est écrasé)
+        
+    Returns:
+        dict: donnees_par_annee fusionnées, ou None si aucune donnée n'est disponible
+    """
+    nouvelles_annees = {}
+    for annee, chemin_pdf in nouveaux_pdfs.items():
+        resultats = extraire_un_pdf(Path(chemin_pdf))
+        if resultats:
+            nouvelles_annees[annee] = resultats
+        else:
+            print(f"❌ Échec de l'extraction pour {Path(chemin_pdf).name}, année {annee} ignorée.")
+    
+    return ajouter_resultats_excel(nom_fichier, nouvelles_annees, nom_sortie)
+
+
+def ajouter_resultats_excel(nom_fichier, nouvelles_annees, nom_sortie=None):
+    """Ajoute des années déjà extraites à un fichier Excel (créé s'il n'existe pas encore).
+    
+    Args:
+        nom_fichier: Path du fichier Excel existant
+        nouvelles_annees: Dict {annee: resultats de extraire_un_pdf} (une année existante est remplacée)
+        nom_sortie: Path du fichier à écrire (par défaut, le fichier existant est écrasé)
+        
+    Returns:
+        dict: donnees_par_annee fusionnées, ou None si aucune donnée n'est disponible
+    """
+    nom_fichier = Path(nom_fichier)
+    nom_sortie = Path(nom_sortie) if nom_sortie else nom_fichier
+    
+    print(f"🔄 Mise à jour de : {nom_fichier.name}")
+    donnees_par_annee = lire_donnees_excel(nom_fichier) if nom_fichier.exists() else {}
+    if donnees_par_annee:
+        print(f"   📅 Années déjà présentes : {', '.join(sorted(donnees_par_annee.keys()))}")
+    
+    for annee, resultats in nouvelles_annees.items():
+        annee = str(annee).strip()
+        if annee in donnees_par_annee:
+            print(f"   ⚠️ L'année {annee} existe déjà et sera remplacée.")
+        donnees_par_annee[annee] = resultats
+    
+    if not donnees_par_annee:
+        print("❌ Aucune donnée à écrire.")
+        return None
+    
+    fusionner_exercices_precedents(donnees_par_annee)
+    creer_fichier_excel(donnees_par_annee, nom_sortie)
+    return donnees_par_annee
+
+
+def _styles_portefeuille():
+    """Styles nommés partagés par toutes les cellules du classeur de portefeuille."""
+    from openpyxl.styles import NamedStyle, Font
+    
+    return [
+        NamedStyle(name="entete", font=Font(bold=True, size=12)),
+        NamedStyle(name="entreprise", font=Font(bold=True, size=12)),
+        NamedStyle(name="total", font=Font(bold=True)),
+        NamedStyle(name="montant", number_format='#,##0.00'),
+        NamedStyle(name="montant_total", number_format='#,##0.00', font=Font(bold=True)),
+        NamedStyle(name="pourcentage", number_format='0.00"%"'),
+        NamedStyle(name="jours", number_format='0.0'),
+    ]
+
+
+def creer_fichier_portefeuille(donnees_par_entreprise, nom_fichier):
+    """Crée un classeur couvrant tout un portefeuille d'entreprises, écrit en flux (mode write-only).
+    
+    Onglet "Données Fiscales" : un bloc de lignes par entreprise (ligne d'en-tête avec ses
+    années, puis les mêmes catégories que creer_fichier_excel). Onglet "Ratios" : une ligne
+    par (entreprise, année) et une colonne par ratio de STRUCTURE_ANALYSE, pour filtrer tout
+    le portefeuille. Les lignes partent sur disque au fil de l'écriture : la mémoire reste
+    celle d'une entreprise, quel que soit le nombre de lignes.
+    
+    Args:
+        donnees_par_entreprise: Dict {entreprise: donnees_par_annee} ou itérable de tuples
+                                (entreprise, donnees_par_annee), par exemple un générateur
+        nom_fichier: Path du fichier Excel à créer
+        
+    Returns:
+        int: Nombre d'entreprises écrites
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    
+    print(f"📊 Création du portefeuille : {Path(nom_fichier).name}")
+    wb = openpyxl.Workbook(write_only=True)
+    for style in _styles_portefeuille():
+        wb.add_named_style(style)
+    
+    def cellule(ws, valeur, style):
+        cell = WriteOnlyCell(ws, value=valeur)
+        cell.style = style
+        return cell
+    
+    ws_donnees = wb.create_sheet("Données Fiscales")
+    ws_donnees.column_dimensions['A'].width = 20
+    ws_donnees.column_dimensions['B'].width = 60
+    
+    ws_ratios = wb.create_sheet("Ratios")
+    cles_ratios = list(dict.fromkeys(cle for _, cle, _ in STRUCTURE_ANALYSE if cle))
+    formats_ratios = {cle: format_type for _, cle, format_type in STRUCTURE_ANALYSE if cle}
+    styles_ratios = {None: "montant", "%": "pourcentage", "jours": "jours"}
+    ws_ratios.column_dimensions['A'].width = 30
+    ws_ratios.freeze_panes = 'C2'
+    ws_ratios.append([cellule(ws_ratios, titre, "entete") for titre in ["Entreprise", "Année"] + cles_ratios])
+    
+    if isinstance(donnees_par_entreprise, dict):
+        donnees_par_entreprise = donnees_par_entreprise.items()
+    
+    nb_entreprises = 0
+    for entreprise, donnees_par_annee in donnees_par_entreprise:
+        fusionner_exercices_precedents(donnees_par_annee)
+        annees = sorted(donnees_par_annee)
+        
+        # --- Bloc de l'entreprise ---
+        ws_donnees.append([cellule(ws_donnees, entreprise, "entreprise"), cellule(ws_donnees, "Libellé", "entete")]
+                          + [cellule(ws_donnees, annee, "entete") for annee in annees])
+        for section in SECTIONS:
+            categorie, mots_totaux = PRESENTATION_SECTIONS[section]
+            montants_par_annee = []
+            for annee in annees:
+                montants = {}
+                for libelle, montant in donnees_par_annee[annee].get(section, []):
+                    montants.setdefault(libelle, montant)
+                montants_par_annee.append(montants)
+            for libelle in _libelles_section(donnees_par_annee, annees, section):
+                total = any(mot in libelle.upper() for mot in mots_totaux)
+                style = "montant_total" if total else "montant"
+                ws_donnees.append([cellule(ws_donnees, categorie, "total") if total else categorie,
+                                   cellule(ws_donnees, libelle, "total") if total else libelle]
+                                  + [cellule(ws_donnees, montants.get(libelle, 0), style) for montants in montants_par_annee])
+        ws_donnees.append([])
+        
+        # --- Ratios consolidés ---
+        for annee, ratios in sorted(calculer_ratios_financiers(donnees_par_annee).items()):
+            ws_ratios.append([entreprise, annee]
+                             + [cellule(ws_ratios, ratios.get(cle, 0), styles_ratios[formats_ratios[cle]])
+                                for cle in cles_ratios])
+        
+        nb_entreprises += 1
+        if nb_entreprises % 100 == 0:
+            print(f"   … {nb_entreprises} entreprises écrites")
+    
+    wb.save(nom_fichier)
+    print(f"✅ Portefeuille créé : {nb_entreprises} entreprise(s)\n")
+    return nb_entreprises
+
+
 def calculer_ratios_financiers(donnees_par_annee):
     """Calcule les ratios financiers à partir des données extraites.
     
@@ -1203,42 +2204,10 @@ def calculer_ratios_financiers(donnees_par_annee):
         ratios = {}
         
         # Fonction helper pour récupérer une valeur par code
+        valeurs = convertir_en_codes(donnees)
         def get_valeur(section, code):
-            """Récupère la valeur d'un code dans une section."""
-            if section not in donnees:
-                return 0
-            for libelle, montant in donnees[section]:
-                # Chercher dans les dictionnaires de codes
-                if section == 'actif' and code in CODES_BILAN_ACTIF:
-                    if libelle == CODES_BILAN_ACTIF[code]:
-                        return montant or 0
-                elif section == 'passif' and code in CODES_BILAN_PASSIF:
-                    if libelle == CODES_BILAN_PASSIF[code]:
-                        return montant or 0
-                elif section == 'cr' and code in CODES_COMPTE_RESULTAT:
-                    if libelle == CODES_COMPTE_RESULTAT[code]:
-                        return montant or 0
-                elif section == 'echeances':
-                    if code == 'VA' and libelle == "Clients douteux ou litigieux":
-                        return montant or 0
-                    elif code == 'VC' and libelle == "Groupe et associés (créances)":
-                        return montant or 0
-                    elif code == 'VH' and libelle == "Annuité à venir":
-                        return montant or 0
-                    elif code == 'VI' and libelle == "Groupe et associés (dettes)":
-                        return montant or 0
-                elif section == 'affectation':
-                    if code == 'ZE' and libelle == "Dividendes":
-                        return montant or 0
-                    elif code == 'YQ' and libelle == "Engagements de crédit-bail mobilier":
-                        return montant or 0
-                    elif code == 'YR' and libelle == "Engagements de crédit-bail immobilier":
-                        return montant or 0
-                    elif code == 'YT' and libelle == "Sous-traitance":
-                        return montant or 0
-                    elif code == 'YU' and libelle == "Personnel extérieur à l'entreprise":
-                        return montant or 0
-            return 0
+            """Récupère la valeur d'un code dans une section (voir convertir_en_codes)."""
+            return valeurs.get(section, {}).get(code) or 0
         
         # ========================================
         # SECTION 1: ACTIVITÉ & RENTABILITÉ
@@ -1528,7 +2497,7 @@ def calculer_ratios_financiers(donnees_par_annee):
     return ratios_par_annee
 
 
-def extraire_etat_echeances_par_codes(chemin_pdf, pdf):
+def extraire_etat_echeances_par_codes(chemin_pdf, table):
     """
     Extrait l'État des échéances (2057-SD) en utilisant les codes officiels.
     
@@ -1536,6 +2505,9 @@ def extraire_etat_echeances_par_codes(chemin_pdf, pdf):
     - CRÉANCES: codes VA, VC à l'index 13
     - DETTES: code VC à l'index 14, code VI à l'index 10
     
+    Args:
+        table: Premier tableau de la page de l'État des échéances (None si page absente)
+    
     Returns:
         (list, int): Liste de tuples (libellé, montant) et nombre de valeurs trouvées
     """
@@ -1544,26 +2516,10 @@ def extraire_etat_echeances_par_codes(chemin_pdf, pdf):
     donnees = []
     nb_trouves = 0
     
-    # Trouver la page contenant l'État des échéances
-    page_index = -1
-    for i, page in enumerate(pdf.pages):
-        text = page.extract_text()
-        if text and ("ÉTAT DES ÉCHÉANCES" in text.upper() or "ETAT DES ECHEANCES" in text.upper()):
-            page_index = i
-            print(f"   ✓ Page 'État des échéances' trouvée : page {i + 1}")
-            break
-    
-    if page_index == -1:
-        print("   ❌ Page 'État des échéances' non trouvée.")
-        return donnees, 0
-    
-    # Extraire le tableau
-    tables = pdf.pages[page_index].extract_tables()
-    if not tables:
-        print("   ❌ Aucun tableau extrait.")
+    if not table:
+        print("   ❌ Aucun tableau pour l'État des échéances.")
         return donnees, 0
     
-    table = tables[0]
     print(f"   ✓ Tableau extrait ({len(table)} lignes, {len(table[0]) if table else 0} colonnes)")
     
     # Indicateur pour savoir si on est dans la section DETTES
@@ -1659,7 +2615,7 @@ def extraire_etat_echeances_par_codes(chemin_pdf, pdf):
     return donnees, nb_trouves
 
 
-def extraire_affectation_resultat_par_codes(chemin_pdf, pdf):
+def extraire_affectation_resultat_par_codes(chemin_pdf, table):
     """
     Extrait l'Affectation du résultat et Renseignements divers (2058-C-SD) en utilisant les codes officiels.
     
@@ -1667,6 +2623,9 @@ def extraire_affectation_resultat_par_codes(chemin_pdf, pdf):
     - AFFECTATION: code ZE à l'index 26
     - RENSEIGNEMENTS DIVERS: codes YQ, YR, YT, YU à l'index 18
     
+    Args:
+        table: Premier tableau de la page 2058-C (None si page absente)
+    
     Returns:
         (list, int): Liste de tuples (libellé, montant) et nombre de valeurs trouvées
     """
@@ -1675,28 +2634,10 @@ def extraire_affectation_resultat_par_codes(chemin_pdf, pdf):
     donnees = []
     nb_trouves = 0
     
-    # Trouver la page contenant l'Affectation du résultat
-    page_index = -1
-    for i, page in enumerate(pdf.pages):
-        text = page.extract_text()
-        if text and ("AFFECTATION DU RÉSULTAT" in text.upper() or 
-                    "AFFECTATION DU RESULTAT" in text.upper() or
-                    "RENSEIGNEMENTS DIVERS" in text.upper()):
-            page_index = i
-            print(f"   ✓ Page 'Affectation du résultat' trouvée : page {i + 1}")
-            break
-    
-    if page_index == -1:
-        print("   ❌ Page 'Affectation du résultat' non trouvée.")
-        return donnees, 0
-    
-    # Extraire le tableau
-    tables = pdf.pages[page_index].extract_tables()
-    if not tables:
-        print("   ❌ Aucun tableau extrait.")
+    if not table:
+        print("   ❌ Aucun tableau pour l'Affectation du résultat.")
         return donnees, 0
     
-    table = tables[0]
     print(f"   ✓ Tableau extrait ({len(table)} lignes, {len(table[0]) if table else 0} colonnes)")
     
     # Parcourir toutes les lignes pour trouver les codes
@@ -1741,181 +2682,1659 @@ def extraire_affectation_resultat_par_codes(chemin_pdf, pdf):
     return donnees, nb_trouves
 
 
-def extraire_un_pdf(chemin_pdf):
-    """Extrait les données d'un seul PDF.
+# ============================================
+# SUIVI DE LA PROGRESSION
+# ============================================
+
+# Nombre d'étapes signalées pour un fichier : pages classées, tableaux extraits, sections terminées
+ETAPES_PAR_FICHIER = 2 * len(CRITERES_PAGES) + len(SECTIONS)
+
+
+def _creer_signaleur(progression, nom_fichier):
+    """Adapte une fonction de progression : ajoute le fichier et l'horodatage, et ignore ses erreurs."""
+    if progression is None:
+        return None
     
-    Returns:
-        dict: {'actif': [...], 'passif': [...], 'cr': [...]} ou None en cas d'erreur
-    """
-    print(f"\n{'='*80}")
-    print(f"📄 Traitement : {chemin_pdf.name}")
-    print(f"{'='*80}\n")
+    def signaler(etape, **details):
+        try:
+            progression({'etape': etape, 'fichier': nom_fichier, 'horodatage': time.time(), **details})
+        except Exception as e:
+            print(f"⚠️ Erreur du suivi de progression : {e}")
     
-    try:
-        with pdfplumber.open(chemin_pdf) as pdf:
-            
-            # --- ÉTAPE 1 : TROUVER LA PAGE DE L'ACTIF ---
-            print("🔍 Recherche de la page du Bilan Actif...")
-            actif_page_index = -1
-            for i, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text and "Brut" in text and "Net" in text:
-                    actif_page_index = i
-                    print(f"   ✓ Bilan Actif identifié sur la page {i + 1}.")
-                    break
-            
-            if actif_page_index == -1:
-                print("❌ Impossible de trouver la page du Bilan Actif.")
-                return None
+    return signaler
 
-            # --- ÉTAPE 2 : TROUVER LA PAGE DU PASSIF ---
-            print("🔍 Recherche de la page du Bilan Passif...")
-            passif_page_index = -1
-            for i, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text and "Capital social ou individuel" in text:
-                    passif_page_index = i
-                    print(f"   ✓ Bilan Passif identifié sur la page {i + 1}.")
-                    break
-            
-            if passif_page_index == -1:
-                print("❌ Impossible de trouver la page du Bilan Passif.")
-                return None
 
-            # --- ÉTAPE 3 : EXTRAIRE LES TABLEAUX ---
-            print("\n📊 Extraction des tableaux...")
-            
-            tables_actif = pdf.pages[actif_page_index].extract_tables()
-            if not tables_actif:
-                print(f"❌ Aucun tableau trouvé sur la page de l'Actif.")
-                return None
-            table_actif = tables_actif[0]
-            print(f"   ✓ Tableau Actif extrait.")
+class SuiviProgression:
+    """Agrège les événements de progression d'un lot de fichiers et estime le temps restant.
+    
+    S'utilise directement comme fonction de progression de extraire_un_pdf. La vitesse est
+    mesurée en étapes (pages classées, tableaux extraits, sections) par seconde depuis le
+    premier événement reçu.
+    """
+    
+    def __init__(self, nb_fichiers, afficher=None):
+        """
+        Args:
+            nb_fichiers: Nombre de fichiers du lot
+            afficher: Fonction appelée avec le suivi après chaque événement (optionnelle)
+        """
+        self.total = max(1, nb_fichiers) * ETAPES_PAR_FICHIER
+        self.afficher = afficher
+        self.etapes_par_fichier = {}
+        self.etapes_mesurees = 0
+        self.premier_horodatage = None
+        self.dernier_horodatage = None
+        self.dernier_evenement = None
+    
+    def __call__(self, evenement):
+        fichier = evenement.get('fichier')
+        avant = self.etapes_par_fichier.get(fichier, 0)
+        if evenement['etape'] == 'fichier_termine':
+            # Un fichier en échec s'arrête avant la fin : on le compte comme complet
+            self.etapes_par_fichier[fichier] = ETAPES_PAR_FICHIER
+        else:
+            self.etapes_par_fichier[fichier] = min(ETAPES_PAR_FICHIER, avant + 1)
+        self.etapes_mesurees += self.etapes_par_fichier[fichier] - avant
+        
+        horodatage = evenement.get('horodatage', time.time())
+        if self.premier_horodatage is None:
+            self.premier_horodatage = horodatage
+        self.dernier_horodatage = horodatage
+        self.dernier_evenement = evenement
+        
+        if self.afficher:
+            self.afficher(self)
+    
+    def terminer(self, fichier):
+        """Marque un fichier comme déjà traité (sans événement, il n'entre pas dans la vitesse)."""
+        self.etapes_par_fichier[fichier] = ETAPES_PAR_FICHIER
+    
+    @property
+    def fait(self):
+        return sum(self.etapes_par_fichier.values())
+    
+    @property
+    def fraction(self):
+        return min(1.0, self.fait / self.total)
+    
+    @property
+    def vitesse(self):
+        """Étapes par seconde (None tant qu'il n'y a pas assez de mesures)."""
+        if self.premier_horodatage is None:
+            return None
+        duree = self.dernier_horodatage - self.premier_horodatage
+        return self.etapes_mesurees / duree if duree > 0 else None
+    
+    @property
+    def temps_restant(self):
+        """Estimation en secondes du temps restant (None si inconnue)."""
+        vitesse = self.vitesse
+        if not vitesse:
+            return None
+        return (self.total - self.fait) / vitesse
+    
+    def description(self):
+        """Texte court décrivant la dernière étape, l'avancement et le temps restant."""
+        evenement = self.dernier_evenement or {}
+        etape = evenement.get('etape')
+        if etape == 'page_classee':
+            detail = f"page '{evenement['role']}' classée"
+        elif etape == 'tableau_extrait':
+            detail = f"tableau '{evenement['role']}' extrait"
+        elif etape == 'section_terminee':
+            detail = f"section '{evenement['section']}' terminée"
+        elif etape == 'fichier_termine':
+            detail = "fichier terminé"
+        else:
+            detail = "en attente"
+        
+        texte = f"{evenement.get('fichier', '')} – {detail} • {self.fraction:.0%}"
+        if self.temps_restant is not None:
+            texte += f" • reste ~{self.temps_restant:.0f} s"
+        return texte
 
-            tables_passif = pdf.pages[passif_page_index].extract_tables()
-            if not tables_passif:
-                print(f"❌ Aucun tableau trouvé sur la page du Passif.")
-                return None
-            table_passif = tables_passif[0]
-            print(f"   ✓ Tableau Passif extrait.")
 
-            # --- ÉTAPE 4 : EXTRACTION DES DONNÉES ---
-            
-            # Extraction Actif
-            print("\n--- 🚀 EXTRACTION DU BILAN ACTIF ---")
-            donnees_codes, nb_trouves_codes = extraire_bilan_actif_par_codes(chemin_pdf, table_actif)
-            if nb_trouves_codes >= SEUIL_REUSSITE_CODES:
-                print("✅ Succès de l'extraction par codes.")
-                donnees_actif = donnees_codes
-            else:
-                print(f"⚠️ Échec par codes ({nb_trouves_codes} valeurs). Basculement sur libellés.")
-                donnees_actif = extraire_bilan_actif_par_libelles(chemin_pdf, table_actif)
-
-            # Extraction Passif
-            print("\n--- 🚀 EXTRACTION DU BILAN PASSIF ---")
-            donnees_codes_passif, nb_trouves_codes_passif = extraire_bilan_passif_par_codes(chemin_pdf, table_passif)
-            if nb_trouves_codes_passif >= SEUIL_REUSSITE_CODES_PASSIF:
-                print("✅ Succès de l'extraction par codes.")
-                donnees_passif = donnees_codes_passif
-            else:
-                print(f"⚠️ Échec par codes ({nb_trouves_codes_passif} valeurs). Basculement sur libellés.")
-                donnees_passif = extraire_bilan_passif_par_libelles(chemin_pdf, table_passif)
-
-            # Extraction Compte de Résultat
-            print("\n--- 🚀 EXTRACTION DU COMPTE DE RÉSULTAT ---")
-            donnees_codes_cr, nb_trouves_codes_cr = extraire_compte_resultat_par_codes(chemin_pdf, pdf)
-            if nb_trouves_codes_cr >= SEUIL_REUSSITE_CODES_COMPTE_RESULTAT:
-                print("✅ Succès de l'extraction par codes.")
-                donnees_cr = donnees_codes_cr
-            else:
-                print(f"⚠️ Extraction partielle ({nb_trouves_codes_cr} valeurs).")
-                donnees_cr = donnees_codes_cr
-            
-            # Extraction État des échéances
-            print("\n--- 🚀 EXTRACTION DE L'ÉTAT DES ÉCHÉANCES ---")
-            donnees_codes_echeances, nb_trouves_codes_echeances = extraire_etat_echeances_par_codes(chemin_pdf, pdf)
-            if nb_trouves_codes_echeances >= SEUIL_REUSSITE_CODES_ETAT_ECHEANCES:
-                print("✅ Succès de l'extraction par codes.")
-                donnees_echeances = donnees_codes_echeances
-            else:
-                print(f"⚠️ Extraction partielle ({nb_trouves_codes_echeances} valeurs).")
-                donnees_echeances = donnees_codes_echeances
-            
-            # Extraction Affectation du résultat et Renseignements divers
-            print("\n--- 🚀 EXTRACTION DE L'AFFECTATION DU RÉSULTAT ET RENSEIGNEMENTS DIVERS ---")
-            donnees_codes_affectation, nb_trouves_codes_affectation = extraire_affectation_resultat_par_codes(chemin_pdf, pdf)
-            if nb_trouves_codes_affectation >= SEUIL_REUSSITE_CODES_AFFECTATION_RESULTAT:
-                print("✅ Succès de l'extraction par codes.")
-                donnees_affectation = donnees_codes_affectation
-            else:
-                print(f"⚠️ Extraction partielle ({nb_trouves_codes_affectation} valeurs).")
-                donnees_affectation = donnees_codes_affectation
-
-            return {
-                'actif': donnees_actif,
-                'passif': donnees_passif,
-                'cr': donnees_cr,
-                'echeances': donnees_echeances,
-                'affectation': donnees_affectation
-            }
+class ProgressionVersFile:
+    """Fonction de progression transmissible à un autre processus : envoie les événements dans une file."""
     
-    except Exception as e:
-        print(f"❌ Erreur lors du traitement : {e}")
-        return None
+    def __init__(self, file):
+        self.file = file
+    
+    def __call__(self, evenement):
+        self.file.put(evenement)
 
-def main():
-    """Version ligne de commande : traite tous les PDFs du dossier 'liasses/' comme une seule année."""
-    print("\n" + "="*80)
-    print("🚀 EXTRACTION LIASSE FISCALE - MODE CLI")
-    print("="*80)
+
+# ============================================
+# TRIAGE (EXTRACTION DES SEULS AGRÉGATS UTILES)
+# ============================================
+
+# Dépendances {ratio: {(section, code), ...}} de calculer_ratios_financiers, calculées au premier besoin
+_dependances_ratios = None
+
+
+def dependances_ratios():
+    """Détermine les codes lus par chaque ratio de calculer_ratios_financiers.
     
-    dossier_liasses = Path("liasses")
-    dossier_resultats = Path("resultats")
-    dossier_resultats.mkdir(exist_ok=True)
+    Chaque montant d'une liasse fictive (tous les codes renseignés, valeurs distinctes) est
+    modifié à tour de rôle : les ratios dont la valeur change dépendent de ce code. Le calcul
+    suit ainsi automatiquement les évolutions de calculer_ratios_financiers.
     
-    fichiers_pdf = list(dossier_liasses.glob("*.pdf"))
+    Returns:
+        dict: {ratio: set((section, code))}
+    """
+    global _dependances_ratios
+    if _dependances_ratios is not None:
+        return _dependances_ratios
     
-    if not fichiers_pdf:
-        print("\n❌ Aucun PDF dans 'liasses/'\n")
-        return
+    entrees = [(section, code, libelle) for section in SECTIONS for code, libelle in CODES_PAR_SECTION[section].items()]
+    montants = [1000.0 + 37 * index for index in range(len(entrees))]
     
-    print(f"\n📁 {len(fichiers_pdf)} fichier(s) PDF trouvé(s)")
-    print("ℹ️  Mode CLI : Chaque PDF sera traité comme une année différente (2023, 2024, 2025...)")
-    print()
+    def ratios_avec(montants):
+        donnees = {section: [] for section in SECTIONS}
+        for (section, _, libelle), montant in zip(entrees, montants):
+            donnees[section].append((libelle, montant))
+        return calculer_ratios_financiers({'N': donnees})['N']
     
-    donnees_par_annee = {}
+    reference = ratios_avec(montants)
+    dependances = {ratio: set() for ratio in reference}
+    for index, (section, code, _) in enumerate(entrees):
+        modifies = list(montants)
+        modifies[index] += 100003.0
+        for ratio, valeur in ratios_avec(modifies).items():
+            if valeur != reference[ratio]:
+                dependances[ratio].add((section, code))
     
-    # Traiter chaque PDF
-    for idx, chemin_pdf in enumerate(fichiers_pdf):
-        annee = str(2023 + idx)  # Attribution automatique: 2023, 2024, 2025, etc.
-        
-        print(f"\n{'='*80}")
-        print(f"📄 Fichier {idx + 1}/{len(fichiers_pdf)} : {chemin_pdf.name} → Année {annee}")
-        print(f"{'='*80}")
+    _dependances_ratios = dependances
+    return dependances
+
+
+def planifier_triage(codes=(), ratios=()):
+    """Calcule les pages et sections minimales à lire pour obtenir des codes et des ratios.
+    
+    Args:
+        codes: Codes de la liasse demandés (ex: ['FL', 'HN'])
+        ratios: Noms de ratios de calculer_ratios_financiers (ex: ['gearing_net'])
         
-        resultats = extraire_un_pdf(chemin_pdf)
+    Returns:
+        dict: {'codes': [...], 'ratios': [...], 'sections': [...], 'roles': [...]}
         
-        if resultats:
-            donnees_par_annee[annee] = resultats
-            print(f"\n✅ Extraction réussie pour {chemin_pdf.name}")
-        else:
-            print(f"\n❌ Échec de l'extraction pour {chemin_pdf.name}")
+    Raises:
+        ValueError: Si un code ou un ratio est inconnu
+    """
+    regles = INDEX_CODES['regles']
+    necessaires = set()
     
-    # Générer le fichier Excel
-    if donnees_par_annee:
-        print(f"\n{'='*80}")
-        print("📊 GÉNÉRATION DU FICHIER EXCEL")
-        print(f"{'='*80}\n")
-        
-        nom_excel = dossier_resultats / "extraction_multi_annees.xlsx"
-        creer_fichier_excel(donnees_par_annee, nom_excel)
+    for code in codes:
+        code = code.strip().upper()
+        if code not in regles:
+            raise ValueError(f"Code inconnu : {code}")
+        necessaires.add((regles[code][0], code))
+    
+    dependances = dependances_ratios() if ratios else {}
+    for ratio in ratios:
+        if ratio not in dependances:
+            raise ValueError(f"Ratio inconnu : {ratio} (attendu : {', '.join(sorted(dependances))})")
+        necessaires |= dependances[ratio]
+    
+    sections = {section for section, _ in necessaires}
+    roles = {regles[code][1] for _, code in necessaires}
+    return {
+        'codes': [code.strip().upper() for code in codes],
+        'ratios': list(ratios),
+        'sections': [section for section in SECTIONS if section in sections],
+        'roles': [role for role in CRITERES_PAGES if role in roles],
+    }
+
+
+def trier_pdf(chemin_pdf, codes=CODES_TRIAGE_DEFAUT, ratios=(), **options):
+    """Extrait seulement quelques codes et ratios d'un PDF (criblage d'un portefeuille).
+    
+    Args:
+        chemin_pdf: Path du PDF
+        codes: Codes de la liasse à renvoyer
+        ratios: Ratios à renvoyer
+        **options: Transmises à extraire_un_pdf
         
-        print("="*80)
-        print("✅ EXTRACTION TERMINÉE")
-        print("="*80)
-        print(f"\n📥 Fichier généré : {nom_excel}")
-        print(f"📅 Années extraites : {', '.join(sorted(donnees_par_annee.keys()))}")
-        print()
+    Returns:
+        dict: {'codes': {code: montant}, 'ratios': {ratio: valeur}} ou None en cas d'échec
+    """
+    plan = planifier_triage(codes, ratios)
+    resultats = extraire_un_pdf(chemin_pdf, triage=plan, **options)
+    if resultats is None:
+        return None
+    
+    valeurs = {}
+    for valeurs_section in convertir_en_codes(resultats).values():
+        valeurs.update(valeurs_section)
+    tous_ratios = calculer_ratios_financiers({'N': resultats})['N'] if plan['ratios'] else {}
+    return {
+        'codes': {code: valeurs.get(code, 0) for code in plan['codes']},
+        'ratios': {ratio: tous_ratios[ratio] for ratio in plan['ratios']},
+    }
+
+
+def trier_dossier(fichiers_pdf, codes, ratios, nom_csv):
+    """Crible une liste de PDFs avec trier_pdf et écrit une ligne par fichier dans un CSV (séparateur ';')."""
+    import csv
+    
+    plan = planifier_triage(codes, ratios)
+    print(f"\n🔎 Triage de {len(fichiers_pdf)} fichier(s) : pages {', '.join(plan['roles'])}")
+    
+    nom_csv = Path(nom_csv)
+    nom_csv.parent.mkdir(parents=True, exist_ok=True)
+    with open(nom_csv, 'w', newline='', encoding='utf-8-sig') as f:
+        ecrivain = csv.writer(f, delimiter=';')
+        ecrivain.writerow(['fichier'] + plan['codes'] + plan['ratios'])
+        for chemin_pdf in fichiers_pdf:
+            resultats = trier_pdf(Path(chemin_pdf), plan['codes'], plan['ratios'])
+            if resultats is None:
+                ecrivain.writerow([Path(chemin_pdf).name] + [''] * (len(plan['codes']) + len(plan['ratios'])))
+                continue
+            ecrivain.writerow([Path(chemin_pdf).name]
+                              + [resultats['codes'][code] for code in plan['codes']]
+                              + [resultats['ratios'][ratio] for ratio in plan['ratios']])
+    
+    print(f"\n📥 Fichier généré : {nom_csv}")
+
+
+# ============================================
+# IDENTIFICATION DES PAGES ET EXTRACTION DES TABLEAUX
+# ============================================
+
+# Statistiques de recherche des pages (cumulées sur tous les PDFs traités par le processus)
+STATS_RECHERCHE_PAGES = {
+    'position_attendue': 0,   # Page trouvée exactement à la position attendue
+    'voisinage': 0,           # Page trouvée à côté de la position attendue
+    'balayage_complet': 0,    # Position attendue manquée, document parcouru
+    'non_trouvee': 0,         # Page absente du document
+    'pages_lues': 0,          # Nombre de pages dont le texte a été extrait
+}
+
+
+def statistiques_recherche_pages(reinitialiser=False):
+    """Renvoie une copie des statistiques de recherche des pages (et les remet à zéro si demandé)."""
+    stats = dict(STATS_RECHERCHE_PAGES)
+    if reinitialiser:
+        for cle in STATS_RECHERCHE_PAGES:
+            STATS_RECHERCHE_PAGES[cle] = 0
+    return stats
+
+
+def _texte_page(pdf, index, textes):
+    """Extrait le texte d'une page une seule fois par document."""
+    if index not in textes:
+        textes[index] = pdf.pages[index].extract_text() or ""
+        STATS_RECHERCHE_PAGES['pages_lues'] += 1
+    return textes[index]
+
+
+def trouver_page(pdf, role, index_attendu=None, textes=None, budget=None):
+    """Cherche la page d'un formulaire, d'abord autour de sa position attendue puis dans tout le document.
+    
+    Args:
+        pdf: Document pdfplumber ouvert
+        role: Clé de CRITERES_PAGES
+        index_attendu: Position probable de la page (None pour un parcours complet)
+        textes: Cache {index: texte} partagé entre les recherches d'un même document
+        budget: BudgetTemps du fichier ; une fois épuisé, le document n'est plus parcouru en entier
+        
+    Returns:
+        int: Index de la page ou -1 si elle est absente
+    """
+    textes = {} if textes is None else textes
+    critere = CRITERES_PAGES[role]
+    nb_pages = len(pdf.pages)
+    
+    if index_attendu is not None:
+        for ecart in ECARTS_VOISINAGE:
+            index = index_attendu + ecart
+            if 0 <= index < nb_pages and critere(_texte_page(pdf, index, textes)):
+                STATS_RECHERCHE_PAGES['position_attendue' if ecart == 0 else 'voisinage'] += 1
+                return index
+    
+    if budget and budget.ignorer(role, 'balayage_complet'):
+        STATS_RECHERCHE_PAGES['non_trouvee'] += 1
+        return -1
+    
+    STATS_RECHERCHE_PAGES['balayage_complet'] += 1
+    for index in range(nb_pages):
+        if critere(_texte_page(pdf, index, textes)):
+            return index
+    
+    STATS_RECHERCHE_PAGES['non_trouvee'] += 1
+    return -1
+
+
+def identifier_pages(pdf, textes=None, signaler=None, roles=None, budget=None):
+    """Identifie la page de chaque formulaire de la liasse.
+    
+    Chaque page est d'abord cherchée à sa position standard (PAGES_ATTENDUES), corrigée du
+    décalage observé sur la page précédente (page de garde, formulaire intercalé...). Le
+    document n'est parcouru en entier qu'en cas d'échec, et le texte de chaque page n'est
+    extrait qu'une fois.
+    
+    Args:
+        pdf: Document pdfplumber ouvert
+        textes: Cache {index: texte} à remplir (optionnel), réutilisable par l'appelant
+        signaler: Fonction de progression (voir _creer_signaleur), appelée pour chaque page classée
+        roles: Rôles à chercher (tous ceux de CRITERES_PAGES par défaut)
+        budget: BudgetTemps du fichier (voir trouver_page)
+    
+    Returns:
+        dict: {role: index de page ou -1} pour chaque rôle cherché
+    """
+    pages = {}
+    textes = {} if textes is None else textes
+    decalage = 0
+    
+    for role in CRITERES_PAGES:
+        if roles is not None and role not in roles:
+            continue
+        index_attendu = PAGES_ATTENDUES.get(role)
+        if index_attendu is not None:
+            index_attendu += decalage
+        
+        index = trouver_page(pdf, role, index_attendu, textes, budget)
+        pages[role] = index
+        if signaler:
+            signaler('page_classee', role=role, page=index)
+        
+        if index == -1:
+            print(f"   ⚠️ Page '{role}' non trouvée.")
+            continue
+        
+        print(f"   ✓ Page '{role}' identifiée : page {index + 1} du PDF")
+        if role in PAGES_ATTENDUES:
+            decalage = index - PAGES_ATTENDUES[role]
+    
+    return pages
+
+
+def charger_profils_tableaux(chemin=CHEMIN_PROFILS_TABLEAUX):
+    """Lit les profils table_settings retenus par l'étalonnage.
+    
+    Returns:
+        dict: {éditeur: {role: {'table_settings': {...}, ...}}} (vide si le fichier est absent)
+    """
+    chemin = Path(chemin)
+    if not chemin.exists():
+        return {}
+    try:
+        contenu = json.loads(chemin.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Profils de tableaux illisibles ({chemin.name}) : {e}")
+        return {}
+    if contenu.get('version') != VERSION_PROFILS_TABLEAUX:
+        print(f"⚠️ Version de profils de tableaux non supportée : {contenu.get('version')} ({chemin.name})")
+        return {}
+    return contenu.get('profils', {})
+
+
+PROFILS_TABLEAUX = charger_profils_tableaux()
+
+
+def editeur_pdf(pdf):
+    """Logiciel qui a produit le PDF, sans numéro de version (ex: 'LibreOffice 7.2' → 'LibreOffice')."""
+    producteur = str(pdf.metadata.get('Producer') or '')
+    return re.split(r"[\d(;,©]", producteur, maxsplit=1)[0].strip() or EDITEUR_PAR_DEFAUT
+
+
+def parametres_tableau(role, editeur=EDITEUR_PAR_DEFAUT):
+    """table_settings à utiliser pour la page d'un rôle (None : réglages par défaut de pdfplumber).
+    
+    Le profil propre à l'éditeur du PDF est prioritaire sur le profil commun.
+    """
+    for cle in (editeur, EDITEUR_PAR_DEFAUT):
+        profil = PROFILS_TABLEAUX.get(cle, {}).get(role)
+        if profil:
+            return profil['table_settings']
+    return None
+
+
+def extraire_tableaux(pdf, pages, roles, signaler=None, budget=None):
+    """Extrait le premier tableau de chaque page demandée (avec le profil table_settings du formulaire).
+    
+    Args:
+        pdf: Document pdfplumber ouvert
+        pages: Dict {role: index de page} renvoyé par identifier_pages
+        roles: Rôles dont il faut extraire le tableau
+        signaler: Fonction de progression, appelée pour chaque tableau extrait
+        budget: BudgetTemps du fichier ; une fois épuisé, seuls les tableaux du bilan sont encore extraits
+        
+    Returns:
+        dict: {role: tableau ou None}
+    """
+    tableaux = {}
+    editeur = editeur_pdf(pdf)
+    for role in roles:
+        index = pages.get(role, -1)
+        # Sans l'actif et le passif, le fichier serait en échec : ils sont extraits quoi qu'il arrive
+        if index != -1 and budget and role not in ('actif', 'passif') and budget.ignorer(role, 'tableau'):
+            index = -1
+        tables = pdf.pages[index].extract_tables(parametres_tableau(role, editeur)) if index != -1 else None
+        tableaux[role] = tables[0] if tables else None
+        if signaler:
+            signaler('tableau_extrait', role=role, page=index)
+    return tableaux
+
+
+def _extraire_tableaux_section(chemin_pdf, pages, roles, budget=None):
+    """Ouvre le PDF et extrait les tableaux d'une section (exécuté dans un processus séparé).
+    
+    Returns:
+        tuple: (tableaux, niveaux ignorés par la copie du budget reçue par le worker)
+    """
+    import pdfplumber
+    
+    with pdfplumber.open(chemin_pdf) as pdf:
+        tableaux = extraire_tableaux(pdf, pages, roles, budget=budget)
+    return tableaux, (budget.niveaux_ignores if budget else [])
+
+
+_pool_sections = None
+
+def _obtenir_pool_sections():
+    """Pool de processus réutilisé d'un appel à l'autre pour l'extraction parallèle des sections."""
+    global _pool_sections
+    if _pool_sections is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _pool_sections = ProcessPoolExecutor(max_workers=min(len(SECTIONS), os.cpu_count() or 1))
+    return _pool_sections
+
+
+def _extraire_tableaux_en_parallele(chemin_pdf, pages, roles, signaler=None, budget=None):
+    """Extrait les tableaux de chaque section en parallèle, chaque worker ouvrant lui-même le PDF.
+    
+    Chaque worker reçoit une copie du budget (même horloge monotone) ; les niveaux qu'il a
+    sautés sont reportés dans le budget de l'appelant.
+    """
+    from concurrent.futures import as_completed
+    
+    pool = _obtenir_pool_sections()
+    futures = []
+    for section in SECTIONS:
+        roles_section = [role for role in PAGES_PAR_SECTION[section] if role in roles]
+        if roles_section:
+            futures.append(pool.submit(_extraire_tableaux_section, chemin_pdf, pages, roles_section, budget))
+    
+    tableaux = {}
+    for future in as_completed(futures):
+        tableaux_section, niveaux_ignores = future.result()
+        tableaux.update(tableaux_section)
+        for ignore in niveaux_ignores:
+            if ignore not in budget.niveaux_ignores:
+                budget.niveaux_ignores.append(ignore)
+        if signaler:
+            for role in tableaux_section:
+                signaler('tableau_extrait', role=role, page=pages.get(role, -1))
+    return tableaux
+
+
+def extraire_section(chemin_pdf, section, tableaux, budget=None):
+    """Applique les tables de codes (et le repli par libellés) aux tableaux d'une section.
+    
+    Le passage aux libellés est piloté par les identités comptables de la section
+    (voir _choisir_avec_controles).
+    
+    Args:
+        section: Nom de la section ('actif', 'passif', 'cr', 'echeances', 'affectation')
+        tableaux: Dict {role: tableau} contenant au moins les rôles de PAGES_PAR_SECTION[section]
+        budget: BudgetTemps du fichier (voir _choisir_avec_controles)
+        
+    Returns:
+        tuple: (liste de tuples (libellé, montant), contrôle au format de valider_section)
+    """
+    # En triage, seules certaines pages sont lues : les identités des autres ne sont pas contrôlées
+    roles_lus = [role for role in PAGES_PAR_SECTION.get(section, []) if tableaux.get(role) is not None]
+    
+    if section == 'actif':
+        print("\n--- 🚀 EXTRACTION DU BILAN ACTIF ---")
+        table_actif = tableaux['actif']
+        donnees_codes, nb_trouves_codes = extraire_bilan_actif_par_codes(chemin_pdf, table_actif)
+        return _choisir_avec_controles(
+            section, donnees_codes, nb_trouves_codes, SEUIL_REUSSITE_CODES,
+            lambda: extraire_bilan_actif_par_libelles(chemin_pdf, table_actif, budget), budget, roles_lus
+        )
+    
+    if section == 'passif':
+        print("\n--- 🚀 EXTRACTION DU BILAN PASSIF ---")
+        table_passif = tableaux['passif']
+        donnees_codes_passif, nb_trouves_codes_passif = extraire_bilan_passif_par_codes(chemin_pdf, table_passif)
+        return _choisir_avec_controles(
+            section, donnees_codes_passif, nb_trouves_codes_passif, SEUIL_REUSSITE_CODES_PASSIF,
+            lambda: extraire_bilan_passif_par_libelles(chemin_pdf, table_passif, budget), budget, roles_lus
+        )
+    
+    if section == 'cr':
+        print("\n--- 🚀 EXTRACTION DU COMPTE DE RÉSULTAT ---")
+        table_page1, table_page2 = tableaux['cr_page1'], tableaux['cr_page2']
+        donnees_codes_cr, nb_trouves_codes_cr = extraire_compte_resultat_par_codes(chemin_pdf, table_page1, table_page2)
+        return _choisir_avec_controles(
+            section, donnees_codes_cr, nb_trouves_codes_cr, SEUIL_REUSSITE_CODES_COMPTE_RESULTAT,
+            lambda: extraire_compte_resultat_par_libelles(chemin_pdf, table_page1, table_page2, budget),
+            budget, roles_lus
+        )
+    
+    # Sections sans identité comptable ni méthode de secours : seuil de valeurs trouvées
+    if section == 'echeances':
+        print("\n--- 🚀 EXTRACTION DE L'ÉTAT DES ÉCHÉANCES ---")
+        donnees, nb_trouves = extraire_etat_echeances_par_codes(chemin_pdf, tableaux['echeances'])
+        seuil = SEUIL_REUSSITE_CODES_ETAT_ECHEANCES
+    elif section == 'affectation':
+        print("\n--- 🚀 EXTRACTION DE L'AFFECTATION DU RÉSULTAT ET RENSEIGNEMENTS DIVERS ---")
+        donnees, nb_trouves = extraire_affectation_resultat_par_codes(chemin_pdf, tableaux['affectation'])
+        seuil = SEUIL_REUSSITE_CODES_AFFECTATION_RESULTAT
+    else:
+        raise ValueError(f"Section inconnue : {section}")
+    
+    if nb_trouves >= seuil:
+        print("✅ Succès de l'extraction par codes.")
+    else:
+        print(f"⚠️ Extraction partielle ({nb_trouves} valeurs).")
+    return donnees, valider_section(section, donnees, roles_lus)
+
+
+def analyser_pdf(chemin_pdf, parallele=False, signaler=None, roles=None, budget=None):
+    """Identifie les pages de la liasse et extrait leurs tableaux bruts (étape coûteuse, pdfplumber).
+    
+    Args:
+        chemin_pdf: Path du PDF
+        parallele: Si True, les tableaux des sections sont extraits en parallèle dans des
+                   processus séparés une fois les pages identifiées
+        signaler: Fonction de progression (voir _creer_signaleur)
+        roles: Pages à identifier et extraire (toutes par défaut, voir planifier_triage)
+        budget: BudgetTemps du fichier (voir trouver_page et extraire_tableaux)
+    
+    Returns:
+        dict: Instantané {'fichier', 'nb_pages', 'pages', 'textes', 'tableaux'} ou None si la
+              liasse n'est pas reconnue
+    """
+    import pdfplumber
+    
+    roles = list(CRITERES_PAGES) if roles is None else [role for role in CRITERES_PAGES if role in roles]
+    
+    with pdfplumber.open(chemin_pdf) as pdf:
+        
+        # --- ÉTAPE 1 : IDENTIFIER LES PAGES ---
+        print("🔍 Identification des pages de la liasse...")
+        textes = {}
+        pages = identifier_pages(pdf, textes, signaler, roles, budget)
+        
+        if pages.get('actif') == -1:
+            print("❌ Impossible de trouver la page du Bilan Actif.")
+            return None
+        if pages.get('passif') == -1:
+            print("❌ Impossible de trouver la page du Bilan Passif.")
+            return None
+
+        # --- ÉTAPE 2 : EXTRAIRE LES TABLEAUX ---
+        print("\n📊 Extraction des tableaux...")
+        # Sur une machine mono-cœur, les workers ne feraient qu'ajouter du coût
+        if parallele and (os.cpu_count() or 1) > 1:
+            tableaux = _extraire_tableaux_en_parallele(chemin_pdf, pages, roles, signaler, budget)
+        else:
+            tableaux = extraire_tableaux(pdf, pages, roles, signaler, budget)
+        # Les pages non demandées (triage) sont traitées comme des pages absentes
+        tableaux = {role: tableaux.get(role) for role in CRITERES_PAGES}
+        
+        return {
+            'fichier': Path(chemin_pdf).name,
+            'nb_pages': len(pdf.pages),
+            'pages': pages,
+            'textes': {str(index): texte for index, texte in textes.items()},
+            'tableaux': tableaux,
+        }
+
+
+def _tableaux_bilan_presents(tableaux, sections):
+    """Vérifie que les tableaux de l'actif et du passif ont été extraits (si ces sections sont demandées)."""
+    if 'actif' in sections:
+        if not tableaux.get('actif'):
+            print(f"❌ Aucun tableau trouvé sur la page de l'Actif.")
+            return False
+        print(f"   ✓ Tableau Actif extrait.")
+    
+    if 'passif' in sections:
+        if not tableaux.get('passif'):
+            print(f"❌ Aucun tableau trouvé sur la page du Passif.")
+            return False
+        print(f"   ✓ Tableau Passif extrait.")
+    return True
+
+
+def extraire_depuis_tableaux(chemin_pdf, tableaux, signaler=None, sections=None, budget=None):
+    """Applique les tables de codes et les contrôles aux tableaux bruts d'une liasse (étape rapide).
+    
+    Args:
+        sections: Sections à extraire (toutes par défaut). Une extraction partielle (triage)
+                  ne contrôle l'équilibre du bilan que si l'actif et le passif sont demandés
+                  et ne lit pas la colonne N-1.
+        budget: BudgetTemps du fichier ; les niveaux qu'il a fait sauter sont listés dans
+                resultats['niveaux_ignores']
+    
+    Returns:
+        dict: Même format que extraire_un_pdf, ou None si les tableaux du bilan manquent
+    """
+    partielle = sections is not None
+    sections = SECTIONS if sections is None else [section for section in SECTIONS if section in sections]
+    
+    if not _tableaux_bilan_presents(tableaux, sections):
+        return None
+
+    # --- ÉTAPE 3 : EXTRACTION DES DONNÉES ---
+    resultats = {}
+    controles = {}
+    for section in sections:
+        if budget:
+            budget.commencer_section()
+        resultats[section], controles[section] = extraire_section(chemin_pdf, section, tableaux, budget)
+        if signaler:
+            signaler('section_terminee', section=section)
+    
+    # --- ÉTAPE 4 : CONTRÔLES COMPTABLES ---
+    if 'actif' in resultats and 'passif' in resultats:
+        controles['bilan'] = controler_equilibre_bilan(resultats)
+    for nom, controle in controles.items():
+        for libelle, ecart in controle['ecarts']:
+            print(f"⚠️ Contrôle '{nom}' non vérifié : {libelle} (écart {ecart:,.2f})")
+    resultats['controles'] = controles
+    if budget and budget.niveaux_ignores:
+        resultats['niveaux_ignores'] = budget.niveaux_ignores
+    
+    # --- ÉTAPE 5 : EXERCICE PRÉCÉDENT ---
+    if partielle:
+        return resultats
+    exercice_precedent = extraire_exercice_precedent(tableaux)
+    if exercice_precedent:
+        resultats['exercice_precedent'] = exercice_precedent
+    
+    return resultats
+
+
+@profilable('chemin_pdf')
+def extraire_un_pdf(chemin_pdf, parallele=False, dossier_instantanes=None, progression=None, verifier=True,
+                    triage=None, cache_sections=None, budget_fichier=BUDGET_TEMPS_FICHIER,
+                    budget_section=BUDGET_TEMPS_SECTION, annee=None):
+    """Extrait les données d'un seul PDF.
+    
+    Args:
+        chemin_pdf: Path du PDF
+        parallele: Si True, les tableaux des sections sont extraits en parallèle dans des
+                   processus séparés une fois les pages identifiées (utile pour un gros fichier isolé)
+        dossier_instantanes: Si renseigné, les pages identifiées et les tableaux bruts y sont
+                             sauvegardés pour pouvoir rejouer l'extraction sans le PDF
+        progression: Fonction appelée avec un dict à chaque étape (page classée, tableau extrait,
+                     section terminée, fichier terminé), par exemple un SuiviProgression
+        verifier: Si True, le fichier passe d'abord les contrôles préalables (controler_pdf_brut)
+        triage: Plan renvoyé par planifier_triage : seules les pages et sections nécessaires
+                sont lues (pas d'instantané ni de colonne N-1 dans ce mode)
+        cache_sections: Dossier du cache par section : seules les sections dont la configuration
+                        a changé depuis la dernière extraction de ce PDF sont recalculées
+        budget_fichier: Secondes allouées au fichier (None : pas de limite, voir BudgetTemps)
+        budget_section: Secondes allouées à chaque section (None : pas de limite)
+        annee: Année attribuée au PDF, enregistrée dans l'instantané pour le rejeu
+    
+    Returns:
+        dict: {'actif': [...], 'passif': [...], 'cr': [...], 'echeances': [...], 'affectation': [...],
+               'controles': {section: {'statut': ..., 'ecarts': [...]}},
+               'exercice_precedent': {'actif': [...], 'passif': [...], 'cr': [...]} (si imprimé),
+               'niveaux_ignores': [{'etape': ..., 'niveau': ...}] (si le budget de temps a été épuisé)}
+              ou None en cas d'erreur
+    """
+    print(f"\n{'='*80}")
+    print(f"📄 Traitement : {chemin_pdf.name}")
+    print(f"{'='*80}\n")
+    
+    signaler = _creer_signaleur(progression, chemin_pdf.name)
+    budget = BudgetTemps(budget_fichier, budget_section)
+    
+    try:
+        if verifier and not _accepter_pdf(chemin_pdf):
+            return None
+        
+        if triage:
+            instantane = analyser_pdf(chemin_pdf, parallele, signaler, triage['roles'], budget)
+            if instantane is None:
+                return None
+            return extraire_depuis_tableaux(chemin_pdf, instantane['tableaux'], signaler, triage['sections'], budget)
+        
+        if cache_sections:
+            return extraire_avec_cache_sections(chemin_pdf, cache_sections, parallele, signaler,
+                                                dossier_instantanes, budget, annee)
+        
+        instantane = analyser_pdf(chemin_pdf, parallele, signaler, budget=budget)
+        if instantane is None:
+            return None
+        
+        # Un instantané incomplet (budget épuisé) ne doit pas servir de référence au rejeu
+        if dossier_instantanes and not budget.niveaux_ignores:
+            instantane['sha256'] = empreinte_fichier(chemin_pdf)
+            sauvegarder_instantane(dossier_instantanes, instantane, annee)
+        
+        return extraire_depuis_tableaux(chemin_pdf, instantane['tableaux'], signaler, budget=budget)
+    
+    except MemoryError:
+        # Levée notamment quand la limite d'espace d'adressage du sous-processus isolé est atteinte
+        print("❌ Limite mémoire atteinte pendant l'extraction")
+        return None
+    
+    except Exception as e:
+        print(f"❌ Erreur lors du traitement : {e}")
+        return None
+    
+    finally:
+        if signaler:
+            signaler('fichier_termine')
+
+
+def extraire_contenu_pdf(contenu_pdf, nom_fichier, isole=True, **options):
+    """Extrait un PDF reçu en mémoire (téléversement, requête HTTP...) via un fichier temporaire.
+    
+    Args:
+        contenu_pdf: Octets du PDF
+        nom_fichier: Nom d'origine (utilisé pour les messages)
+        isole: Si True (défaut, le fichier vient de l'extérieur), l'extraction tourne dans un
+               sous-processus limité en temps CPU et en mémoire (extraire_un_pdf_isole)
+        **options: Transmises à extraire_un_pdf
+    """
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        chemin_pdf = Path(temp_dir) / (Path(nom_fichier).name or "liasse.pdf")
+        chemin_pdf.write_bytes(contenu_pdf)
+        if isole:
+            return extraire_un_pdf_isole(chemin_pdf, **options)
+        return extraire_un_pdf(chemin_pdf, **options)
+
+
+def prechauffer_processus():
+    """Charge d'avance ce que la première extraction chargerait (initialiseur des workers d'un pool).
+
+    Les tables de codes sont compilées à l'import de ce module (hérité du parent avec fork) ;
+    il reste à importer pdfplumber et pdfminer, pour que ni la première extraction du worker
+    ni les sous-processus isolés qu'il forke ne paient ce coût.
+    """
+    import pdfplumber  # noqa: F401  (reste dans sys.modules)
+    import pdfminer.high_level  # noqa: F401
+
+
+# ============================================
+# CONTRÔLES PRÉALABLES ET EXTRACTION ISOLÉE
+# ============================================
+
+# Motifs lus directement dans les octets du PDF (sans l'analyser avec pdfplumber)
+MOTIF_NB_PAGES = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b")
+MOTIF_PAGE = re.compile(rb"/Type\s*/Page\b")
+MOTIF_FLUX_OBJETS = re.compile(rb"/Type\s*/ObjStm\b")
+MOTIF_DICTIONNAIRE_FLUX = re.compile(rb"\d+\s+\d+\s+obj\s*<<((?:(?!endobj).){0,4096}?)>>\s*stream", re.DOTALL)
+MOTIF_LONGUEUR = re.compile(rb"/Length\s+(\d+)(?!\s+\d+\s+R)")
+MOTIF_POLICE = re.compile(rb"/Type\s*/Font\b|/Font\s*(?:<<|\d+\s+\d+\s+R)")   # Objets police ou ressources /Font
+MOTIF_CHIFFREMENT = re.compile(rb"/Encrypt\s*(?:<<|\d+\s+\d+\s+R)")
+MOTIF_OPERATEUR_TEXTE = re.compile(rb"(?<![A-Za-z])T[jJ](?![A-Za-z])")
+MOTIF_CHAINE_LISIBLE = re.compile(rb"\([^()\\]*?[A-Za-z]{3}[^()\\]*?\)")
+MOTIF_MARQUEURS = re.compile("|".join(sorted({variante for marqueur in MARQUEURS_LIASSE
+                                              for variante in (marqueur, marqueur.upper())})).encode())
+MOTIF_CHAINE_UTF16 = re.compile(rb"<FEFF((?:[0-9A-Fa-f]{4})+)>")    # Titres des signets, métadonnées
+# Chaînes affichées par Tj/TJ : littérales (avec échappements) ou hexadécimales, un tableau TJ entier à la fois
+MOTIF_TEXTE_AFFICHE = re.compile(rb"\[((?:\((?:[^()\\]|\\.)*\)|<[0-9A-Fa-f\s]*>|[^\]()<])*)\]\s*TJ"
+                                 rb"|(\((?:[^()\\]|\\.)*\)|<[0-9A-Fa-f\s]*>)\s*Tj", re.DOTALL)
+MOTIF_CHAINE_AFFICHEE = re.compile(rb"\(((?:[^()\\]|\\.)*)\)|<([0-9A-Fa-f\s]*)>", re.DOTALL)
+MOTIF_ECHAPPEMENT = re.compile(rb"\\([0-7]{1,3}|.)", re.DOTALL)
+
+
+def controler_pdf_brut(chemin_pdf):
+    """Contrôles préalables sur les octets du PDF, avant toute analyse par pdfplumber.
+    
+    Vérifie en quelques millisecondes la taille, le nombre de pages, le volume d'images
+    déclaré et le nombre de flux d'objets compressés. Les pages rangées dans des flux
+    compressés ne sont pas visibles ici : le /Count de l'arbre des pages prend le relais.
+    Un fichier qui passe ces limites est ensuite classé (classer_pdf_brut) : un scan sans
+    couche texte est refusé avant toute analyse ; un document sans formulaire de liasse
+    reconnu est seulement signalé (mesures['avertissement']).
+    
+    Args:
+        chemin_pdf: Path du PDF
+        
+    Returns:
+        tuple: (mesures, anomalies) où mesures = {'taille', 'nb_pages', 'volume_images', 'flux_objets',
+               'classement', 'avertissement'} et anomalies = liste de messages (vide si le fichier peut être extrait)
+    """
+    taille = chemin_pdf.stat().st_size
+    mesures = {'taille': taille, 'nb_pages': None, 'volume_images': None, 'flux_objets': None}
+    
+    if taille > LIMITE_TAILLE_FICHIER:
+        return mesures, [f"fichier de {taille / 1024 / 1024:.1f} Mo (max {LIMITE_TAILLE_FICHIER // (1024 * 1024)} Mo)"]
+    
+    contenu = chemin_pdf.read_bytes()
+    if not contenu.startswith(b"%PDF-") and b"%PDF-" not in contenu[:1024]:
+        return mesures, ["en-tête %PDF absent (ce n'est pas un PDF)"]
+    
+    comptes = [int(a or b) for a, b in MOTIF_NB_PAGES.findall(contenu)]
+    mesures['nb_pages'] = max(comptes + [len(MOTIF_PAGE.findall(contenu))])
+    mesures['flux_objets'] = len(MOTIF_FLUX_OBJETS.findall(contenu))
+    
+    volume_images = 0
+    for dictionnaire in MOTIF_DICTIONNAIRE_FLUX.finditer(contenu):
+        entete = dictionnaire.group(1)
+        if b"/Image" in entete:
+            longueur = MOTIF_LONGUEUR.search(entete)
+            volume_images += int(longueur.group(1)) if longueur else 0
+    mesures['volume_images'] = volume_images
+    
+    anomalies = []
+    if mesures['nb_pages'] > LIMITE_NB_PAGES:
+        anomalies.append(f"{mesures['nb_pages']} pages (max {LIMITE_NB_PAGES})")
+    if volume_images > LIMITE_VOLUME_IMAGES:
+        anomalies.append(f"{volume_images / 1024 / 1024:.1f} Mo d'images (max {LIMITE_VOLUME_IMAGES // (1024 * 1024)} Mo)")
+    if mesures['flux_objets'] > LIMITE_FLUX_OBJETS:
+        anomalies.append(f"{mesures['flux_objets']} flux d'objets compressés (max {LIMITE_FLUX_OBJETS})")
+    if anomalies:
+        return mesures, anomalies
+    
+    # Classement : un scan sans couche texte ne part pas à l'analyse
+    mesures['classement'] = classer_pdf_brut(contenu)
+    mesures['avertissement'] = AVERTISSEMENTS_PAR_CLASSEMENT.get(mesures['classement']['type'])
+    if mesures['classement']['type'] in REFUS_PAR_CLASSEMENT:
+        anomalies.append(REFUS_PAR_CLASSEMENT[mesures['classement']['type']])
+    return mesures, anomalies
+
+
+# Flux inutiles au classement : images, programmes de polices, métadonnées XMP, tables de références
+FLUX_IGNORES_CLASSEMENT = [b"/Image", b"/Length1", b"/Length2", b"/FontFile", b"/Type1C", b"/CIDFontType0C",
+                           b"/OpenType", b"/Metadata", b"/XRef", b"/EmbeddedFile"]
+
+
+def _flux_a_classer(contenu):
+    """Octets décompressés des flux de contenu et d'objets du PDF (images et polices exclues).
+    
+    Yields:
+        bytes ou None: None pour un flux que ce classement ne sait pas décoder (chaîne de filtres,
+                       /DecodeParms, flux chiffré ou corrompu)
+    """
+    for dictionnaire in MOTIF_DICTIONNAIRE_FLUX.finditer(contenu):
+        entete = dictionnaire.group(1)
+        if any(marque in entete for marque in FLUX_IGNORES_CLASSEMENT):
+            continue
+        debut = dictionnaire.end()
+        debut += 2 if contenu.startswith(b"\r\n", debut) else 1
+        longueur = MOTIF_LONGUEUR.search(entete)
+        fin = debut + int(longueur.group(1)) if longueur else contenu.find(b"endstream", debut)
+        donnees = contenu[debut:fin if fin > debut else None]
+        
+        if b"/Filter" not in entete:
+            yield donnees
+        elif entete.count(b"Decode") == 1 and b"/FlateDecode" in entete:
+            try:
+                # Plafonné : un flux qui se décompresse démesurément ne bloque pas le classement
+                yield zlib.decompressobj().decompress(donnees, LIMITE_DECOMPRESSION_CLASSEMENT)
+            except zlib.error:
+                yield None
+        else:
+            yield None
+
+
+def _marqueurs_liasse(octets):
+    """Marqueurs de MARQUEURS_LIASSE présents dans des octets (un numéro inclus dans un nombre plus long ne compte pas)."""
+    return {correspondance.group().decode().upper() for correspondance in MOTIF_MARQUEURS.finditer(octets)
+            if not octets[correspondance.start() - 1:correspondance.start()].isdigit()
+            and not octets[correspondance.end():correspondance.end() + 1].isdigit()}
+
+
+def _decoder_chaine_affichee(litterale, hexadecimale):
+    """Octets d'une chaîne PDF : échappements d'une chaîne (…) résolus, chiffres hexadécimaux d'une chaîne <…> décodés.
+    
+    Une chaîne hexadécimale sur deux octets par caractère (UTF-16 ou police CID à codes
+    Unicode) est ramenée à un octet par caractère quand c'est possible.
+    """
+    if litterale is not None:
+        return MOTIF_ECHAPPEMENT.sub(
+            lambda e: bytes([int(e.group(1), 8) & 0xFF]) if e.group(1)[:1].isdigit() else e.group(1), litterale)
+    chiffres = re.sub(rb"\s", b"", hexadecimale)
+    octets = bytes.fromhex((chiffres + b"0" * (len(chiffres) % 2)).decode())
+    if len(octets) % 2 == 0 and octets and not any(octets[0::2]):
+        return octets[1::2]
+    return octets
+
+
+def _texte_affiche(donnees):
+    """Texte affiché par les opérateurs Tj et TJ d'un flux de contenu, un opérateur par ligne.
+    
+    Les morceaux d'un tableau TJ (texte crénelé, ex: [(N° )-10(20)-15(50)]TJ) sont recollés :
+    un numéro de formulaire coupé par le crénage est ainsi reconnu.
+    """
+    lignes = []
+    for affichage in MOTIF_TEXTE_AFFICHE.finditer(donnees):
+        operandes = affichage.group(1) if affichage.group(1) is not None else affichage.group(2)
+        lignes.append(b"".join(_decoder_chaine_affichee(chaine.group(1), chaine.group(2))
+                               for chaine in MOTIF_CHAINE_AFFICHEE.finditer(operandes)))
+    return b"\n".join(lignes)
+
+
+def classer_pdf_brut(contenu):
+    """Classe un PDF d'après sa structure brute : liasse avec couche texte, scan ou autre document.
+    
+    Lit les polices déclarées, les opérateurs d'affichage de texte (Tj, TJ) des flux de contenu
+    et les numéros de formulaires (2050, 2051...) ou la mention DGFiP dans le texte, les signets
+    et les métadonnées, sans analyser les pages : quelques millisecondes pour une liasse, la
+    lecture s'arrêtant dès que couche texte et marqueurs sont trouvés.
+    
+    Le classement ne tranche que ce qu'il a pu lire entièrement : un PDF chiffré, un flux qu'il
+    ne sait pas décoder ou des marqueurs de liasse sans couche texte lisible donnent 'indetermine',
+    et le fichier part à l'analyse comme avant. Les marqueurs sont aussi cherchés dans le texte
+    affiché, morceaux des tableaux TJ recollés et chaînes hexadécimales décodées ; seul 'scan'
+    entraîne un refus (voir REFUS_PAR_CLASSEMENT), 'hors_liasse' n'est qu'un avertissement.
+    
+    Args:
+        contenu: Octets du PDF
+    
+    Returns:
+        dict: {'type': 'liasse' | 'indetermine' | 'scan' | 'hors_liasse', 'nb_polices', 'operateurs_texte',
+               'chaines_lisibles', 'flux_illisibles', 'chiffre', 'marqueurs'}
+               'indetermine' : fichier que ce classement ne peut pas trancher, à analyser
+    """
+    marqueurs = _marqueurs_liasse(contenu)
+    for chaine in MOTIF_CHAINE_UTF16.findall(contenu):
+        marqueurs |= _marqueurs_liasse(bytes.fromhex(chaine.decode()).decode("utf-16-be", errors="ignore").encode())
+    
+    classement = {'nb_polices': len(MOTIF_POLICE.findall(contenu)), 'operateurs_texte': 0, 'chaines_lisibles': 0,
+                  'flux_illisibles': 0, 'chiffre': bool(MOTIF_CHIFFREMENT.search(contenu))}
+    
+    decompresse = 0
+    lecture_complete = True
+    for donnees in _flux_a_classer(contenu):
+        if donnees is None:
+            classement['flux_illisibles'] += 1
+            continue
+        classement['operateurs_texte'] += len(MOTIF_OPERATEUR_TEXTE.findall(donnees))
+        classement['chaines_lisibles'] += len(MOTIF_CHAINE_LISIBLE.findall(donnees))
+        classement['nb_polices'] += len(MOTIF_POLICE.findall(donnees))    # Polices rangées dans des /ObjStm
+        marqueurs |= _marqueurs_liasse(donnees)
+        if len(marqueurs) < MIN_MARQUEURS_LIASSE and classement['operateurs_texte']:
+            marqueurs |= _marqueurs_liasse(_texte_affiche(donnees))
+        
+        decompresse += len(donnees)
+        if classement['operateurs_texte'] and len(marqueurs) >= MIN_MARQUEURS_LIASSE:
+            break
+        if decompresse > LIMITE_DECOMPRESSION_CLASSEMENT:
+            lecture_complete = False
+            break
+
+    classement['marqueurs'] = sorted(marqueurs)
+    if len(marqueurs) >= MIN_MARQUEURS_LIASSE:
+        classement['type'] = 'liasse' if classement['operateurs_texte'] else 'indetermine'
+    elif classement['chiffre'] or classement['flux_illisibles'] or not lecture_complete:
+        classement['type'] = 'indetermine'
+    elif not classement['operateurs_texte']:
+        # Un scan : des images et aucune police ; sans police ni image, il n'y a rien à extraire
+        nb_images = sum(b"/Image" in d.group(1) for d in MOTIF_DICTIONNAIRE_FLUX.finditer(contenu))
+        if classement['nb_polices']:
+            classement['type'] = 'indetermine'
+        else:
+            classement['type'] = 'scan' if nb_images else 'hors_liasse'
+    elif classement['chaines_lisibles'] >= MIN_CHAINES_LISIBLES:
+        classement['type'] = 'hors_liasse'
+    else:
+        classement['type'] = 'indetermine'
+    return classement
+
+
+def _accepter_pdf(chemin_pdf):
+    """Applique controler_pdf_brut et affiche la raison d'un éventuel refus."""
+    mesures, anomalies = controler_pdf_brut(chemin_pdf)
+    if mesures.get('avertissement'):
+        print(f"⚠️ {chemin_pdf.name} : {mesures['avertissement']}")
+    if anomalies:
+        print(f"❌ PDF refusé par les contrôles préalables : {'; '.join(anomalies)}")
+        return False
+    return True
+
+
+def _appliquer_limites_ressources(temps_cpu, memoire):
+    """Fixe les limites du processus courant (sans effet hors Unix, où le module resource n'existe pas)."""
+    try:
+        import resource
+    except ImportError:
+        return
+    
+    resource.setrlimit(resource.RLIMIT_CPU, (temps_cpu, temps_cpu))
+    resource.setrlimit(resource.RLIMIT_AS, (memoire, memoire))
+
+
+def _extraire_dans_sous_processus(file_sortie, chemin_pdf, temps_cpu, memoire, options):
+    """Point d'entrée du sous-processus : limites, extraction, puis envoi du résultat dans la file."""
+    _appliquer_limites_ressources(temps_cpu, memoire)
+    resultats = extraire_un_pdf(chemin_pdf, progression=ProgressionVersFile(file_sortie), verifier=False, **options)
+    file_sortie.put(('resultat', resultats))
+
+
+def extraire_un_pdf_isole(chemin_pdf, progression=None, temps_cpu=LIMITE_TEMPS_CPU, memoire=LIMITE_MEMOIRE,
+                          delai=DELAI_MAX_ISOLE, **options):
+    """Extrait un PDF dans un sous-processus limité en temps CPU et en mémoire.
+    
+    Un fichier pathologique ne peut ainsi ni bloquer un cœur ni remplir la mémoire du
+    processus appelant (instance Streamlit partagée, service, traitement par lot) : le
+    sous-processus est tué par le système ou, au-delà du délai, par l'appelant.
+    
+    Args:
+        chemin_pdf: Path du PDF
+        progression: Fonction de progression, alimentée par les événements du sous-processus
+        temps_cpu: Limite de temps CPU en secondes
+        memoire: Limite d'espace d'adressage en octets
+        delai: Délai d'horloge maximal en secondes
+        **options: Transmises à extraire_un_pdf
+        
+    Returns:
+        dict: Résultats de extraire_un_pdf, ou None (refus, échec, limite atteinte)
+    """
+    import multiprocessing
+    import queue
+    
+    if not _accepter_pdf(chemin_pdf):
+        if progression:
+            progression({'etape': 'fichier_termine', 'fichier': chemin_pdf.name, 'horodatage': time.time()})
+        return None
+    
+    contexte = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    file_sortie = contexte.Queue()
+    processus = contexte.Process(target=_extraire_dans_sous_processus,
+                                 args=(file_sortie, chemin_pdf, temps_cpu, memoire, options))
+    processus.start()
+    
+    # Relayer la progression jusqu'au résultat (la file doit être vidée avant d'attendre le processus)
+    limite = time.time() + delai
+    resultats = None
+    try:
+        while True:
+            try:
+                message = file_sortie.get(timeout=0.5)
+            except queue.Empty:
+                if not processus.is_alive():
+                    print(f"❌ Extraction interrompue (code de sortie {processus.exitcode}) : "
+                          f"limite de temps CPU ou de mémoire probablement atteinte")
+                    break
+                if time.time() > limite:
+                    print(f"❌ Extraction arrêtée après {delai} s")
+                    break
+                continue
+            
+            if isinstance(message, tuple):
+                resultats = message[1]
+                break
+            if progression:
+                progression(message)
+    finally:
+        if processus.is_alive():
+            processus.join(timeout=5)
+        if processus.is_alive():
+            processus.kill()
+            processus.join()
+    
+    if resultats is None and progression:
+        # Le sous-processus n'a pas pu signaler la fin du fichier
+        progression({'etape': 'fichier_termine', 'fichier': chemin_pdf.name, 'horodatage': time.time()})
+    return resultats
+
+
+# ============================================
+# INSTANTANÉS DES TABLEAUX BRUTS
+# ============================================
+
+# Version du format des instantanés (à incrémenter si la structure change)
+VERSION_INSTANTANE = 1
+
+
+def empreinte_fichier(chemin):
+    """Calcule l'empreinte SHA-256 d'un fichier (identifiant stable d'une liasse)."""
+    sha = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+def sauvegarder_instantane(dossier, instantane, annee=None):
+    """Écrit un instantané compressé (JSON gzip) nommé d'après l'empreinte du PDF.
+    
+    Args:
+        dossier: Dossier des instantanés
+        instantane: Instantané renvoyé par analyser_pdf, complété de 'sha256'
+        annee: Année attribuée au PDF lors de l'extraction (reprise telle quelle par le rejeu)
+    
+    Returns:
+        Path: Chemin du fichier écrit
+    """
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin = dossier / f"{instantane['sha256']}.json.gz"
+    
+    contenu = dict(instantane, version=VERSION_INSTANTANE, annee=annee, horodatage=time.time())
+    chemin_temp = chemin.with_suffix('.tmp')
+    with gzip.open(chemin_temp, 'wt', encoding='utf-8') as f:
+        json.dump(contenu, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(chemin_temp, chemin)
+    
+    print(f"💾 Instantané sauvegardé : {chemin.name}")
+    return chemin
+
+
+def charger_instantane(chemin):
+    """Relit un instantané écrit par sauvegarder_instantane."""
+    with gzip.open(chemin, 'rt', encoding='utf-8') as f:
+        instantane = json.load(f)
+    if instantane.get('version') != VERSION_INSTANTANE:
+        raise ValueError(f"Version d'instantané non supportée : {instantane.get('version')} ({Path(chemin).name})")
+    return instantane
+
+
+def rejouer_instantanes(dossier):
+    """Ré-applique les tables de codes actuelles à tous les instantanés d'un dossier, sans relire les PDFs.
+    
+    Un PDF modifié puis ré-extrait laisse plusieurs instantanés (un par empreinte) : seul le
+    plus récent de chaque nom de fichier est rejoué.
+    
+    Returns:
+        list: Tuples (nom du PDF d'origine, année enregistrée ou None, resultats ou None),
+              triés par nom de fichier
+    """
+    derniers = {}
+    for chemin in Path(dossier).glob("*.json.gz"):
+        try:
+            instantane = charger_instantane(chemin)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Instantané ignoré ({chemin.name}) : {e}")
+            continue
+        # Les instantanés antérieurs à l'horodatage sont départagés par la date du fichier
+        instantane.setdefault('horodatage', chemin.stat().st_mtime)
+        precedent = derniers.get(instantane['fichier'])
+        if precedent is None or instantane['horodatage'] > precedent['horodatage']:
+            derniers[instantane['fichier']] = instantane
+    
+    resultats = []
+    for nom_fichier, instantane in sorted(derniers.items()):
+        print(f"\n🔁 Rejeu : {nom_fichier}")
+        resultats.append((nom_fichier, instantane.get('annee'),
+                          extraire_depuis_tableaux(Path(nom_fichier), instantane['tableaux'])))
+    return resultats
+
+
+# ============================================
+# CACHE DES RÉSULTATS PAR SECTION
+# ============================================
+
+DOSSIER_CACHE_SECTIONS_DEFAUT = Path("resultats") / "cache_sections"
+
+# Version du format du cache (à incrémenter si la structure change ou si un outil commun change de sens)
+VERSION_CACHE_SECTIONS = 1
+
+# Fonctions propres à chaque section : leur code source entre dans la clé du cache de la section
+EXTRACTEURS_PAR_SECTION = {
+    'actif': [extraire_bilan_actif_par_codes, extraire_bilan_actif_par_libelles, _trouver_colonne_net],
+    'passif': [extraire_bilan_passif_par_codes, extraire_bilan_passif_par_libelles, _trouver_colonne_passif_n],
+    'cr': [extraire_compte_resultat_par_codes, extraire_compte_resultat_par_libelles,
+           _trouver_colonne_compte_resultat_page1, _trouver_colonne_compte_resultat_page2],
+    'echeances': [extraire_etat_echeances_par_codes],
+    'affectation': [extraire_affectation_resultat_par_codes],
+}
+
+# Fonctions partagées par toutes les sections (les modifier invalide tout le cache)
+EXTRACTEURS_COMMUNS = [
+    nettoyer_montant, normaliser_texte, convertir_en_codes, matcher_par_mots_cles, calculer_similarite,
+    extraire_valeur_hybride, valider_section, _choisir_avec_controles, extraire_section, trouver_page,
+    _trouver_colonne_n_1, _lire_codes_colonne, extraire_exercice_precedent,
+]
+
+MOTS_CLES_PAR_SECTION = {
+    'actif': MOTS_CLES_BILAN_ACTIF,
+    'passif': MOTS_CLES_BILAN_PASSIF,
+    'cr': MOTS_CLES_COMPTE_RESULTAT,
+    'echeances': MOTS_CLES_ETAT_ECHEANCES,
+    'affectation': MOTS_CLES_AFFECTATION,
+}
+
+SEUILS_PAR_SECTION = {
+    'actif': SEUIL_REUSSITE_CODES,
+    'passif': SEUIL_REUSSITE_CODES_PASSIF,
+    'cr': SEUIL_REUSSITE_CODES_COMPTE_RESULTAT,
+    'echeances': SEUIL_REUSSITE_CODES_ETAT_ECHEANCES,
+    'affectation': SEUIL_REUSSITE_CODES_AFFECTATION_RESULTAT,
+}
+
+# Sections dont la colonne N-1 est lue (voir extraire_exercice_precedent)
+SECTIONS_EXERCICE_PRECEDENT = ['actif', 'passif', 'cr']
+
+# Statistiques du cache (cumulées sur tous les PDFs traités par le processus)
+STATS_CACHE_SECTIONS = {section: {'trouvees': 0, 'calculees': 0} for section in SECTIONS}
+
+# Code source des fonctions, lu au premier besoin
+_sources_extracteurs = {}
+
+
+def _source_fonction(fonction):
+    """Code source d'une fonction (ou son bytecode si le source n'est pas disponible)."""
+    if fonction not in _sources_extracteurs:
+        try:
+            _sources_extracteurs[fonction] = inspect.getsource(fonction)
+        except (OSError, TypeError):
+            _sources_extracteurs[fonction] = fonction.__code__.co_code.hex()
+    return _sources_extracteurs[fonction]
+
+
+def cle_cache_section(section):
+    """Empreinte de tout ce qui détermine le résultat d'une section, hors contenu du PDF.
+    
+    Tables de codes, libellés et mots-clés, seuils, identités comptables, critères et profils
+    table_settings des pages et code des extracteurs : modifier l'un d'eux ne fait recalculer que cette section.
+    
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    configuration = {
+        'version': VERSION_CACHE_SECTIONS,
+        'codes': CODES_PAR_SECTION[section],
+        'libelles': sorted(INDEX_CODES['libelles_normalises'].get(section, {}).items()),
+        'mots_cles': MOTS_CLES_PAR_SECTION[section],
+        'seuil': SEUILS_PAR_SECTION[section],
+        'identites': IDENTITES_COMPTABLES.get(section, []),
+        'tolerances': [TOLERANCE_ECART_ABSOLU, TOLERANCE_ECART_RELATIF],
+        'rangs_statuts': RANG_STATUT_CONTROLE,
+        'pages': {role: [PAGES_ATTENDUES.get(role), _source_fonction(CRITERES_PAGES[role]),
+                         {editeur: profils.get(role) for editeur, profils in PROFILS_TABLEAUX.items()}]
+                  for role in PAGES_PAR_SECTION[section]},
+        'sources': [_source_fonction(fonction)
+                    for fonction in EXTRACTEURS_PAR_SECTION[section] + EXTRACTEURS_COMMUNS],
+    }
+    contenu = json.dumps(configuration, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def statistiques_cache_sections(reinitialiser=False):
+    """Renvoie une copie des statistiques du cache par section (et les remet à zéro si demandé)."""
+    stats = {section: dict(compteurs) for section, compteurs in STATS_CACHE_SECTIONS.items()}
+    if reinitialiser:
+        for compteurs in STATS_CACHE_SECTIONS.values():
+            compteurs['trouvees'] = compteurs['calculees'] = 0
+    return stats
+
+
+def _chemin_cache_section(dossier, sha256, section, cle):
+    return Path(dossier) / sha256 / f"{section}-{cle[:16]}.json.gz"
+
+
+def lire_cache_section(dossier, sha256, section, cle):
+    """Relit le résultat d'une section pour un PDF et une configuration donnés (None si absent).
+    
+    Returns:
+        dict: {'donnees', 'controle', 'exercice_precedent'} (listes remises en tuples)
+    """
+    chemin = _chemin_cache_section(dossier, sha256, section, cle)
+    if not chemin.exists():
+        return None
+    try:
+        with gzip.open(chemin, 'rt', encoding='utf-8') as f:
+            entree = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Entrée de cache illisible ({chemin.name}) : {e}")
+        return None
+    if entree.get('cle') != cle:
+        return None
+    
+    entree['donnees'] = [tuple(ligne) for ligne in entree['donnees']]
+    entree['controle']['ecarts'] = [tuple(ecart) for ecart in entree['controle']['ecarts']]
+    if entree['exercice_precedent'] is not None:
+        entree['exercice_precedent'] = [tuple(ligne) for ligne in entree['exercice_precedent']]
+    return entree
+
+
+def ecrire_cache_section(dossier, sha256, section, cle, entree):
+    """Écrit de façon atomique le résultat d'une section et supprime ceux des anciennes configurations."""
+    chemin = _chemin_cache_section(dossier, sha256, section, cle)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    
+    chemin_temp = chemin.with_suffix('.tmp')
+    with gzip.open(chemin_temp, 'wt', encoding='utf-8') as f:
+        json.dump(dict(entree, cle=cle), f, ensure_ascii=False, separators=(',', ':'), default=str)
+    os.replace(chemin_temp, chemin)
+    
+    for ancien in chemin.parent.glob(f"{section}-*.json.gz"):
+        if ancien != chemin:
+            ancien.unlink(missing_ok=True)
+    return chemin
+
+
+def extraire_avec_cache_sections(chemin_pdf, dossier_cache, parallele=False, signaler=None,
+                                 dossier_instantanes=None, budget=None, annee=None):
+    """Extrait un PDF en ne recalculant que les sections absentes du cache.
+    
+    Chaque section est mise en cache sous (empreinte du PDF, cle_cache_section) avec son contrôle
+    et sa colonne N-1 ; seules les pages des sections manquantes sont relues avec pdfplumber.
+    
+    Args:
+        chemin_pdf: Path du PDF
+        dossier_cache: Dossier du cache (une sous-arborescence par PDF)
+        dossier_instantanes: Si renseigné, l'instantané est sauvegardé quand toutes les pages ont été relues
+        budget: BudgetTemps du fichier ; une section dégradée faute de temps n'est pas mise en cache
+        annee: Année attribuée au PDF, enregistrée dans l'instantané
+    
+    Returns:
+        dict: Même format que extraire_un_pdf, ou None en cas d'échec
+    """
+    sha256 = empreinte_fichier(chemin_pdf)
+    cles = {section: cle_cache_section(section) for section in SECTIONS}
+    entrees = {section: lire_cache_section(dossier_cache, sha256, section, cles[section]) for section in SECTIONS}
+    manquantes = [section for section in SECTIONS if entrees[section] is None]
+    
+    for section in SECTIONS:
+        STATS_CACHE_SECTIONS[section]['calculees' if section in manquantes else 'trouvees'] += 1
+    print("🗃️ Cache des sections : " + ", ".join(
+        f"{section} {'✗' if section in manquantes else '✓'}" for section in SECTIONS))
+    
+    if manquantes:
+        roles = [role for section in manquantes for role in PAGES_PAR_SECTION[section]]
+        instantane = analyser_pdf(chemin_pdf, parallele, signaler, roles, budget)
+        if instantane is None:
+            return None
+        tableaux = instantane['tableaux']
+        
+        if dossier_instantanes and len(manquantes) == len(SECTIONS) and not (budget and budget.niveaux_ignores):
+            instantane['sha256'] = sha256
+            sauvegarder_instantane(dossier_instantanes, instantane, annee)
+        
+        if not _tableaux_bilan_presents(tableaux, manquantes):
+            return None
+        
+        for section in manquantes:
+            if budget:
+                budget.commencer_section()
+            nb_ignores_avant = len(budget.niveaux_ignores) if budget else 0
+            donnees, controle = extraire_section(chemin_pdf, section, tableaux, budget)
+            exercice_precedent = None
+            if section in SECTIONS_EXERCICE_PRECEDENT:
+                tableaux_section = {role: tableaux.get(role) for role in PAGES_PAR_SECTION[section]}
+                exercice_precedent = extraire_exercice_precedent(tableaux_section).get(section)
+            
+            entrees[section] = {'donnees': donnees, 'controle': controle, 'exercice_precedent': exercice_precedent}
+            # Dégradée : un niveau sauté pendant cette section, ou une de ses pages sautée à l'analyse
+            roles_degrades = [ignore['etape'] for ignore in (budget.niveaux_ignores if budget else [])]
+            degradee = (len(roles_degrades) > nb_ignores_avant
+                        or set(PAGES_PAR_SECTION[section]) & set(roles_degrades))
+            if not degradee:
+                ecrire_cache_section(dossier_cache, sha256, section, cles[section], entrees[section])
+            if signaler:
+                signaler('section_terminee', section=section)
+    
+    resultats = {section: entrees[section]['donnees'] for section in SECTIONS}
+    controles = {section: entrees[section]['controle'] for section in SECTIONS}
+    controles['bilan'] = controler_equilibre_bilan(resultats)
+    for nom, controle in controles.items():
+        for libelle, ecart in controle['ecarts']:
+            print(f"⚠️ Contrôle '{nom}' non vérifié : {libelle} (écart {ecart:,.2f})")
+    resultats['controles'] = controles
+    if budget and budget.niveaux_ignores:
+        resultats['niveaux_ignores'] = budget.niveaux_ignores
+    
+    exercice_precedent = {section: entrees[section]['exercice_precedent'] for section in SECTIONS_EXERCICE_PRECEDENT
+                          if entrees[section]['exercice_precedent'] is not None}
+    if exercice_precedent:
+        resultats['exercice_precedent'] = exercice_precedent
+    
+    return resultats
+
+
+# ============================================
+# JOURNAL DES TRAITEMENTS PAR LOT
+# ============================================
+
+DOSSIER_JOURNAL_DEFAUT = Path("resultats") / "journal"
+
+
+def journaliser_resultat(dossier, chemin_pdf, sha256, annee, resultats):
+    """Écrit de façon atomique le résultat d'un fichier du lot (JSON gzip nommé d'après l'empreinte du PDF).
+    
+    Un échec est aussi journalisé, avec resultats=None, pour être retenté par --resume, de même
+    qu'un résultat partiel (budget de temps épuisé).
+    """
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin = dossier / f"{sha256}.json.gz"
+    
+    entree = {
+        'fichier': Path(chemin_pdf).name,
+        'sha256': sha256,
+        'annee': annee,
+        'statut': ('partiel' if resultats.get('niveaux_ignores') else 'reussi') if resultats else 'echoue',
+        'resultats': resultats,
+    }
+    chemin_temp = chemin.with_suffix('.tmp')
+    with gzip.open(chemin_temp, 'wt', encoding='utf-8') as f:
+        json.dump(entree, f, ensure_ascii=False, separators=(',', ':'), default=str)
+    os.replace(chemin_temp, chemin)
+    return chemin
+
+
+def lire_journal(dossier, sha256):
+    """Relit le résultat journalisé d'un PDF (None s'il n'a pas été traité ou si l'entrée est illisible).
+    
+    Returns:
+        dict: {'fichier', 'sha256', 'annee', 'statut', 'resultats'} (sections remises en listes de tuples)
+    """
+    chemin = Path(dossier) / f"{sha256}.json.gz"
+    if not chemin.exists():
+        return None
+    try:
+        with gzip.open(chemin, 'rt', encoding='utf-8') as f:
+            entree = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Entrée de journal illisible ({chemin.name}) : {e}")
+        return None
+    
+    resultats = entree.get('resultats')
+    if resultats:
+        for section in SECTIONS:
+            if section in resultats:
+                resultats[section] = [tuple(ligne) for ligne in resultats[section]]
+    return entree
+
+
+def _enregistrer_en_base(chemin_base, entreprise, donnees_par_annee):
+    """Enregistre les résultats d'une entreprise dans la base SQLite des résultats."""
+    from base_resultats import ouvrir_base, enregistrer_resultats
+    
+    with ouvrir_base(chemin_base) as conn:
+        nb_lignes = enregistrer_resultats(conn, entreprise, donnees_par_annee)
+    print(f"🗄️ {nb_lignes} ligne(s) enregistrée(s) dans {chemin_base} pour '{entreprise}'")
+
+
+def main(argv=None):
+    """Version ligne de commande : traite tous les PDFs du dossier 'liasses/' comme une seule année.
+    
+    Avec --maj, ajoute seulement les PDFs indiqués à un fichier Excel déjà généré :
+        python main.py --maj resultats/extraction_multi_annees.xlsx --annee 2025 liasse_2025.pdf
+    """
+    parser = argparse.ArgumentParser(description="Extraction de liasses fiscales vers Excel")
+    parser.add_argument("--maj", type=Path, metavar="EXCEL",
+                        help="Fichier Excel existant auquel ajouter de nouvelles années")
+    parser.add_argument("--annee", action="append", default=[],
+                        help="Année de chaque PDF passé avec --maj (dans le même ordre)")
+    parser.add_argument("pdfs", nargs="*", type=Path,
+                        help="PDFs à ajouter (avec --maj) ou à cribler (avec --triage, défaut : liasses/*.pdf)")
+    parser.add_argument("--base", type=Path, metavar="SQLITE",
+                        help="Enregistre aussi les valeurs et ratios dans une base SQLite (ex: resultats/liasses.db)")
+    parser.add_argument("--entreprise",
+                        help="Identifiant de l'entreprise (SIREN ou code interne) pour --base")
+    parser.add_argument("--portefeuille", type=Path, metavar="EXCEL",
+                        help="Exporte toutes les entreprises de --base dans un classeur de portefeuille")
+    parser.add_argument("--parallele", action="store_true",
+                        help="Extrait les sections de chaque PDF en parallèle (processus séparés)")
+    parser.add_argument("--isole", action="store_true",
+                        help="Extrait chaque PDF dans un sous-processus limité en temps CPU et en mémoire")
+    parser.add_argument("--triage", action="store_true",
+                        help="Criblage rapide : n'extrait que les codes et ratios demandés (résultat en CSV)")
+    parser.add_argument("--codes", default=",".join(CODES_TRIAGE_DEFAUT),
+                        help="Codes à extraire en mode --triage, séparés par des virgules (défaut : %(default)s)")
+    parser.add_argument("--ratios", default="",
+                        help="Ratios à calculer en mode --triage, séparés par des virgules (ex: gearing_net)")
+    parser.add_argument("--instantanes", type=Path, metavar="DOSSIER",
+                        help="Sauvegarde les tableaux bruts de chaque PDF (pour --rejouer)")
+    parser.add_argument("--cache-sections", type=Path, metavar="DOSSIER",
+                        help="Cache des résultats par section : seules les sections dont la configuration "
+                             "a changé sont recalculées (ex: resultats/cache_sections)")
+    parser.add_argument("--journal", type=Path, default=DOSSIER_JOURNAL_DEFAUT, metavar="DOSSIER",
+                        help="Dossier où le résultat de chaque PDF est écrit dès sa fin (défaut : %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprend un lot interrompu : les PDFs déjà réussis sont relus du journal, "
+                             "seuls les autres sont extraits")
+    parser.add_argument("--rejouer", type=Path, metavar="DOSSIER",
+                        help="Ré-applique les tables de codes aux instantanés d'un dossier, sans relire les PDFs")
+    parser.add_argument("--budget", type=float, default=BUDGET_TEMPS_FICHIER, metavar="SECONDES",
+                        help="Temps alloué à chaque PDF ; au-delà, les niveaux coûteux sont sautés et le "
+                             "résultat est marqué partiel (défaut : %(default)s, 0 : pas de limite)")
+    parser.add_argument("--budget-section", type=float, default=BUDGET_TEMPS_SECTION, metavar="SECONDES",
+                        help="Temps alloué à chaque section d'un PDF (défaut : %(default)s, 0 : pas de limite)")
+    parser.add_argument("--profiler", type=Path, nargs="?", const=DOSSIER_PROFILS_DEFAUT, metavar="DOSSIER",
+                        help="Profile l'extraction de chaque PDF et la création de l'Excel ; garde les profils "
+                             "des appels plus longs que --seuil-profil (défaut : %(const)s)")
+    parser.add_argument("--seuil-profil", type=float, default=SEUIL_PROFILAGE, metavar="SECONDES",
+                        help="Durée à partir de laquelle un profil est conservé (défaut : %(default)s, 0 : toujours)")
+    parser.add_argument("--methode-profil", choices=["echantillonnage", "cprofile"], default="echantillonnage",
+                        help="echantillonnage (surcoût faible) ou cprofile (exact, plus lent) (défaut : %(default)s)")
+    args = parser.parse_args(argv)
+    
+    if args.profiler:
+        activer_profilage(args.profiler, args.seuil_profil, args.methode_profil)
+    
+    if args.portefeuille:
+        if not args.base:
+            parser.error("--portefeuille nécessite --base")
+        from base_resultats import ouvrir_base, iterer_portefeuille
+        with ouvrir_base(args.base) as conn:
+            creer_fichier_portefeuille(iterer_portefeuille(conn), args.portefeuille)
+        return
+    
+    if args.base and not args.entreprise:
+        parser.error("--base nécessite --entreprise")
+    
+    if args.maj:
+        if not args.pdfs or len(args.pdfs) != len(args.annee):
+            parser.error("--maj attend autant de --annee que de PDFs")
+        donnees_par_annee = mettre_a_jour_fichier_excel(args.maj, dict(zip(args.annee, args.pdfs)))
+        if donnees_par_annee and args.base:
+            _enregistrer_en_base(args.base, args.entreprise, donnees_par_annee)
+        return
+    
+    if args.triage:
+        codes = [code for code in args.codes.split(",") if code.strip()]
+        ratios = [ratio.strip() for ratio in args.ratios.split(",") if ratio.strip()]
+        try:
+            planifier_triage(codes, ratios)
+        except ValueError as e:
+            parser.error(str(e))
+        trier_dossier(args.pdfs or sorted(Path("liasses").glob("*.pdf")), codes, ratios, Path("resultats") / "triage.csv")
+        return
+    
+    print("\n" + "="*80)
+    print("🚀 EXTRACTION LIASSE FISCALE - MODE CLI")
+    print("="*80)
+    
+    dossier_liasses = Path("liasses")
+    dossier_resultats = Path("resultats")
+    dossier_resultats.mkdir(exist_ok=True)
+    
+    donnees_par_annee = {}
+    
+    if args.rejouer:
+        # Rejeu : chaque instantané garde l'année attribuée lors de l'extraction d'origine
+        print(f"\n🔁 Rejeu des instantanés de '{args.rejouer}'")
+        for idx, (nom_fichier, annee, resultats) in enumerate(rejouer_instantanes(args.rejouer)):
+            if annee is None:
+                annee = str(2023 + idx)
+                print(f"⚠️ {nom_fichier} : instantané sans année enregistrée, année {annee} déduite de l'ordre des fichiers")
+            if not resultats:
+                print(f"\n❌ Échec du rejeu pour {nom_fichier}")
+            elif annee in donnees_par_annee:
+                print(f"\n⚠️ {nom_fichier} ignoré : l'année {annee} est déjà fournie par un autre instantané")
+            else:
+                donnees_par_annee[annee] = resultats
+    else:
+        fichiers_pdf = sorted(dossier_liasses.glob("*.pdf"))
+        
+        if not fichiers_pdf:
+            print("\n❌ Aucun PDF dans 'liasses/'\n")
+            return
+        
+        print(f"\n📁 {len(fichiers_pdf)} fichier(s) PDF trouvé(s)")
+        print("ℹ️  Mode CLI : Chaque PDF sera traité comme une année différente (2023, 2024, 2025...)")
+        print()
+        
+        suivi = SuiviProgression(len(fichiers_pdf), afficher=lambda suivi: print(f"⏱️ {suivi.description()}"))
+        
+        # Traiter chaque PDF
+        for idx, chemin_pdf in enumerate(fichiers_pdf):
+            annee = str(2023 + idx)  # Attribution automatique: 2023, 2024, 2025, etc.
+            
+            print(f"\n{'='*80}")
+            print(f"📄 Fichier {idx + 1}/{len(fichiers_pdf)} : {chemin_pdf.name} → Année {annee}")
+            print(f"{'='*80}")
+            
+            # Reprise : un PDF inchangé déjà réussi n'est pas ré-extrait
+            sha256 = empreinte_fichier(chemin_pdf)
+            entree = lire_journal(args.journal, sha256) if args.resume else None
+            if entree and entree['statut'] == 'reussi':
+                print(f"\n⏭️ Déjà traité lors d'un lot précédent, résultat repris du journal")
+                suivi({'etape': 'fichier_termine', 'fichier': chemin_pdf.name})
+                resultats = entree['resultats']
+                # L'année journalisée fait foi : un PDF ajouté ou retiré depuis décale les positions
+                if entree.get('annee') and str(entree['annee']) != annee:
+                    print(f"⚠️ Année {entree['annee']} reprise du journal (position actuelle : {annee})")
+                    annee = str(entree['annee'])
+            else:
+                extraire = extraire_un_pdf_isole if args.isole else extraire_un_pdf
+                resultats = extraire(chemin_pdf, parallele=args.parallele, dossier_instantanes=args.instantanes,
+                                     progression=suivi, cache_sections=args.cache_sections,
+                                     budget_fichier=args.budget, budget_section=args.budget_section, annee=annee)
+                journaliser_resultat(args.journal, chemin_pdf, sha256, annee, resultats)
+            
+            if resultats and annee in donnees_par_annee:
+                print(f"\n⚠️ {chemin_pdf.name} ignoré : l'année {annee} est déjà fournie par un autre fichier")
+            elif resultats and resultats.get('niveaux_ignores'):
+                donnees_par_annee[annee] = resultats
+                print(f"\n⏳ Extraction partielle pour {chemin_pdf.name} (budget de temps épuisé)")
+            elif resultats:
+                donnees_par_annee[annee] = resultats
+                print(f"\n✅ Extraction réussie pour {chemin_pdf.name}")
+            else:
+                print(f"\n❌ Échec de l'extraction pour {chemin_pdf.name}")
+    
+    # Générer le fichier Excel
+    if donnees_par_annee:
+        print(f"\n{'='*80}")
+        print("📊 GÉNÉRATION DU FICHIER EXCEL")
+        print(f"{'='*80}\n")
+        
+        fusionner_exercices_precedents(donnees_par_annee)
+        
+        nom_excel = dossier_resultats / "extraction_multi_annees.xlsx"
+        creer_fichier_excel(donnees_par_annee, nom_excel)
+        
+        print("="*80)
+        print("✅ EXTRACTION TERMINÉE")
+        print("="*80)
+        print(f"\n📥 Fichier généré : {nom_excel}")
+        print(f"📅 Années extraites : {', '.join(sorted(donnees_par_annee.keys()))}")
+        print()
+        
+        if args.base:
+            _enregistrer_en_base(args.base, args.entreprise, donnees_par_annee)
+        
+        stats = statistiques_recherche_pages()
+        print(f"🔍 Recherche des pages : {stats['position_attendue']} à la position attendue, "
+              f"{stats['voisinage']} dans le voisinage, {stats['balayage_complet']} balayage(s) complet(s), "
+              f"{stats['pages_lues']} page(s) lue(s)")
+        
+        if args.cache_sections and not args.isole:
+            stats_cache = statistiques_cache_sections()
+            print("🗃️ Cache des sections : " + ", ".join(
+                f"{section} {compteurs['trouvees']}/{compteurs['trouvees'] + compteurs['calculees']}"
+                for section, compteurs in stats_cache.items()))
     else:
         print("\n❌ Aucune donnée n'a pu être extraite.\n")
 
@@ -0,0 +1,135 @@
+"""Mesure du temps de démarrage (imports à froid) des points d'entrée de l'application.
+
+Chaque mesure lance un interpréteur neuf avec -X importtime : temps total des imports,
+durée du processus, paquets les plus coûteux et présence des bibliothèques lourdes
+(pdfplumber, openpyxl), qui ne doivent être chargées qu'au premier PDF ou au premier Excel.
+Les résultats sont ajoutés à un historique CSV pour suivre l'évolution du démarrage.
+
+Exemples :
+    python mesure_demarrage.py
+    python mesure_demarrage.py --repetitions 10 --seuil-ms 150
+"""
+import argparse
+import csv
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+DOSSIER_PROJET = Path(__file__).parent
+HISTORIQUE_DEFAUT = Path("resultats") / "demarrage.csv"
+REPETITIONS_DEFAUT = 5
+NB_PAQUETS_AFFICHES = 5
+
+# Code exécuté pour chaque point d'entrée (interface : mêmes imports que le script Streamlit)
+ENTREES = {
+    'main': "import main",
+    'interface': "import streamlit; import main",
+    'service': "import service",
+    'base_resultats': "import base_resultats",
+}
+
+# Bibliothèques qui ne doivent pas être importées au démarrage
+MODULES_DIFFERES = ['pdfplumber', 'openpyxl']
+
+
+def mesurer_entree(code):
+    """Lance un interpréteur neuf et relève les temps d'import.
+
+    Returns:
+        dict: {'import_ms', 'processus_ms', 'paquets': {paquet: ms propres}, 'modules': set des modules importés}
+    """
+    debut = time.perf_counter()
+    sortie = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=DOSSIER_PROJET,
+                            capture_output=True, text=True, check=True)
+    processus_ms = (time.perf_counter() - debut) * 1000
+
+    import_ms = 0.0
+    paquets = {}
+    modules = set()
+    for ligne in sortie.stderr.splitlines():
+        if not ligne.startswith("import time:") or "|" not in ligne:
+            continue
+        propre, cumule, nom = ligne[len("import time:"):].split("|")
+        if not propre.strip().isdigit():
+            continue   # Ligne d'en-tête
+        module = nom.strip()
+        modules.add(module)
+        paquet = module.split(".")[0]
+        paquets[paquet] = paquets.get(paquet, 0) + int(propre) / 1000
+        # Imports de premier niveau (hors démarrage de l'interpréteur) : leur cumul est le temps total
+        if len(nom) - len(nom.lstrip()) == 1 and module != "site":
+            import_ms += int(cumule) / 1000
+    return {'import_ms': import_ms, 'processus_ms': processus_ms, 'paquets': paquets, 'modules': modules}
+
+
+def mesurer_demarrage(entrees=ENTREES, repetitions=REPETITIONS_DEFAUT):
+    """Mesure chaque point d'entrée plusieurs fois et garde la médiane.
+
+    Returns:
+        dict: {entree: {'import_ms', 'processus_ms', 'paquets': [(paquet, ms)], 'modules_lourds': [...]}}
+    """
+    resultats = {}
+    for entree, code in entrees.items():
+        mesures = [mesurer_entree(code) for _ in range(repetitions)]
+        paquets = {}
+        for mesure in mesures:
+            for paquet, duree in mesure['paquets'].items():
+                paquets.setdefault(paquet, []).append(duree)
+        resultats[entree] = {
+            'import_ms': statistics.median(mesure['import_ms'] for mesure in mesures),
+            'processus_ms': statistics.median(mesure['processus_ms'] for mesure in mesures),
+            'paquets': sorted(((paquet, statistics.median(durees)) for paquet, durees in paquets.items()),
+                              key=lambda p: -p[1])[:NB_PAQUETS_AFFICHES],
+            'modules_lourds': [module for module in MODULES_DIFFERES if module in mesures[0]['modules']],
+        }
+    return resultats
+
+
+def enregistrer_historique(resultats, chemin=HISTORIQUE_DEFAUT):
+    """Ajoute une ligne par point d'entrée à l'historique CSV (créé avec son en-tête si besoin)."""
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    nouveau = not chemin.exists()
+    horodatage = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(chemin, "a", newline="", encoding="utf-8") as f:
+        ecrivain = csv.writer(f, delimiter=";")
+        if nouveau:
+            ecrivain.writerow(["date", "entree", "import_ms", "processus_ms", "modules_lourds"])
+        for entree, mesure in resultats.items():
+            ecrivain.writerow([horodatage, entree, f"{mesure['import_ms']:.1f}", f"{mesure['processus_ms']:.1f}",
+                               ",".join(mesure['modules_lourds'])])
+    return chemin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure du temps de démarrage des points d'entrée")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS_DEFAUT,
+                        help="Interpréteurs lancés par point d'entrée (défaut : %(default)s)")
+    parser.add_argument("--historique", type=Path, default=HISTORIQUE_DEFAUT,
+                        help="Historique CSV des mesures (défaut : %(default)s)")
+    parser.add_argument("--seuil-ms", type=float,
+                        help="Échoue (code 1) si l'import de main dépasse ce temps ou charge une bibliothèque lourde")
+    args = parser.parse_args(argv)
+
+    resultats = mesurer_demarrage(repetitions=args.repetitions)
+    for entree, mesure in resultats.items():
+        lourds = ", ".join(mesure['modules_lourds']) or "aucune"
+        print(f"⏱️ {entree:<15} imports {mesure['import_ms']:7.1f} ms | processus {mesure['processus_ms']:7.1f} ms"
+              f" | bibliothèques lourdes chargées : {lourds}")
+        print("   " + ", ".join(f"{paquet} {duree:.1f} ms" for paquet, duree in mesure['paquets']))
+
+    chemin = enregistrer_historique(resultats, args.historique)
+    print(f"💾 Mesures ajoutées à {chemin}")
+
+    if args.seuil_ms is not None:
+        mesure = resultats['main']
+        if mesure['import_ms'] > args.seuil_ms or mesure['modules_lourds']:
+            print(f"❌ Démarrage de main trop lent ({mesure['import_ms']:.1f} ms, seuil {args.seuil_ms} ms) "
+                  f"ou bibliothèques lourdes chargées")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
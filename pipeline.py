@@ -0,0 +1,454 @@
+"""Extraction d'un lot de liasses en pipeline : lecture, analyse, correspondance et écriture se chevauchent.
+
+Quatre étages reliés par des files bornées, chacun traitant un fichier différent au même moment :
+
+    lecture          (thread)             lit et hache le PDF, contrôles préalables, reprise du journal
+    analyse          (pool de processus)  identifie les pages et extrait les tableaux bruts (pdfplumber)
+    correspondance   (thread)             applique les tables de codes et les contrôles comptables
+    écriture         (thread)             journal, lignes (fichier, section, code, montant) écrites au fil de l'eau
+
+Les files bornées limitent la mémoire : un étage rapide attend que le suivant ait de la place.
+Chaque étage relève la profondeur de sa file d'entrée, son débit et son taux d'occupation ;
+le résumé final désigne le goulot d'étranglement. Le classeur Excel (et la base, dont les
+ratios demandent toutes les années) est produit à la fin, comme avec main.py.
+
+Exemples :
+    python pipeline.py liasses/ACME/*.pdf --processus 3
+    python pipeline.py portefeuille/*/*.pdf --excel resultats/portefeuille.xlsx --base resultats/liasses.db
+"""
+import argparse
+import csv
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from main import (BUDGET_TEMPS_FICHIER, BUDGET_TEMPS_SECTION, DOSSIER_JOURNAL_DEFAUT, BudgetTemps, analyser_pdf,
+                  controler_pdf_brut, convertir_en_codes, creer_fichier_excel, creer_fichier_portefeuille,
+                  empreinte_fichier, extraire_depuis_tableaux, extraire_un_pdf_isole, fusionner_exercices_precedents,
+                  journaliser_resultat, lire_journal, prechauffer_processus)
+from file_travail import MOTIF_ANNEE
+
+NB_PROCESSUS_DEFAUT = 2
+TAILLE_FILES_DEFAUT = 4          # Éléments en attente au plus devant chaque étage
+INTERVALLE_RAPPORT = 5.0         # Secondes entre deux lignes d'avancement
+ATTENTE_ANALYSE = 0.05           # Secondes d'attente de l'étage d'analyse entre deux scrutations
+ATTENTE_FILE = 0.1               # Secondes entre deux essais sur une file pleine ou vide (abandon du lot vérifié)
+CHEMIN_CSV_DEFAUT = Path("resultats") / "pipeline_valeurs.csv"
+CHEMIN_EXCEL_DEFAUT = Path("resultats") / "extraction_multi_annees.xlsx"
+
+FIN = None                       # Marque de fin de lot, transmise d'étage en étage
+
+
+class Etage:
+    """Compteurs d'un étage : éléments traités, échecs, temps occupé et profondeur de sa file d'entrée."""
+
+    def __init__(self, nom, file_entree, parallelisme=1):
+        self.nom = nom
+        self.file_entree = file_entree
+        self.parallelisme = parallelisme
+        self.traites = 0
+        self.echecs = 0
+        self.occupe = 0.0
+        self.profondeur_max = 0
+        self.somme_profondeurs = 0
+        self.nb_releves = 0
+        self._verrou = threading.Lock()
+
+    def noter(self, duree, echec=False):
+        """Compte un élément traité en `duree` secondes."""
+        with self._verrou:
+            self.traites += 1
+            self.echecs += echec
+            self.occupe += duree
+
+    def relever(self):
+        """Relève la profondeur de la file d'entrée (appelé périodiquement)."""
+        profondeur = self.file_entree.qsize()
+        with self._verrou:
+            self.profondeur_max = max(self.profondeur_max, profondeur)
+            self.somme_profondeurs += profondeur
+            self.nb_releves += 1
+        return profondeur
+
+    def resume(self, duree_totale):
+        """Bilan de l'étage sur un lot de `duree_totale` secondes.
+
+        Returns:
+            dict: {'etage', 'traites', 'echecs', 'debit' (fichiers/min), 'duree_moyenne' (s/fichier),
+                   'occupation' (0 à 1, rapportée au nombre de workers), 'profondeur_moyenne', 'profondeur_max'}
+        """
+        with self._verrou:
+            return {
+                'etage': self.nom,
+                'traites': self.traites,
+                'echecs': self.echecs,
+                'debit': self.traites / duree_totale * 60 if duree_totale else 0.0,
+                'duree_moyenne': self.occupe / self.traites if self.traites else 0.0,
+                'occupation': self.occupe / (duree_totale * self.parallelisme) if duree_totale else 0.0,
+                'profondeur_moyenne': self.somme_profondeurs / self.nb_releves if self.nb_releves else 0.0,
+                'profondeur_max': self.profondeur_max,
+            }
+
+
+# ============================================
+# ÉTAGES
+# ============================================
+
+def _deposer(file, element, abandon):
+    """Dépose un élément dans une file bornée sans rester bloqué si le lot est abandonné.
+
+    Returns:
+        bool: False si le lot a été abandonné avant que la file ait de la place
+    """
+    while not abandon.is_set():
+        try:
+            file.put(element, timeout=ATTENTE_FILE)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _prendre(file, abandon):
+    """Retire l'élément suivant d'une file ; FIN si le lot est abandonné."""
+    while not abandon.is_set():
+        try:
+            return file.get(timeout=ATTENTE_FILE)
+        except queue.Empty:
+            continue
+    return FIN
+
+
+def _executer_etage(etage, sortie, abandon, fonction, *args):
+    """Exécute un étage puis transmet FIN ; une erreur imprévue abandonne le lot au lieu de bloquer les autres étages."""
+    try:
+        fonction(*args)
+    except Exception as e:
+        print(f"❌ Étage {etage.nom} arrêté ({type(e).__name__} : {e}), abandon du lot")
+        abandon.set()
+    finally:
+        if sortie is not None:
+            _deposer(sortie, FIN, abandon)
+
+
+def _etage_lecture(entree, sortie, etage, dossier_journal, reprendre, abandon):
+    """Lit chaque PDF : empreinte, contrôles préalables et, en reprise, résultat déjà journalisé."""
+    while True:
+        try:
+            chemin_pdf, entreprise, annee = entree.get_nowait()
+        except queue.Empty:
+            return
+        debut = time.perf_counter()
+        element = {'chemin': Path(chemin_pdf), 'entreprise': entreprise, 'annee': annee}
+        try:
+            element['sha256'] = empreinte_fichier(element['chemin'])
+            _, element['anomalies'] = controler_pdf_brut(element['chemin'])
+            entree_journal = lire_journal(dossier_journal, element['sha256']) if reprendre else None
+            if entree_journal and entree_journal['statut'] == 'reussi':
+                element['resultats'] = entree_journal['resultats']
+                element['repris'] = True
+        except Exception as e:
+            element['anomalies'] = [f"lecture impossible : {e}"]
+        etage.noter(time.perf_counter() - debut, echec=bool(element.get('anomalies')))
+        if not _deposer(sortie, element, abandon):
+            return
+
+
+def _analyser(chemin_pdf, budget_fichier, budget_section):
+    """Analyse pdfplumber d'un PDF (exécuté dans un worker du pool).
+
+    Returns:
+        tuple: (tableaux bruts ou None, durée en secondes, niveaux ignorés faute de budget)
+    """
+    debut = time.perf_counter()
+    budget = BudgetTemps(budget_fichier, budget_section)
+    instantane = analyser_pdf(Path(chemin_pdf), budget=budget)
+    return (instantane['tableaux'] if instantane else None), time.perf_counter() - debut, budget.niveaux_ignores
+
+
+def _nouveau_pool(nb_processus):
+    return ProcessPoolExecutor(max_workers=nb_processus, initializer=prechauffer_processus)
+
+
+def _analyser_isole(element, etage, budget_fichier, budget_section):
+    """Repli quand le pool est cassé (worker tué) : extraction complète dans un sous-processus limité.
+
+    Le fichier fautif échoue seul, dans son sous-processus ; l'élément repart avec ses résultats
+    (l'étage de correspondance le laisse passer).
+    """
+    print(f"🔁 {element['chemin'].name} : pool d'analyse cassé, extraction isolée")
+    debut = time.perf_counter()
+    try:
+        element['resultats'] = extraire_un_pdf_isole(element['chemin'], budget_fichier=budget_fichier,
+                                                     budget_section=budget_section)
+    except Exception as e:
+        print(f"❌ Erreur lors de l'extraction isolée de {element['chemin'].name} : {e}")
+        element['resultats'] = None
+    etage.noter(time.perf_counter() - debut, echec=element['resultats'] is None)
+
+
+def _etage_analyse(entree, sortie, etage, nb_processus, budget_fichier, budget_section, abandon):
+    """Confie les PDFs au pool (au plus un par worker) et transmet les tableaux dans l'ordre où ils sont prêts.
+
+    Si un worker meurt (mémoire, plantage), le pool est recréé et les fichiers qui y étaient
+    en cours sont extraits un par un en sous-processus isolé.
+    """
+    pool = _nouveau_pool(nb_processus)
+    en_vol = {}    # {future: (element, pool qui l'exécute)}
+    fin = False
+    try:
+        while (not fin or en_vol) and not abandon.is_set():
+            while not fin and len(en_vol) < nb_processus:
+                try:
+                    element = entree.get(timeout=ATTENTE_ANALYSE if en_vol else ATTENTE_FILE)
+                except queue.Empty:
+                    if en_vol or abandon.is_set():
+                        break
+                    continue
+                if element is FIN:
+                    fin = True
+                    continue
+                if not (element.get('anomalies') or 'resultats' in element):
+                    try:
+                        future = pool.submit(_analyser, element['chemin'], budget_fichier, budget_section)
+                        en_vol[future] = (element, pool)
+                        continue
+                    except BrokenProcessPool:
+                        pool = _remplacer_pool(pool, nb_processus)
+                        _analyser_isole(element, etage, budget_fichier, budget_section)
+                # Refusé, repris du journal ou extrait en isolé : rien de plus à analyser
+                if not _deposer(sortie, element, abandon):
+                    return
+
+            if not en_vol:
+                continue
+            terminees, _ = wait(en_vol, timeout=ATTENTE_ANALYSE, return_when=FIRST_COMPLETED)
+            for future in terminees:
+                element, pool_future = en_vol.pop(future)
+                try:
+                    element['tableaux'], element['duree_analyse'], element['niveaux_ignores'] = future.result()
+                    etage.noter(element['duree_analyse'], echec=element['tableaux'] is None)
+                except BrokenProcessPool:
+                    # Les autres fichiers en cours sur le même pool échouent aussi : un seul remplacement
+                    if pool_future is pool:
+                        pool = _remplacer_pool(pool, nb_processus)
+                    _analyser_isole(element, etage, budget_fichier, budget_section)
+                except Exception as e:
+                    print(f"❌ Erreur lors de l'analyse de {element['chemin'].name} : {e}")
+                    element['tableaux'], element['duree_analyse'], element['niveaux_ignores'] = None, 0.0, []
+                    etage.noter(0.0, echec=True)
+                if not _deposer(sortie, element, abandon):
+                    return
+    finally:
+        pool.shutdown(wait=not abandon.is_set(), cancel_futures=True)
+
+
+def _remplacer_pool(pool, nb_processus):
+    """Arrête un pool cassé et en démarre un neuf."""
+    print("⚠️ Un worker d'analyse s'est arrêté brutalement : pool recréé")
+    pool.shutdown(wait=False, cancel_futures=True)
+    return _nouveau_pool(nb_processus)
+
+
+def _etage_correspondance(entree, sortie, etage, budget_fichier, budget_section, abandon):
+    """Applique les tables de codes aux tableaux bruts, avec le reste du budget de temps du fichier."""
+    while (element := _prendre(entree, abandon)) is not FIN:
+        if 'tableaux' in element:
+            debut = time.perf_counter()
+            tableaux = element.pop('tableaux')
+            try:
+                # Le temps passé en file d'attente ne compte pas : seul le temps d'analyse est déduit
+                reste = max(budget_fichier - element['duree_analyse'], 0.001) if budget_fichier else None
+                budget = BudgetTemps(reste, budget_section)
+                budget.niveaux_ignores = element['niveaux_ignores']
+                element['resultats'] = (extraire_depuis_tableaux(element['chemin'], tableaux, budget=budget)
+                                        if tableaux is not None else None)
+            except Exception as e:
+                print(f"❌ Erreur lors du traitement de {element['chemin'].name} : {e}")
+                element['resultats'] = None
+            etage.noter(time.perf_counter() - debut, echec=element['resultats'] is None)
+        if not _deposer(sortie, element, abandon):
+            return
+
+
+def _etage_ecriture(entree, etage, ecrivain, dossier_journal, donnees_par_entreprise, abandon):
+    """Journalise chaque résultat et écrit ses lignes dès qu'il arrive."""
+    while (element := _prendre(entree, abandon)) is not FIN:
+        debut = time.perf_counter()
+        chemin_pdf = element['chemin']
+        resultats = element.get('resultats')
+        try:
+            if element.get('anomalies'):
+                print(f"❌ {chemin_pdf.name} refusé : {'; '.join(element['anomalies'])}")
+            elif not element.get('repris'):
+                journaliser_resultat(dossier_journal, chemin_pdf, element['sha256'], element['annee'], resultats)
+
+            if resultats:
+                donnees_par_entreprise.setdefault(element['entreprise'], {})[element['annee']] = resultats
+                for section, valeurs in convertir_en_codes(resultats).items():
+                    for code, montant in valeurs.items():
+                        ecrivain.writerow([element['entreprise'], element['annee'], chemin_pdf.name,
+                                           section, code, montant])
+            etage.noter(time.perf_counter() - debut, echec=not resultats)
+        except Exception as e:
+            print(f"❌ Erreur lors de l'écriture des résultats de {chemin_pdf.name} : {e}")
+            etage.noter(time.perf_counter() - debut, echec=True)
+
+
+def _rapporter(etages, arret, intervalle):
+    """Affiche périodiquement, pour chaque étage, les fichiers traités et la profondeur de sa file."""
+    while not arret.wait(intervalle):
+        print("⏱️ " + " | ".join(f"{etage.nom} {etage.traites} (file {etage.relever()})" for etage in etages))
+
+
+# ============================================
+# ORCHESTRATION
+# ============================================
+
+def executer_pipeline(taches, nb_processus=NB_PROCESSUS_DEFAUT, taille_files=TAILLE_FILES_DEFAUT,
+                      chemin_csv=CHEMIN_CSV_DEFAUT, dossier_journal=DOSSIER_JOURNAL_DEFAUT, reprendre=False,
+                      budget_fichier=BUDGET_TEMPS_FICHIER, budget_section=BUDGET_TEMPS_SECTION,
+                      intervalle=INTERVALLE_RAPPORT):
+    """Extrait un lot de PDFs avec les quatre étages en parallèle.
+
+    Args:
+        taches: Liste de tuples (chemin du PDF, entreprise, année)
+        nb_processus: Workers de l'étage d'analyse
+        taille_files: Capacité de chaque file entre deux étages
+        chemin_csv: CSV (séparateur ';') où les lignes (entreprise, année, fichier, section, code, montant)
+                    sont écrites au fil de l'eau
+        dossier_journal: Journal des résultats par fichier (voir main.journaliser_resultat)
+        reprendre: Si True, les PDFs déjà réussis sont repris du journal sans être analysés
+        budget_fichier, budget_section: Budgets de temps (voir main.BudgetTemps)
+        intervalle: Secondes entre deux lignes d'avancement
+
+    Returns:
+        tuple: (donnees_par_entreprise {entreprise: {annee: resultats}}, bilans des étages (voir Etage.resume))
+    """
+    files = [queue.Queue(maxsize=taille_files) for _ in range(3)]
+    file_lecture = queue.Queue()    # Entrée de l'étage de lecture : les tâches, toutes connues d'avance
+    for tache in taches:
+        file_lecture.put(tache)
+    etages = [Etage('lecture', file_lecture), Etage('analyse', files[0], nb_processus),
+              Etage('correspondance', files[1]), Etage('écriture', files[2])]
+
+    chemin_csv = Path(chemin_csv)
+    chemin_csv.parent.mkdir(parents=True, exist_ok=True)
+    donnees_par_entreprise = {}
+    abandon = threading.Event()     # Levé par un étage arrêté par une erreur imprévue : les autres s'arrêtent
+    fin_rapport = threading.Event()
+    debut = time.perf_counter()
+
+    with open(chemin_csv, 'w', newline='', encoding='utf-8-sig') as f:
+        ecrivain = csv.writer(f, delimiter=';')
+        ecrivain.writerow(['entreprise', 'annee', 'fichier', 'section', 'code', 'montant'])
+
+        etapes = [
+            (etages[0], files[0], _etage_lecture, (file_lecture, files[0], etages[0], dossier_journal, reprendre)),
+            (etages[1], files[1], _etage_analyse, (files[0], files[1], etages[1], nb_processus,
+                                                   budget_fichier, budget_section)),
+            (etages[2], files[2], _etage_correspondance, (files[1], files[2], etages[2],
+                                                          budget_fichier, budget_section)),
+            (etages[3], None, _etage_ecriture, (files[2], etages[3], ecrivain, dossier_journal,
+                                                donnees_par_entreprise)),
+        ]
+        threads = [threading.Thread(target=_executer_etage, args=(etage, sortie, abandon, fonction, *args, abandon))
+                   for etage, sortie, fonction, args in etapes]
+        rapporteur = threading.Thread(target=_rapporter, args=(etages, fin_rapport, intervalle), daemon=True)
+        for thread in threads + [rapporteur]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        fin_rapport.set()
+
+    if abandon.is_set():
+        print("⚠️ Lot abandonné : les résultats ci-dessous sont incomplets")
+    duree_totale = time.perf_counter() - debut
+    return donnees_par_entreprise, [etage.resume(duree_totale) for etage in etages]
+
+
+def afficher_bilan(bilans):
+    """Affiche le bilan de chaque étage et désigne le goulot d'étranglement (étage le plus occupé)."""
+    print(f"\n{'étage':<15} {'traités':>8} {'échecs':>7} {'débit/min':>10} {'s/fichier':>10} "
+          f"{'occupation':>11} {'file moy.':>10} {'file max':>9}")
+    for bilan in bilans:
+        print(f"{bilan['etage']:<15} {bilan['traites']:>8} {bilan['echecs']:>7} {bilan['debit']:>10.1f} "
+              f"{bilan['duree_moyenne']:>10.2f} {bilan['occupation']:>10.0%} "
+              f"{bilan['profondeur_moyenne']:>10.1f} {bilan['profondeur_max']:>9}")
+    goulot = max(bilans, key=lambda bilan: bilan['occupation'])
+    print(f"\n🐢 Goulot d'étranglement : {goulot['etage']} (occupé {goulot['occupation']:.0%} du temps)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extraction d'un lot de liasses en pipeline")
+    parser.add_argument("pdfs", nargs="*", type=Path, help="PDFs à extraire (défaut : liasses/*.pdf)")
+    parser.add_argument("--entreprise", help="Identifiant commun (défaut : nom du dossier de chaque PDF)")
+    parser.add_argument("--annee", action="append", default=[],
+                        help="Année de chaque PDF (même ordre) ; par défaut, l'année lue dans le nom du fichier")
+    parser.add_argument("--processus", type=int, default=NB_PROCESSUS_DEFAUT,
+                        help="Workers de l'étage d'analyse (défaut : %(default)s)")
+    parser.add_argument("--taille-files", type=int, default=TAILLE_FILES_DEFAUT,
+                        help="Capacité des files entre étages (défaut : %(default)s)")
+    parser.add_argument("--csv", type=Path, default=CHEMIN_CSV_DEFAUT,
+                        help="Lignes extraites, écrites au fil de l'eau (défaut : %(default)s)")
+    parser.add_argument("--excel", type=Path, default=CHEMIN_EXCEL_DEFAUT,
+                        help="Classeur produit à la fin (portefeuille si plusieurs entreprises) (défaut : %(default)s)")
+    parser.add_argument("--base", type=Path, metavar="SQLITE", help="Enregistre aussi les résultats dans une base SQLite")
+    parser.add_argument("--journal", type=Path, default=DOSSIER_JOURNAL_DEFAUT, metavar="DOSSIER",
+                        help="Journal des résultats par fichier (défaut : %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="Reprend du journal les PDFs déjà réussis")
+    parser.add_argument("--budget", type=float, default=BUDGET_TEMPS_FICHIER, metavar="SECONDES",
+                        help="Temps alloué à chaque PDF (défaut : %(default)s, 0 : pas de limite)")
+    parser.add_argument("--budget-section", type=float, default=BUDGET_TEMPS_SECTION, metavar="SECONDES",
+                        help="Temps alloué à chaque section (défaut : %(default)s, 0 : pas de limite)")
+    parser.add_argument("--intervalle", type=float, default=INTERVALLE_RAPPORT,
+                        help="Secondes entre deux lignes d'avancement (défaut : %(default)s)")
+    args = parser.parse_args(argv)
+
+    fichiers_pdf = args.pdfs or sorted(Path("liasses").glob("*.pdf"))
+    if args.annee and len(args.annee) != len(fichiers_pdf):
+        parser.error("--annee doit être donné pour chaque PDF")
+
+    taches = []
+    for idx, chemin_pdf in enumerate(fichiers_pdf):
+        correspondance = MOTIF_ANNEE.search(chemin_pdf.stem)
+        annee = args.annee[idx] if args.annee else (correspondance.group(1) if correspondance else None)
+        if annee is None:
+            print(f"⚠️ {chemin_pdf.name} ignoré : année introuvable dans le nom (utiliser --annee)")
+            continue
+        taches.append((chemin_pdf, args.entreprise or chemin_pdf.resolve().parent.name, str(annee)))
+    if not taches:
+        parser.error("aucun PDF à extraire")
+
+    print(f"🚀 Pipeline : {len(taches)} fichier(s), {args.processus} worker(s) d'analyse")
+    donnees_par_entreprise, bilans = executer_pipeline(
+        taches, args.processus, args.taille_files, args.csv, args.journal, args.resume,
+        args.budget, args.budget_section, args.intervalle
+    )
+    afficher_bilan(bilans)
+    print(f"📥 Lignes extraites : {args.csv}")
+
+    if not donnees_par_entreprise:
+        print("\n❌ Aucune donnée n'a pu être extraite.\n")
+        return
+
+    for donnees_par_annee in donnees_par_entreprise.values():
+        fusionner_exercices_precedents(donnees_par_annee)
+    if len(donnees_par_entreprise) == 1:
+        creer_fichier_excel(next(iter(donnees_par_entreprise.values())), args.excel)
+    else:
+        creer_fichier_portefeuille(donnees_par_entreprise, args.excel)
+    print(f"📥 Fichier généré : {args.excel}")
+
+    if args.base:
+        from base_resultats import enregistrer_portefeuille, ouvrir_base
+        with ouvrir_base(args.base) as conn:
+            nb_lignes = enregistrer_portefeuille(conn, donnees_par_entreprise)
+        print(f"💾 {nb_lignes} ligne(s) enregistrée(s) dans {args.base}")
+
+
+if __name__ == "__main__":
+    main()
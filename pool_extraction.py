@@ -0,0 +1,151 @@
+"""Pool d'extraction préchauffé, partagé entre sessions avec une répartition équitable.
+
+Les workers importent pdfplumber dès leur création (et héritent des tables de codes
+compilées), si bien que la première extraction d'une session ne paie ni le démarrage
+d'un interpréteur ni les imports. Les travaux ne sont confiés aux workers qu'au fur et à
+mesure qu'ils se libèrent, en servant les sessions à tour de rôle : un lot de 50 fichiers
+n'empêche pas le fichier d'un autre utilisateur de passer au tour suivant.
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from main import prechauffer_processus
+
+NB_WORKERS_DEFAUT = max(1, (os.cpu_count() or 2) - 1)
+
+
+class PoolExtraction:
+    """Pool de processus préchauffé, avec une file d'attente par session servie en tourniquet.
+
+    Args:
+        nb_workers: Nombre de processus d'extraction
+        max_en_attente_par_session: Travaux en attente acceptés par session (None : pas de limite)
+    """
+
+    def __init__(self, nb_workers=NB_WORKERS_DEFAUT, max_en_attente_par_session=None):
+        self.nb_workers = nb_workers
+        self.max_en_attente_par_session = max_en_attente_par_session
+        # Réentrant : arrêter un exécuteur annule ses travaux, dont les rappels reprennent le verrou
+        self._verrou = threading.RLock()
+        self._files = {}              # {session: deque de (ticket, fonction, args, kwargs)}
+        self._tour = deque()          # Ordre de passage des sessions qui ont des travaux en attente
+        self._en_cours = {}           # {session: nombre de travaux confiés aux workers}
+        self._nb_en_cours = 0
+        self._ferme = False
+        self._pool = self._demarrer_pool()
+
+    def _demarrer_pool(self):
+        """Crée l'exécuteur et démarre tous ses workers maintenant plutôt qu'au premier clic."""
+        pool = ProcessPoolExecutor(max_workers=self.nb_workers, initializer=prechauffer_processus)
+        for _ in range(self.nb_workers):
+            pool.submit(os.getpid)
+        return pool
+
+    def _remplacer_pool(self, pool_casse):
+        """Remplace l'exécuteur cassé (worker tué) ; sans effet s'il a déjà été remplacé. Appelé sous le verrou."""
+        if self._pool is not pool_casse or self._ferme:
+            return
+        print("⚠️ Un worker d'extraction s'est arrêté brutalement : pool recréé")
+        pool_casse.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._demarrer_pool()
+
+    def soumettre(self, session, fonction, *args, **kwargs):
+        """Met un travail dans la file de la session.
+
+        Returns:
+            Future: Résultat du travail (annulable tant qu'il n'a pas été confié à un worker)
+
+        Raises:
+            RuntimeError: Si le pool est fermé ou si la file de la session est pleine
+        """
+        ticket = Future()
+        with self._verrou:
+            if self._ferme:
+                raise RuntimeError("Pool d'extraction fermé")
+            file = self._files.setdefault(session, deque())
+            if self.max_en_attente_par_session is not None and len(file) >= self.max_en_attente_par_session:
+                raise RuntimeError(f"Trop de fichiers en attente pour cette session ({len(file)})")
+            file.append((ticket, fonction, args, kwargs))
+            if session not in self._tour:
+                self._tour.append(session)
+        self._distribuer()
+        return ticket
+
+    def _distribuer(self):
+        """Confie des travaux aux workers libres, une session après l'autre."""
+        with self._verrou:
+            while self._nb_en_cours < self.nb_workers and self._tour:
+                session = self._tour.popleft()
+                ticket, fonction, args, kwargs = self._files[session].popleft()
+                if self._files[session]:
+                    self._tour.append(session)
+                else:
+                    del self._files[session]
+
+                # Un travail annulé pendant son attente est simplement abandonné
+                if not ticket.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    future = self._confier(fonction, args, kwargs)
+                except Exception as e:
+                    # Pool fermé ou recréation impossible : le ticket échoue, la place reste libre
+                    ticket.set_exception(e)
+                    continue
+
+                self._nb_en_cours += 1
+                self._en_cours[session] = self._en_cours.get(session, 0) + 1
+                future.add_done_callback(lambda future, ticket=ticket, session=session, pool=self._pool:
+                                         self._terminer(future, ticket, session, pool))
+
+    def _confier(self, fonction, args, kwargs):
+        """Soumet un travail à l'exécuteur, en le recréant une fois s'il est cassé. Appelé sous le verrou."""
+        try:
+            return self._pool.submit(fonction, *args, **kwargs)
+        except BrokenProcessPool:
+            self._remplacer_pool(self._pool)
+            return self._pool.submit(fonction, *args, **kwargs)
+
+    def _terminer(self, future, ticket, session, pool):
+        """Transmet le résultat au ticket de la session et libère la place du worker."""
+        # Un travail annulé par l'arrêt de l'exécuteur (fermeture, pool recréé) n'a pas d'exception à lire
+        exception = CancelledError() if future.cancelled() else future.exception()
+        if exception is None:
+            ticket.set_result(future.result())
+        else:
+            ticket.set_exception(exception)
+
+        with self._verrou:
+            if isinstance(exception, BrokenProcessPool):
+                self._remplacer_pool(pool)
+            self._nb_en_cours -= 1
+            self._en_cours[session] -= 1
+            if not self._en_cours[session]:
+                del self._en_cours[session]
+        # Hors du verrou : un worker venant de se libérer ne doit pas attendre le thread du pool
+        threading.Thread(target=self._distribuer, daemon=True).start()
+
+    def instantane(self):
+        """Occupation du pool : {'workers', 'en_cours', 'en_attente': {session: nombre}, 'en_cours_par_session'}."""
+        with self._verrou:
+            return {
+                'workers': self.nb_workers,
+                'en_cours': self._nb_en_cours,
+                'en_attente': {session: len(file) for session, file in self._files.items()},
+                'en_cours_par_session': dict(self._en_cours),
+            }
+
+    def fermer(self):
+        """Annule les travaux en attente et arrête les workers (sans attendre les travaux en cours)."""
+        with self._verrou:
+            self._ferme = True
+            for file in self._files.values():
+                for ticket, *_ in file:
+                    ticket.cancel()
+            self._files.clear()
+            self._tour.clear()
+            pool = self._pool
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,343 @@
+"""Service HTTP local d'extraction de liasses fiscales.
+
+Expose l'extraction (extraire_un_pdf), calculer_ratios_financiers et creer_fichier_excel à d'autres
+applications, sans dépendance autre que la bibliothèque standard (fonctionne hors ligne).
+
+Points d'accès :
+    GET  /sante                       → état du service
+    GET  /metriques                   → compteurs (requêtes, rejets, durées, file d'attente)
+    POST /extraire?annee=2024         → corps = PDF brut, réponse JSON
+    POST /lot?format=json|xlsx        → multipart/form-data, un fichier par champ nommé par l'année
+
+Exemples :
+    curl --data-binary @liasse.pdf -H "Content-Type: application/pdf" "http://localhost:8000/extraire?annee=2024"
+    curl -F 2023=@liasse_2023.pdf -F 2024=@liasse_2024.pdf "http://localhost:8000/lot?format=xlsx" -o extraction.xlsx
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from email import policy
+from email.parser import BytesParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from main import extraire_contenu_pdf, calculer_ratios_financiers, creer_fichier_excel, fusionner_exercices_precedents
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+NB_WORKERS_DEFAUT = max(1, (os.cpu_count() or 2) - 1)
+TAILLE_FILE_DEFAUT = 8                       # Fichiers en attente acceptés au-delà des workers
+TAILLE_MAX_REQUETE = 50 * 1024 * 1024        # 50 Mo par requête
+DELAI_MAX_EXTRACTION = 300                   # Secondes par fichier
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# ============================================
+# ÉTAT DU SERVICE
+# ============================================
+
+class EtatService:
+    """Pool de processus, capacité de la file et métriques partagées entre les requêtes."""
+
+    def __init__(self, nb_workers, taille_file):
+        self.pool = ProcessPoolExecutor(max_workers=nb_workers)
+        self.nb_workers = nb_workers
+        self.capacite = nb_workers + taille_file
+        self.demarrage = time.time()
+        self._verrou = threading.Lock()
+        self.en_cours = 0
+        self.metriques = {
+            'requetes': 0,
+            'rejets_429': 0,
+            'rejets_413': 0,
+            'fichiers_reussis': 0,
+            'fichiers_echoues': 0,
+            'duree_totale_s': 0.0,
+        }
+
+    def reserver(self, nb_fichiers, nouvelle_requete=True):
+        """Réserve des places dans la file ; False si la capacité est atteinte (→ 429).
+
+        Args:
+            nb_fichiers: Places demandées
+            nouvelle_requete: False pour compléter la réservation d'une requête déjà comptée
+        """
+        with self._verrou:
+            if nouvelle_requete:
+                self.metriques['requetes'] += 1
+            if self.en_cours + nb_fichiers > self.capacite:
+                self.metriques['rejets_429'] += 1
+                return False
+            self.en_cours += nb_fichiers
+            return True
+
+    def liberer(self, nb_fichiers):
+        with self._verrou:
+            self.en_cours -= nb_fichiers
+
+    def rejeter_trop_gros(self):
+        with self._verrou:
+            self.metriques['rejets_413'] += 1
+
+    def extraire(self, fichiers):
+        """Soumet les fichiers au pool et attend les résultats.
+
+        Prend en charge les places réservées (une par fichier) : chacune est rendue quand son
+        worker a réellement fini, ou quand le fichier est retiré de la file. Un fichier abandonné
+        au-delà de DELAI_MAX_EXTRACTION garde donc sa place tant que le worker travaille encore.
+
+        Args:
+            fichiers: Liste de tuples (annee, nom_fichier, contenu_pdf)
+
+        Returns:
+            dict: {annee: resultats ou None}
+        """
+        debut = time.time()
+        futures = {}
+        try:
+            for annee, nom, contenu in fichiers:
+                future = self.pool.submit(extraire_contenu_pdf, contenu, nom)
+                future.add_done_callback(lambda _: self.liberer(1))
+                futures[annee] = future
+        except BaseException:
+            self.liberer(len(fichiers) - len(futures))
+            raise
+
+        resultats = {}
+        for annee, future in futures.items():
+            try:
+                resultats[annee] = future.result(timeout=DELAI_MAX_EXTRACTION)
+            except TimeoutError:
+                # Retiré de la file s'il n'a pas commencé ; sinon la place est rendue à la fin du worker
+                future.cancel()
+                print(f"❌ Délai dépassé pour l'année {annee} ({DELAI_MAX_EXTRACTION} s)")
+                resultats[annee] = None
+            except Exception as e:
+                print(f"❌ Erreur lors du traitement de l'année {annee} : {e}")
+                resultats[annee] = None
+
+        with self._verrou:
+            self.metriques['duree_totale_s'] += time.time() - debut
+            self.metriques['fichiers_reussis'] += sum(1 for r in resultats.values() if r)
+            self.metriques['fichiers_echoues'] += sum(1 for r in resultats.values() if not r)
+        return resultats
+
+    def instantane(self):
+        with self._verrou:
+            metriques = dict(self.metriques)
+            metriques['en_cours'] = self.en_cours
+        nb_fichiers = metriques['fichiers_reussis'] + metriques['fichiers_echoues']
+        metriques['duree_moyenne_s'] = metriques['duree_totale_s'] / nb_fichiers if nb_fichiers else 0
+        metriques['capacite'] = self.capacite
+        metriques['workers'] = self.nb_workers
+        metriques['uptime_s'] = time.time() - self.demarrage
+        return metriques
+
+
+# ============================================
+# GESTIONNAIRE HTTP
+# ============================================
+
+class GestionnaireExtraction(BaseHTTPRequestHandler):
+    """Routes HTTP du service (l'état partagé est porté par le serveur)."""
+
+    server_version = "ExtractionLiasse/2.0"
+
+    # --- Réponses ---
+
+    def _repondre_json(self, statut, contenu, entetes=None):
+        corps = json.dumps(contenu, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _repondre_erreur(self, statut, message, entetes=None):
+        self._repondre_json(statut, {'erreur': message}, entetes)
+
+    def _repondre_occupe(self):
+        self._repondre_erreur(HTTPStatus.TOO_MANY_REQUESTS, "Service saturé, réessayez plus tard",
+                              {"Retry-After": "5"})
+
+    # --- Lecture de la requête ---
+
+    def _reserver_et_lire_corps(self):
+        """Réserve une place puis lit le corps : un service saturé refuse la requête sans lire les PDFs.
+
+        Returns:
+            bytes: Corps de la requête (une place réservée), ou None (réponse d'erreur envoyée, rien de réservé)
+        """
+        etat = self.server.etat
+        if not etat.reserver(1):
+            self._repondre_occupe()
+            return None
+        corps = self._lire_corps()
+        if corps is None:
+            etat.liberer(1)
+        return corps
+
+    def _lire_corps(self):
+        taille = int(self.headers.get("Content-Length") or 0)
+        if taille <= 0:
+            self._repondre_erreur(HTTPStatus.LENGTH_REQUIRED, "Corps de requête vide")
+            return None
+        if taille > TAILLE_MAX_REQUETE:
+            self._repondre_erreur(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                  f"Requête trop volumineuse (max {TAILLE_MAX_REQUETE // (1024 * 1024)} Mo)")
+            return None
+        return self.rfile.read(taille)
+
+    def _lire_multipart(self, corps):
+        """Découpe un corps multipart/form-data en liste de (annee, nom_fichier, contenu)."""
+        entete = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("latin-1")
+        message = BytesParser(policy=policy.HTTP).parsebytes(entete + corps)
+        fichiers = []
+        for partie in message.iter_parts():
+            annee = partie.get_param("name", header="content-disposition")
+            nom_fichier = partie.get_filename()
+            if annee and nom_fichier:
+                fichiers.append((str(annee).strip(), nom_fichier, partie.get_payload(decode=True)))
+        return fichiers
+
+    # --- Routes ---
+
+    def do_GET(self):
+        chemin = urlparse(self.path).path
+        if chemin == "/sante":
+            self._repondre_json(HTTPStatus.OK, {'statut': 'ok', 'workers': self.server.etat.nb_workers})
+        elif chemin == "/metriques":
+            self._repondre_json(HTTPStatus.OK, self.server.etat.instantane())
+        else:
+            self._repondre_erreur(HTTPStatus.NOT_FOUND, f"Route inconnue : {chemin}")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parametres = parse_qs(url.query)
+        if url.path == "/extraire":
+            self._traiter_extraction(parametres)
+        elif url.path == "/lot":
+            self._traiter_lot(parametres)
+        else:
+            self._repondre_erreur(HTTPStatus.NOT_FOUND, f"Route inconnue : {url.path}")
+
+    def _traiter_extraction(self, parametres):
+        annee = parametres.get("annee", ["N"])[0]
+        corps = self._reserver_et_lire_corps()
+        if corps is None:
+            return
+        resultats = self.server.etat.extraire([(annee, f"{annee}.pdf", corps)])
+
+        donnees = resultats.get(annee)
+        if not donnees:
+            self._repondre_erreur(HTTPStatus.UNPROCESSABLE_ENTITY, "Échec de l'extraction")
+            return
+        ratios = calculer_ratios_financiers({annee: donnees})
+        self._repondre_json(HTTPStatus.OK, {'annee': annee, 'donnees': donnees, 'ratios': ratios[annee]})
+
+    def _traiter_lot(self, parametres):
+        format_sortie = parametres.get("format", ["json"])[0]
+        if format_sortie not in ("json", "xlsx"):
+            self._repondre_erreur(HTTPStatus.BAD_REQUEST, "format attendu : json ou xlsx")
+            return
+        corps = self._reserver_et_lire_corps()
+        if corps is None:
+            return
+
+        etat = self.server.etat
+        fichiers = self._lire_multipart(corps)
+        doublons = sorted(annee for annee, nombre in Counter(annee for annee, _, _ in fichiers).items() if nombre > 1)
+        if not fichiers:
+            etat.liberer(1)
+            self._repondre_erreur(HTTPStatus.BAD_REQUEST,
+                                  "Aucun fichier reçu (un champ par fichier, nommé par l'année)")
+            return
+        if doublons:
+            etat.liberer(1)
+            self._repondre_erreur(HTTPStatus.BAD_REQUEST, f"Plusieurs fichiers pour l'année : {', '.join(doublons)}")
+            return
+        if len(fichiers) > etat.capacite:
+            # Un lot plus grand que la capacité ne passerait jamais : inutile de le faire réessayer
+            etat.liberer(1)
+            etat.rejeter_trop_gros()
+            self._repondre_erreur(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                  f"Lot trop grand : {len(fichiers)} fichiers pour une capacité de {etat.capacite}")
+            return
+        if not etat.reserver(len(fichiers) - 1, nouvelle_requete=False):
+            etat.liberer(1)
+            self._repondre_occupe()
+            return
+        resultats = etat.extraire(fichiers)
+
+        donnees_par_annee = {annee: donnees for annee, donnees in resultats.items() if donnees}
+        echecs = sorted(annee for annee, donnees in resultats.items() if not donnees)
+        if not donnees_par_annee:
+            self._repondre_erreur(HTTPStatus.UNPROCESSABLE_ENTITY, "Aucun fichier n'a pu être extrait")
+            return
+        conflits = fusionner_exercices_precedents(donnees_par_annee)
+
+        if format_sortie == "json":
+            self._repondre_json(HTTPStatus.OK, {
+                'donnees': donnees_par_annee,
+                'ratios': calculer_ratios_financiers(donnees_par_annee),
+                'echecs': echecs,
+                'conflits_n_1': conflits,
+            })
+            return
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            nom_excel = Path(temp_dir) / "extraction_multi_annees.xlsx"
+            creer_fichier_excel(donnees_par_annee, nom_excel)
+            contenu = nom_excel.read_bytes()
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", MIME_XLSX)
+        self.send_header("Content-Disposition", 'attachment; filename="extraction_multi_annees.xlsx"')
+        self.send_header("Content-Length", str(len(contenu)))
+        if echecs:
+            self.send_header("X-Annees-En-Echec", ",".join(echecs))
+        self.end_headers()
+        self.wfile.write(contenu)
+
+
+def creer_serveur(hote, port, nb_workers=NB_WORKERS_DEFAUT, taille_file=TAILLE_FILE_DEFAUT):
+    """Crée le serveur HTTP et son pool de workers (sans le démarrer)."""
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireExtraction)
+    serveur.etat = EtatService(nb_workers, taille_file)
+    return serveur
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP local d'extraction de liasses fiscales")
+    parser.add_argument("--hote", default="127.0.0.1", help="Adresse d'écoute (défaut : 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port d'écoute (défaut : 8000)")
+    parser.add_argument("--workers", type=int, default=NB_WORKERS_DEFAUT, help="Nombre de processus d'extraction")
+    parser.add_argument("--file", type=int, default=TAILLE_FILE_DEFAUT,
+                        help="Fichiers acceptés en attente au-delà des workers avant de répondre 429")
+    args = parser.parse_args(argv)
+
+    serveur = creer_serveur(args.hote, args.port, args.workers, args.file)
+    print(f"🚀 Service d'extraction sur http://{args.hote}:{args.port} "
+          f"({args.workers} worker(s), capacité {serveur.etat.capacite} fichier(s))")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt du service")
+    finally:
+        serveur.server_close()
+        serveur.etat.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Surveillance du dossier des liasses : extraction au fil de l'eau des PDFs déposés.
+
+Les PDFs nouveaux ou modifiés sont extraits dès que leur écriture est terminée, par un pool
+de processus, puis ajoutés au fichier Excel (et à la base SQLite si demandée) sans retraiter
+les fichiers déjà connus. Le dossier est suivi par inotify (module watchdog s'il est installé)
+avec une re-scrutation périodique, utile sur les partages réseau qui ne remontent pas les
+événements ; sans watchdog, il est simplement scruté.
+
+L'année d'un fichier est lue dans son nom (ex: liasse_2024.pdf) ; à défaut, la première
+année libre à partir de 2023 lui est attribuée, comme dans main(). Un fichier dont l'année
+appartient déjà à un autre fichier n'est pas extrait (il écraserait cette année dans
+l'Excel) : il est signalé et laissé à un opérateur, qui le renomme ou retire l'autre.
+
+Exemple :
+    python surveillance.py --dossier liasses --excel resultats/extraction_multi_annees.xlsx --port 8001
+    curl http://localhost:8001/metriques
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from main import extraire_un_pdf_isole, ajouter_resultats_excel, empreinte_fichier
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+NB_WORKERS_DEFAUT = max(1, (os.cpu_count() or 2) - 1)
+INTERVALLE_SCRUTATION = 2.0        # Secondes entre deux scrutations (sans inotify)
+INTERVALLE_RESCRUTATION = 60.0     # Secondes entre deux scrutations de sécurité (avec inotify)
+DELAI_STABILITE = 3.0              # Taille et date inchangées pendant ce délai → écriture terminée
+DELAI_REESSAI_ECRITURE = 10.0      # Secondes avant de réessayer d'écrire un Excel verrouillé ou une base indisponible
+FENETRE_DEBIT = 600                # Secondes prises en compte pour le débit
+CHEMIN_INDEX_DEFAUT = Path("resultats") / "surveillance.json"
+MOTIF_ANNEE = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+
+# ============================================
+# INDEX DES FICHIERS TRAITÉS
+# ============================================
+
+class IndexTraitements:
+    """Empreinte et année de chaque fichier déjà intégré, conservées entre deux démarrages."""
+
+    def __init__(self, chemin):
+        self.chemin = Path(chemin)
+        self.fichiers = json.loads(self.chemin.read_text(encoding="utf-8")) if self.chemin.exists() else {}
+
+    def est_a_jour(self, nom, sha256):
+        return self.fichiers.get(nom, {}).get('sha256') == sha256
+
+    def annee(self, nom):
+        """Année attribuée au fichier : déjà connue, lue dans le nom, sinon première année libre."""
+        if nom in self.fichiers:
+            return self.fichiers[nom]['annee']
+        correspondance = MOTIF_ANNEE.search(nom)
+        if correspondance:
+            return correspondance.group(1)
+        annees_prises = {infos['annee'] for infos in self.fichiers.values()}
+        annee = 2023
+        while str(annee) in annees_prises:
+            annee += 1
+        print(f"⚠️ Pas d'année dans le nom de {nom}, année {annee} attribuée")
+        return str(annee)
+
+    def proprietaire(self, annee, nom):
+        """Autre fichier à qui l'année est déjà attribuée, ou None."""
+        for autre, infos in self.fichiers.items():
+            if autre != nom and infos['annee'] == annee and infos['statut'] != 'conflit_annee':
+                return autre
+        return None
+
+    def enregistrer(self, nom, sha256, annee, statut):
+        self.fichiers[nom] = {'sha256': sha256, 'annee': annee, 'statut': statut,
+                              'date': time.strftime("%Y-%m-%d %H:%M:%S")}
+
+    def sauvegarder(self):
+        """Écriture atomique (fichier temporaire puis renommage)."""
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = self.chemin.with_suffix(".tmp")
+        temporaire.write_text(json.dumps(self.fichiers, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(temporaire, self.chemin)
+
+
+# ============================================
+# SURVEILLANCE
+# ============================================
+
+class _GestionnaireEvenements(FileSystemEventHandler):
+    """Transmet les créations, modifications et déplacements de PDFs à la surveillance."""
+
+    def __init__(self, surveillance):
+        self.surveillance = surveillance
+
+    def on_created(self, event):
+        self.surveillance.signaler(event.src_path)
+
+    def on_modified(self, event):
+        self.surveillance.signaler(event.src_path)
+
+    def on_moved(self, event):
+        self.surveillance.signaler(event.dest_path)
+
+
+class Surveillance:
+    """Détecte les PDFs déposés, attend la fin de leur écriture et les extrait par lots."""
+
+    def __init__(self, dossier, nom_excel, chemin_base=None, entreprise=None,
+                 nb_workers=NB_WORKERS_DEFAUT, chemin_index=CHEMIN_INDEX_DEFAUT):
+        self.dossier = Path(dossier)
+        self.nom_excel = Path(nom_excel)
+        self.chemin_base = chemin_base
+        self.entreprise = entreprise
+        self.pool = ProcessPoolExecutor(max_workers=nb_workers)
+        self.nb_workers = nb_workers
+        self.index = IndexTraitements(chemin_index)
+        self.mode = 'inotify' if Observer else 'scrutation'
+        self.demarrage = time.time()
+        self.derniere_scrutation = 0.0
+
+        self._verrou = threading.Lock()
+        self.observes = {}          # {chemin: (taille, date de modification, stable depuis)}
+        self.en_cours = {}          # {future: (chemin, sha256, date de modification, annee, debut)}
+        self.a_ecrire = {}          # {annee: (chemin, sha256, date de modification, resultats)} pas encore écrits
+        self.prochaine_ecriture = 0.0
+        self.fins = deque()         # Horodatages des fichiers terminés (débit)
+        self.metriques = {
+            'detectes': 0,
+            'inchanges': 0,
+            'reussis': 0,
+            'echoues': 0,
+            'conflits_annee': 0,
+            'duree_totale_s': 0.0,
+            'ecritures_excel': 0,
+            'echecs_ecriture': 0,
+        }
+
+    # --- Détection ---
+
+    def signaler(self, chemin):
+        """Note qu'un fichier a été créé ou modifié (appelé depuis le thread de watchdog)."""
+        chemin = Path(chemin)
+        if chemin.suffix.lower() != ".pdf" or chemin.parent != self.dossier:
+            return
+        with self._verrou:
+            if chemin not in self.observes:
+                self.metriques['detectes'] += 1
+            # La stabilité repart de zéro à chaque modification
+            self.observes[chemin] = (None, None, time.time())
+
+    def scruter(self):
+        """Parcourt le dossier et signale les PDFs dont la taille ou la date a changé."""
+        self.derniere_scrutation = time.time()
+        en_cours = {infos[0] for infos in self.en_cours.values()} | {infos[0] for infos in self.a_ecrire.values()}
+        for chemin in self.dossier.glob("*.pdf"):
+            with self._verrou:
+                suivi = chemin in self.observes
+            if not suivi and chemin not in en_cours and not self._deja_integre(chemin):
+                self.signaler(chemin)
+
+    def _deja_integre(self, chemin):
+        """Vrai si le fichier n'a pas changé depuis son dernier traitement (date comparée avant l'empreinte)."""
+        infos = self.index.fichiers.get(chemin.name)
+        if not infos:
+            return False
+        try:
+            if infos.get('mtime') == chemin.stat().st_mtime:
+                return True
+        except FileNotFoundError:
+            return True
+        return self.index.est_a_jour(chemin.name, empreinte_fichier(chemin))
+
+    def _fichiers_prets(self):
+        """Fichiers dont la taille et la date n'ont pas bougé depuis DELAI_STABILITE secondes."""
+        maintenant = time.time()
+        prets = []
+        with self._verrou:
+            for chemin, (taille, date, depuis) in list(self.observes.items()):
+                try:
+                    etat = chemin.stat()
+                except FileNotFoundError:
+                    del self.observes[chemin]
+                    continue
+                if (etat.st_size, etat.st_mtime) != (taille, date):
+                    self.observes[chemin] = (etat.st_size, etat.st_mtime, maintenant)
+                elif etat.st_size and maintenant - depuis >= DELAI_STABILITE:
+                    del self.observes[chemin]
+                    prets.append(chemin)
+        return prets
+
+    # --- Traitement ---
+
+    def _soumettre(self, chemin):
+        try:
+            sha256 = empreinte_fichier(chemin)
+            mtime = chemin.stat().st_mtime
+        except FileNotFoundError:
+            return
+        deja_vus = {infos[:2] for infos in self.en_cours.values()} | {infos[:2] for infos in self.a_ecrire.values()}
+        if self.index.est_a_jour(chemin.name, sha256) or (chemin, sha256) in deja_vus:
+            self.metriques['inchanges'] += 1
+            if chemin.name in self.index.fichiers:
+                self.index.fichiers[chemin.name]['mtime'] = mtime
+            return
+        annee = self.index.annee(chemin.name)
+        proprietaire = self.index.proprietaire(annee, chemin.name)
+        if proprietaire:
+            # Laissé de côté jusqu'à sa prochaine modification (empreinte et date enregistrées)
+            print(f"⚠️ {chemin.name} ignoré : l'année {annee} appartient déjà à {proprietaire} "
+                  f"(renommer l'un des deux fichiers)")
+            self.metriques['conflits_annee'] += 1
+            self.index.enregistrer(chemin.name, sha256, annee, 'conflit_annee')
+            self.index.fichiers[chemin.name]['mtime'] = mtime
+            self.index.sauvegarder()
+            return
+        # Réserver l'année tout de suite : deux fichiers sans année ne doivent pas recevoir la même
+        self.index.enregistrer(chemin.name, None, annee, 'en_cours')
+        print(f"📥 {chemin.name} → année {annee} : extraction lancée")
+        future = self.pool.submit(extraire_un_pdf_isole, chemin)
+        self.en_cours[future] = (chemin, sha256, mtime, annee, time.time())
+
+    def _collecter(self):
+        """Intègre en une seule écriture les extractions terminées depuis le dernier tour."""
+        termines = [future for future in self.en_cours if future.done()]
+        reessai = self.a_ecrire and time.time() >= self.prochaine_ecriture
+        if not termines and not reessai:
+            return
+
+        for future in termines:
+            chemin, sha256, mtime, annee, debut = self.en_cours.pop(future)
+            try:
+                resultats = future.result()
+            except Exception as e:
+                print(f"❌ Erreur lors du traitement de {chemin.name} : {e}")
+                resultats = None
+
+            with self._verrou:
+                self.metriques['duree_totale_s'] += time.time() - debut
+                self.fins.append(time.time())
+            if resultats:
+                self.a_ecrire[annee] = (chemin, sha256, mtime, resultats)
+                self.metriques['reussis'] += 1
+            else:
+                self.metriques['echoues'] += 1
+                self.index.enregistrer(chemin.name, sha256, annee, 'echoue')
+                self.index.fichiers[chemin.name]['mtime'] = mtime
+
+        if self.a_ecrire:
+            self._ecrire()
+        self.index.sauvegarder()
+
+        metriques = self.instantane()
+        print(f"📊 {metriques['reussis']} réussi(s), {metriques['echoues']} échec(s), "
+              f"{metriques['en_attente']} en attente, {metriques['debit_par_minute']:.1f} fichier(s)/min")
+
+    def _ecrire(self):
+        """Ajoute les années en attente à l'Excel (et à la base) ; en cas d'échec, elles restent en attente.
+
+        Un classeur ouvert ou verrouillé, ou une base indisponible, ne doit ni arrêter la
+        surveillance ni perdre les résultats : l'écriture est réessayée après DELAI_REESSAI_ECRITURE.
+        Tant qu'un fichier n'est pas écrit, l'index ne le marque pas comme intégré (il est
+        ré-extrait au prochain démarrage si le processus s'arrête entre-temps).
+        """
+        try:
+            donnees_par_annee = ajouter_resultats_excel(
+                self.nom_excel, {annee: infos[3] for annee, infos in self.a_ecrire.items()})
+            if donnees_par_annee and self.chemin_base:
+                from base_resultats import ouvrir_base, enregistrer_resultats
+                with ouvrir_base(self.chemin_base) as conn:
+                    enregistrer_resultats(conn, self.entreprise, donnees_par_annee)
+        except Exception as e:
+            self.metriques['echecs_ecriture'] += 1
+            self.prochaine_ecriture = time.time() + DELAI_REESSAI_ECRITURE
+            print(f"❌ Écriture impossible ({type(e).__name__} : {e}) : {len(self.a_ecrire)} année(s) "
+                  f"réessayée(s) dans {DELAI_REESSAI_ECRITURE:.0f} s")
+            for annee, (chemin, _, _, _) in self.a_ecrire.items():
+                self.index.enregistrer(chemin.name, None, annee, 'ecriture_en_attente')
+            return
+
+        self.metriques['ecritures_excel'] += 1
+        for annee, (chemin, sha256, mtime, _) in self.a_ecrire.items():
+            self.index.enregistrer(chemin.name, sha256, annee, 'reussi')
+            self.index.fichiers[chemin.name]['mtime'] = mtime
+        self.a_ecrire.clear()
+
+    def tour(self):
+        """Une itération : scrutation si nécessaire, soumission des fichiers stables, collecte."""
+        intervalle = INTERVALLE_RESCRUTATION if self.mode == 'inotify' else INTERVALLE_SCRUTATION
+        if time.time() - self.derniere_scrutation >= intervalle:
+            self.scruter()
+        for chemin in self._fichiers_prets():
+            self._soumettre(chemin)
+        self._collecter()
+
+    def executer(self):
+        """Boucle principale (jusqu'à Ctrl+C)."""
+        observateur = None
+        if Observer:
+            observateur = Observer()
+            observateur.schedule(_GestionnaireEvenements(self), str(self.dossier), recursive=False)
+            observateur.start()
+        print(f"👀 Surveillance de '{self.dossier}' ({self.mode}, {self.nb_workers} worker(s)) → {self.nom_excel}")
+
+        try:
+            while True:
+                self.tour()
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("\n🛑 Arrêt de la surveillance")
+        finally:
+            if observateur:
+                observateur.stop()
+                observateur.join()
+            self.pool.shutdown(cancel_futures=True)
+            self.index.sauvegarder()
+
+    # --- Métriques ---
+
+    def instantane(self):
+        """Compteurs de la surveillance (appelé par la boucle principale et par le thread des métriques)."""
+        maintenant = time.time()
+        duree_observee = min(FENETRE_DEBIT, maintenant - self.demarrage) or 1
+
+        with self._verrou:
+            while self.fins and maintenant - self.fins[0] > FENETRE_DEBIT:
+                self.fins.popleft()
+            nb_fins = len(self.fins)
+            metriques = dict(self.metriques)
+            metriques['en_attente'] = len(self.observes)
+        metriques['en_cours'] = len(self.en_cours)
+        metriques['a_ecrire'] = len(self.a_ecrire)
+        nb_fichiers = metriques['reussis'] + metriques['echoues']
+        metriques['duree_moyenne_s'] = metriques['duree_totale_s'] / nb_fichiers if nb_fichiers else 0
+        metriques['debit_par_minute'] = nb_fins * 60 / duree_observee
+        metriques['mode'] = self.mode
+        metriques['workers'] = self.nb_workers
+        metriques['uptime_s'] = maintenant - self.demarrage
+        return metriques
+
+
+# ============================================
+# EXPOSITION DES MÉTRIQUES
+# ============================================
+
+class GestionnaireMetriques(BaseHTTPRequestHandler):
+    """GET /metriques → compteurs de la surveillance au format JSON."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metriques":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        corps = json.dumps(self.server.surveillance.instantane(), ensure_ascii=False).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def exposer_metriques(surveillance, hote, port):
+    """Démarre le serveur des métriques dans un thread (arrêté avec le processus)."""
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireMetriques)
+    serveur.surveillance = surveillance
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    print(f"📈 Métriques sur http://{hote}:{port}/metriques")
+    return serveur
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Surveillance d'un dossier de liasses fiscales")
+    parser.add_argument("--dossier", type=Path, default=Path("liasses"), help="Dossier surveillé (défaut : liasses)")
+    parser.add_argument("--excel", type=Path, default=Path("resultats") / "extraction_multi_annees.xlsx",
+                        help="Fichier Excel mis à jour à chaque lot")
+    parser.add_argument("--base", type=Path, metavar="SQLITE", help="Base SQLite mise à jour à chaque lot")
+    parser.add_argument("--entreprise", help="Identifiant de l'entreprise pour --base")
+    parser.add_argument("--workers", type=int, default=NB_WORKERS_DEFAUT, help="Nombre de processus d'extraction")
+    parser.add_argument("--index", type=Path, default=CHEMIN_INDEX_DEFAUT,
+                        help="Fichier mémorisant les PDFs déjà traités")
+    parser.add_argument("--hote", default="127.0.0.1", help="Adresse des métriques (défaut : 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Expose les métriques en HTTP sur ce port")
+    args = parser.parse_args(argv)
+
+    if args.base and not args.entreprise:
+        parser.error("--base nécessite --entreprise")
+
+    surveillance = Surveillance(args.dossier, args.excel, args.base, args.entreprise, args.workers, args.index)
+    if args.port:
+        exposer_metriques(surveillance, args.hote, args.port)
+    surveillance.executer()
+
+
+if __name__ == "__main__":
+    main()
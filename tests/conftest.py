@@ -0,0 +1,14 @@
+"""Configuration commune des tests : modules du projet importables et liasse d'exemple."""
+import sys
+from pathlib import Path
+
+import pytest
+
+RACINE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RACINE))
+
+
+@pytest.fixture
+def liasse_vierge():
+    """Liasse fiscale d'exemple livrée avec le projet (formulaires 2050 à 2059 non remplis)."""
+    return RACINE / "liasses" / "Liasse fiscale vierge.pdf"
@@ -0,0 +1,53 @@
+"""Base SQLite des résultats : écriture par entreprise et requêtes de portefeuille."""
+import pytest
+
+import base_resultats
+import main
+
+
+def _donnees(chiffre_affaires, capital):
+    return {
+        'actif': [],
+        'passif': [(main.CODES_BILAN_PASSIF['DA'], capital)],
+        'cr': [(main.CODES_COMPTE_RESULTAT['FL'], chiffre_affaires)],
+    }
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with base_resultats.ouvrir_base(tmp_path / "base" / "liasses.db") as conn:
+        base_resultats.enregistrer_portefeuille(conn, {
+            'alpha': {'2023': _donnees(1000.0, 50.0), '2024': _donnees(2000.0, 50.0)},
+            'beta': {'2024': _donnees(500.0, 10.0)},
+        })
+        yield conn
+
+
+def test_recherche_par_code_et_annee(conn):
+    assert base_resultats.rechercher_code(conn, "fl", ">", 600) == [('alpha', '2023', 1000.0), ('alpha', '2024', 2000.0)]
+    assert base_resultats.rechercher_code(conn, "FL", "<=", 1000, annee=2024) == [('beta', '2024', 500.0)]
+
+
+def test_operateur_refuse(conn):
+    with pytest.raises(ValueError):
+        base_resultats.rechercher_code(conn, "FL", "; DROP TABLE valeurs", 0)
+
+
+def test_reenregistrement_remplace_les_valeurs(conn):
+    base_resultats.enregistrer_resultats(conn, 'beta', {'2024': _donnees(800.0, 10.0)})
+
+    assert base_resultats.charger_entreprise(conn, 'beta') == {'2024': {'passif': {'DA': 10.0}, 'cr': {'FL': 800.0}}}
+
+
+def test_ratios_enregistres(conn):
+    nb_ratios = conn.execute("SELECT COUNT(*) FROM ratios WHERE entreprise = 'alpha' AND annee = '2024'").fetchone()[0]
+
+    assert nb_ratios == len(main.calculer_ratios_financiers({'2024': _donnees(2000.0, 50.0)})['2024'])
+
+
+def test_portefeuille_relu_au_format_d_extraction(conn):
+    portefeuille = dict(base_resultats.iterer_portefeuille(conn))
+
+    assert list(portefeuille) == ['alpha', 'beta']
+    assert portefeuille['alpha']['2023']['cr'] == [(main.CODES_COMPTE_RESULTAT['FL'], 1000.0)]
+    assert portefeuille['beta']['2024']['passif'] == [(main.CODES_BILAN_PASSIF['DA'], 10.0)]
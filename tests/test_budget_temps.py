@@ -0,0 +1,54 @@
+"""Budget de temps par fichier et par section : niveaux coûteux sautés une fois épuisé."""
+from types import SimpleNamespace
+
+import main
+
+EPUISE = 1e-9
+
+
+def test_budget_non_limite():
+    budget = main.BudgetTemps(None, None)
+    budget.commencer_section()
+
+    assert not budget.ignorer('cr', 'libelles')
+    assert budget.niveaux_ignores == []
+
+
+def test_niveau_ignore_note_une_seule_fois(capsys):
+    budget = main.BudgetTemps(EPUISE, None)
+
+    assert budget.ignorer('cr', 'libelles')
+    assert budget.ignorer('cr', 'libelles')
+    assert budget.niveaux_ignores == [{'etape': 'cr', 'niveau': 'libelles'}]
+    assert capsys.readouterr().out.count("Budget de temps épuisé") == 1
+
+
+def test_budget_de_section_repart_a_chaque_section():
+    budget = main.BudgetTemps(None, EPUISE)
+    assert not budget.epuise()
+
+    budget.commencer_section()
+    assert budget.epuise()
+
+    budget.duree_section = 60
+    budget.commencer_section()
+    assert not budget.epuise()
+
+
+def test_pas_de_balayage_complet_une_fois_epuise():
+    lectures = []
+    pages = [SimpleNamespace(extract_text=lambda index=index: lectures.append(index) or "Annexe") for index in range(5)]
+    budget = main.BudgetTemps(EPUISE, None)
+
+    assert main.trouver_page(SimpleNamespace(pages=pages), 'passif', None, budget=budget) == -1
+    assert lectures == []
+    assert budget.niveaux_ignores == [{'etape': 'passif', 'niveau': 'balayage_complet'}]
+
+
+def test_extraction_partielle_mais_bilan_extrait(liasse_vierge):
+    resultats = main.extraire_un_pdf(liasse_vierge, budget_fichier=EPUISE)
+
+    ignores = {(ignore['etape'], ignore['niveau']) for ignore in resultats['niveaux_ignores']}
+    assert ('cr_page1', 'tableau') in ignores
+    assert not {('actif', 'tableau'), ('passif', 'tableau')} & ignores
+    assert [libelle for libelle, _ in resultats['actif']] == list(main.CODES_BILAN_ACTIF.values())
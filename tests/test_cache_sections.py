@@ -0,0 +1,57 @@
+"""Cache des résultats par section, invalidé section par section quand la configuration change."""
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def statistiques():
+    main.statistiques_cache_sections(reinitialiser=True)
+    yield
+    main.statistiques_cache_sections(reinitialiser=True)
+
+
+def test_cache_identique_a_l_extraction_puis_relu(liasse_vierge, tmp_path, monkeypatch):
+    reference = main.extraire_un_pdf(liasse_vierge)
+    assert main.extraire_un_pdf(liasse_vierge, cache_sections=tmp_path) == reference
+
+    def analyser_interdit(*args, **kwargs):
+        raise AssertionError("PDF relu malgré le cache")
+
+    monkeypatch.setattr(main, 'analyser_pdf', analyser_interdit)
+    assert main.extraire_un_pdf(liasse_vierge, cache_sections=tmp_path) == reference
+    assert all(compteurs == {'trouvees': 1, 'calculees': 1} for compteurs in main.statistiques_cache_sections().values())
+
+
+def test_seule_la_section_modifiee_est_recalculee(liasse_vierge, tmp_path, monkeypatch):
+    main.extraire_un_pdf(liasse_vierge, cache_sections=tmp_path)
+    cles = {section: main.cle_cache_section(section) for section in main.SECTIONS}
+    monkeypatch.setitem(main.SEUILS_PAR_SECTION, 'cr', main.SEUILS_PAR_SECTION['cr'] + 1)
+
+    assert [section for section in main.SECTIONS if main.cle_cache_section(section) != cles[section]] == ['cr']
+
+    roles_relus = []
+    analyser_pdf = main.analyser_pdf
+
+    def analyser_espion(chemin_pdf, parallele, signaler, roles, budget):
+        roles_relus.extend(roles)
+        return analyser_pdf(chemin_pdf, parallele, signaler, roles, budget)
+
+    monkeypatch.setattr(main, 'analyser_pdf', analyser_espion)
+    main.extraire_un_pdf(liasse_vierge, cache_sections=tmp_path)
+
+    assert roles_relus == main.PAGES_PAR_SECTION['cr']
+    assert len(list((tmp_path / main.empreinte_fichier(liasse_vierge)).glob("cr-*.json.gz"))) == 1
+
+
+def test_entree_illisible_recalculee(tmp_path):
+    cle = main.cle_cache_section('actif')
+    chemin = main.ecrire_cache_section(tmp_path, "sha", 'actif', cle, {
+        'donnees': [("Total général", 10.0)], 'controle': {'statut': 'valide', 'ecarts': []},
+        'exercice_precedent': None,
+    })
+
+    assert main.lire_cache_section(tmp_path, "sha", 'actif', cle)['donnees'] == [("Total général", 10.0)]
+
+    chemin.write_bytes(b"tronque")
+    assert main.lire_cache_section(tmp_path, "sha", 'actif', cle) is None
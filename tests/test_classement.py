@@ -0,0 +1,87 @@
+"""Classement préalable des PDFs d'après leur structure brute (classer_pdf_brut, controler_pdf_brut)."""
+import zlib
+
+import main
+
+POLICE = b"<< /Font << /F1 5 0 R >> >>"
+OBJET_POLICE = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+
+def _pdf(contenu_page, ressources=POLICE, objet_supplementaire=OBJET_POLICE, trailer=b""):
+    """PDF minimal d'une page dont le flux de contenu (compressé) est contenu_page."""
+    flux = zlib.compress(contenu_page)
+    objets = [b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+              b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources " + ressources + b" /Contents 4 0 R >>",
+              b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(flux) + flux + b"\nendstream",
+              objet_supplementaire]
+    pdf = b"%PDF-1.4\n"
+    for numero, objet in enumerate(objets, 1):
+        pdf += b"%d 0 obj\n" % numero + objet + b"\nendobj\n"
+    return pdf + b"trailer\n<< /Size 6 /Root 1 0 R " + trailer + b">>\n%%EOF\n"
+
+
+def _lignes(texte_par_ligne, nb=30):
+    return b"".join(b"BT /F1 10 Tf 50 %d Td " % (800 - i * 20) + texte_par_ligne(i) + b" ET\n" for i in range(nb))
+
+
+def test_liasse_d_exemple(liasse_vierge):
+    assert main.classer_pdf_brut(liasse_vierge.read_bytes())['type'] == 'liasse'
+
+
+def test_texte_crenele_dans_un_tableau_tj():
+    contenu = _lignes(lambda i: b"[(N\\260 )-10(20)-15(5)-12(%d)-10(-SD)]TJ" % (i % 2))
+
+    classement = main.classer_pdf_brut(_pdf(contenu))
+
+    assert classement['type'] == 'liasse'
+    assert classement['marqueurs'] == ['2050', '2051']
+
+
+def test_texte_hexadecimal():
+    # "2052" puis "2053" sur deux octets par caractère
+    contenu = _lignes(lambda i: b"<0032003000350032> Tj" if i % 2 else b"[<00320030>-20<00350033>]TJ")
+
+    assert main.classer_pdf_brut(_pdf(contenu))['marqueurs'] == ['2052', '2053']
+
+
+def test_numero_inclus_dans_un_nombre_ne_compte_pas():
+    contenu = _lignes(lambda i: b"[(120)-5(50)-5(99 et 20)-5(519)]TJ")
+
+    assert main.classer_pdf_brut(_pdf(contenu))['marqueurs'] == []
+
+
+def test_document_sans_formulaire_signale_sans_refus(tmp_path):
+    chemin = tmp_path / "statuts.pdf"
+    chemin.write_bytes(_pdf(_lignes(lambda i: b"(Article %d : objet social de la societe) Tj" % i)))
+
+    mesures, anomalies = main.controler_pdf_brut(chemin)
+
+    assert mesures['classement']['type'] == 'hors_liasse'
+    assert mesures['avertissement']
+    assert anomalies == []
+
+
+def test_scan_refuse(tmp_path):
+    image = zlib.compress(b"\x80" * 100)
+    chemin = tmp_path / "scan.pdf"
+    chemin.write_bytes(_pdf(b"q 595 0 0 842 0 0 cm /Im1 Do Q", b"<< /XObject << /Im1 5 0 R >> >>",
+                            b"<< /Type /XObject /Subtype /Image /Width 10 /Height 10 /ColorSpace /DeviceGray "
+                            b"/BitsPerComponent 8 /Length %d /Filter /FlateDecode >>\nstream\n" % len(image)
+                            + image + b"\nendstream"))
+
+    mesures, anomalies = main.controler_pdf_brut(chemin)
+
+    assert mesures['classement']['type'] == 'scan'
+    assert anomalies == [main.REFUS_PAR_CLASSEMENT['scan']]
+
+
+def test_pdf_chiffre_indetermine():
+    contenu = _lignes(lambda i: b"(Texte chiffre illisible ici) Tj")
+
+    assert main.classer_pdf_brut(_pdf(contenu, trailer=b"/Encrypt 9 0 R "))['type'] == 'indetermine'
+
+
+def test_marqueurs_sans_couche_texte_indetermine():
+    pdf = _pdf(b"q Q") + b"% Formulaires 2050 et 2051\n"
+
+    assert main.classer_pdf_brut(pdf)['type'] == 'indetermine'
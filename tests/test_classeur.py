@@ -0,0 +1,57 @@
+"""Données brutes embarquées dans le classeur et mise à jour incrémentale."""
+import main
+
+
+def _donnees(total_actif):
+    donnees = {section: [] for section in main.SECTIONS}
+    donnees['actif'] = [(main.CODES_BILAN_ACTIF['CO'], total_actif)]
+    donnees['passif'] = [(main.CODES_BILAN_PASSIF['EE'], total_actif)]
+    return donnees
+
+
+def test_donnees_brutes_relues(tmp_path):
+    chemin = tmp_path / "analyse.xlsx"
+    donnees_par_annee = {'2022': _donnees(100.0), '2023': _donnees(250.0)}
+
+    main.creer_fichier_excel(donnees_par_annee, chemin)
+
+    relues = main.lire_donnees_excel(chemin)
+    assert set(relues) == {'2022', '2023'}
+    assert relues['2023']['actif'] == [(main.CODES_BILAN_ACTIF['CO'], 250.0)]
+    assert relues['2022']['passif'] == [(main.CODES_BILAN_PASSIF['EE'], 100.0)]
+
+
+def test_classeur_sans_onglet_de_donnees(tmp_path):
+    import openpyxl
+
+    chemin = tmp_path / "ancien.xlsx"
+    openpyxl.Workbook().save(chemin)
+
+    assert main.lire_donnees_excel(chemin) == {}
+
+
+def test_mise_a_jour_n_extrait_que_les_nouveaux_pdfs(tmp_path, monkeypatch):
+    chemin = tmp_path / "analyse.xlsx"
+    main.creer_fichier_excel({'2022': _donnees(100.0)}, chemin)
+    extraits = []
+
+    def extraire(chemin_pdf):
+        extraits.append(chemin_pdf.name)
+        return _donnees(300.0)
+
+    monkeypatch.setattr(main, 'extraire_un_pdf', extraire)
+
+    donnees_par_annee = main.mettre_a_jour_fichier_excel(chemin, {'2023': tmp_path / "liasse_2023.pdf"})
+
+    assert extraits == ["liasse_2023.pdf"]
+    assert set(donnees_par_annee) == {'2022', '2023'}
+    relues = main.lire_donnees_excel(chemin)
+    assert relues['2022']['actif'] == [(main.CODES_BILAN_ACTIF['CO'], 100.0)]
+    assert relues['2023']['actif'] == [(main.CODES_BILAN_ACTIF['CO'], 300.0)]
+
+
+def test_mise_a_jour_sans_donnees(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'extraire_un_pdf', lambda chemin_pdf: None)
+
+    assert main.mettre_a_jour_fichier_excel(tmp_path / "absent.xlsx", {'2023': tmp_path / "x.pdf"}) is None
+    assert not (tmp_path / "absent.xlsx").exists()
@@ -0,0 +1,34 @@
+"""Conversion des résultats (libellé, montant) en valeurs indexées par code."""
+import main
+
+LIBELLE_PARTAGE = "Reprises sur provisions et transferts de charges"
+
+
+def _resultat_cr(**montants):
+    return [(libelle, montants.get(code, 0)) for code, libelle in main.CODES_COMPTE_RESULTAT.items()]
+
+
+def test_libelle_partage_par_deux_codes():
+    assert main.CODES_COMPTE_RESULTAT['GM'] == main.CODES_COMPTE_RESULTAT['HC'] == LIBELLE_PARTAGE
+
+    valeurs = main.convertir_en_codes({'cr': _resultat_cr(GM=100.0, HC=7.0)})['cr']
+
+    assert valeurs['GM'] == 100.0
+    assert valeurs['HC'] == 7.0
+
+
+def test_lignes_hors_ordre_rattachees_par_libelle():
+    donnees = {'passif': [("Autres dettes", 12.0), ("Capital social ou individuel", 50.0)]}
+
+    assert main.convertir_en_codes(donnees)['passif'] == {'EA': 12.0, 'DA': 50.0}
+
+
+def test_libelle_inconnu_ignore():
+    assert main.convertir_en_codes({'actif': [("Ligne inconnue", 5.0)]})['actif'] == {}
+
+
+def test_ratios_lisent_les_deux_codes_au_meme_libelle():
+    dependances = main.dependances_ratios()['caf']
+
+    assert ('cr', 'GM') in dependances
+    assert ('cr', 'HC') in dependances
@@ -0,0 +1,83 @@
+"""Identités comptables et choix entre l'extraction par codes et le repli par libellés."""
+from pathlib import Path
+
+import main
+
+
+def _table_passif(lignes):
+    """Tableau du passif au format pdfplumber : en-tête 'Exercice N', montants une colonne à droite."""
+    return [["", "Exercice N", "", ""]] + [[libelle, "", montant, ""] for libelle, montant in lignes]
+
+
+def _donnees_cr(**montants):
+    """Résultat par codes du compte de résultat (tous les codes, dans l'ordre des tables)."""
+    return [(libelle, montants.get(code, 0)) for code, libelle in main.CODES_COMPTE_RESULTAT.items()]
+
+
+def test_passif_avec_libelles_sans_codes_utilise_le_repli():
+    table = _table_passif([
+        ("Capital social ou individuel", "50 000"),
+        ("Réserve légale", "5 000"),
+        ("Autres dettes", "12 000"),
+        ("TOTAL GENERAL (I à V)", "67 000"),
+    ])
+
+    donnees, controle = main.extraire_section(Path("passif.pdf"), 'passif', {'passif': table})
+
+    valeurs = dict(donnees)
+    assert valeurs["Capital social ou individuel"] == 50000
+    assert valeurs["Réserve légale"] == 5000
+    assert valeurs["TOTAL GENERAL (I à V)"] == 67000
+    # DL, DO, DR et EC ne sont pas lus par libellés : l'identité du passif n'est pas vérifiable
+    assert controle['statut'] == 'indetermine'
+
+
+def test_identite_avec_code_absent_non_verifiee():
+    donnees = [(main.CODES_BILAN_PASSIF['EE'], 67000.0), (main.CODES_BILAN_PASSIF['DA'], 50000.0)]
+    assert main.valider_section('passif', donnees) == {'statut': 'indetermine', 'ecarts': []}
+
+
+def test_codes_valides_conserves_sans_repli():
+    donnees = _donnees_cr(FR=60.0, GG=60.0, GW=60.0, HL=100.0, HM=40.0, HN=60.0)
+    appels = []
+
+    choix, controle = main._choisir_avec_controles('cr', donnees, 4, main.SEUIL_REUSSITE_CODES_COMPTE_RESULTAT,
+                                                   lambda: appels.append(1) or [])
+
+    assert choix is donnees and controle['statut'] == 'valide' and not appels
+
+
+def test_codes_insuffisants_remplaces_par_un_repli_indetermine():
+    repli = [("Chiffre d'affaires", 1000.0)]
+
+    choix, controle = main._choisir_avec_controles('cr', _donnees_cr(), 0,
+                                                   main.SEUIL_REUSSITE_CODES_COMPTE_RESULTAT, lambda: repli)
+
+    assert choix is repli and controle['statut'] == 'indetermine'
+
+
+def test_codes_insuffisants_conserves_si_repli_invalide():
+    donnees = _donnees_cr()
+    repli = _donnees_cr(HL=100.0, HM=40.0, HN=10.0)
+
+    choix, controle = main._choisir_avec_controles('cr', donnees, 0,
+                                                   main.SEUIL_REUSSITE_CODES_COMPTE_RESULTAT, lambda: repli)
+
+    assert choix is donnees
+
+
+def test_egalite_entre_deux_invalides_conserve_les_codes():
+    donnees = _donnees_cr(HL=100.0, HM=40.0, HN=10.0)
+    repli = _donnees_cr(HL=100.0, HM=40.0, HN=20.0)
+
+    choix, controle = main._choisir_avec_controles('cr', donnees, 20,
+                                                   main.SEUIL_REUSSITE_CODES_COMPTE_RESULTAT, lambda: repli)
+
+    assert choix is donnees and controle['statut'] == 'invalide'
+
+
+def test_identite_sur_page_non_lue_ignoree_en_triage():
+    donnees = _donnees_cr(HL=100.0, HN=100.0)
+
+    assert main.valider_section('cr', donnees)['statut'] == 'invalide'
+    assert main.valider_section('cr', donnees, ['cr_page2'])['statut'] == 'valide'
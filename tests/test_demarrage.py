@@ -0,0 +1,21 @@
+"""Démarrage à froid : les bibliothèques lourdes ne sont chargées qu'au premier besoin."""
+import pytest
+
+import main  # noqa: F401  (index des codes compilé et mis en cache avant les mesures)
+import mesure_demarrage
+
+
+@pytest.mark.parametrize("entree", ['main', 'service', 'base_resultats'])
+def test_bibliotheques_lourdes_differees(entree):
+    mesure = mesure_demarrage.mesurer_entree(mesure_demarrage.ENTREES[entree])
+
+    assert not set(mesure_demarrage.MODULES_DIFFERES) & mesure['modules']
+    assert 'main' in mesure['modules']
+
+
+def test_index_des_codes_relu_du_cache_sans_openpyxl():
+    mesure = mesure_demarrage.mesurer_entree(
+        "import main; assert main.charger_index_codes() == main.INDEX_CODES, 'index recompilé'"
+    )
+
+    assert 'openpyxl' not in mesure['modules']
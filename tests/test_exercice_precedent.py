@@ -0,0 +1,71 @@
+"""Colonne 'Exercice N-1' : repérage de l'en-tête et fusion dans donnees_par_annee."""
+import pytest
+
+import main
+
+CAPITAL = main.CODES_BILAN_PASSIF['DA']
+RESULTAT = main.CODES_BILAN_PASSIF['DI']
+
+
+@pytest.mark.parametrize("entete", ["Exercice N-1", "N – 1", "N−1", "N ‑ 1", "Exercice précédent"])
+def test_variantes_de_l_entete(entete):
+    assert main.MOTIF_EXERCICE_PRECEDENT.search(entete)
+
+
+def test_colonne_n_1_retenue_d_apres_les_montants():
+    table = [
+        ["", "", "Exercice N", "Exercice N-1", ""],
+        ["Capital social ou individuel", "DA", "1 000", "", "900"],
+        ["Résultat de l'exercice", "DI", "50", "", "40"],
+    ]
+
+    assert main._trouver_colonne_n_1(table, 2) == 4
+
+
+def test_pas_de_colonne_n_1():
+    assert main._trouver_colonne_n_1([["", "DA", "Exercice N"], ["Capital", "DA", "1 000"]], 2) is None
+
+
+def _annee(capital, resultat, precedent=None):
+    donnees = {section: [] for section in main.SECTIONS}
+    donnees['passif'] = [(CAPITAL, capital), (RESULTAT, resultat)]
+    if precedent:
+        donnees['exercice_precedent'] = {'passif': [(CAPITAL, precedent[0]), (RESULTAT, precedent[1])]}
+    return donnees
+
+
+def test_annee_absente_reconstituee():
+    donnees_par_annee = {'2024': _annee(1000.0, 50.0, precedent=(900.0, 40.0))}
+
+    assert main.fusionner_exercices_precedents(donnees_par_annee) == []
+    assert donnees_par_annee['2023']['passif'] == [(CAPITAL, 900.0), (RESULTAT, 40.0)]
+    assert donnees_par_annee['2023']['origine'] == "N-1 de 2024"
+
+
+def test_colonne_n_de_l_annee_fait_foi():
+    donnees_par_annee = {'2024': _annee(1000.0, 50.0, precedent=(900.0, 45.0)), '2023': _annee(900.0, 40.0)}
+
+    conflits = main.fusionner_exercices_precedents(donnees_par_annee)
+
+    assert conflits == [('2023', 'passif', 'DI', 40.0, 45.0)]
+    assert donnees_par_annee['2023']['passif'] == [(CAPITAL, 900.0), (RESULTAT, 40.0)]
+
+
+def test_section_vide_completee():
+    donnees_par_annee = {'2024': _annee(1000.0, 50.0, precedent=(900.0, 40.0)), '2023': _annee(0, 0)}
+
+    main.fusionner_exercices_precedents(donnees_par_annee)
+
+    assert donnees_par_annee['2023']['passif'] == [(CAPITAL, 900.0), (RESULTAT, 40.0)]
+
+
+def test_annees_successives():
+    donnees_par_annee = {
+        '2025': _annee(1100.0, 60.0, precedent=(1000.0, 55.0)),
+        '2024': _annee(1000.0, 50.0, precedent=(900.0, 40.0)),
+    }
+
+    conflits = main.fusionner_exercices_precedents(donnees_par_annee)
+
+    assert conflits == [('2024', 'passif', 'DI', 50.0, 55.0)]
+    assert donnees_par_annee['2023']['passif'] == [(CAPITAL, 900.0), (RESULTAT, 40.0)]
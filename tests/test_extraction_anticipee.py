@@ -0,0 +1,32 @@
+"""Extraction d'un PDF reçu en mémoire, avec progression transmise par une file."""
+import queue
+
+import main
+
+
+def _evenements(file):
+    evenements = []
+    while not file.empty():
+        evenements.append(file.get_nowait())
+    return evenements
+
+
+def test_contenu_extrait_comme_le_fichier(liasse_vierge):
+    file = queue.Queue()
+
+    resultats = main.extraire_contenu_pdf(liasse_vierge.read_bytes(), liasse_vierge.name, isole=False,
+                                          progression=main.ProgressionVersFile(file))
+
+    assert resultats == main.extraire_un_pdf(liasse_vierge)
+    evenements = _evenements(file)
+    assert {evenement['fichier'] for evenement in evenements} == {liasse_vierge.name}
+    assert evenements[-1]['etape'] == 'fichier_termine'
+
+
+def test_contenu_refuse_signale_la_fin_du_fichier():
+    file = queue.Queue()
+
+    resultats = main.extraire_contenu_pdf(b"pas un pdf", "faux.pdf", progression=main.ProgressionVersFile(file))
+
+    assert resultats is None
+    assert [evenement['etape'] for evenement in _evenements(file)] == ['fichier_termine']
@@ -0,0 +1,108 @@
+"""File de travail partagée : mise en file, baux, lettres mortes et résultats."""
+import pytest
+
+import file_travail
+
+RESULTATS = {'actif': [["Total général", 100.0]], 'passif': [], 'cr': [], 'controles': {}}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with file_travail.ouvrir_file(tmp_path / "file.db") as conn:
+        yield conn
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    dossier = tmp_path / "alpha"
+    dossier.mkdir()
+    chemins = []
+    for nom in ("liasse_2023.pdf", "liasse_2024.pdf", "liasse.pdf"):
+        chemin = dossier / nom
+        chemin.write_bytes(b"%PDF-1.4 " + nom.encode())
+        chemins.append(chemin)
+    return chemins
+
+
+def _statut(conn, id_tache):
+    return conn.execute("SELECT statut, tentatives FROM taches WHERE id = ?", (id_tache,)).fetchone()
+
+
+def test_mise_en_file(conn, pdfs, tmp_path):
+    ajoutees, ignores = file_travail.ajouter_taches(conn, pdfs)
+
+    assert ajoutees == 2
+    assert ignores == [("liasse.pdf", "année introuvable dans le nom (utiliser --annee)")]
+    assert conn.execute("SELECT entreprise, annee FROM taches ORDER BY id").fetchall() == [("alpha", "2023"),
+                                                                                        ("alpha", "2024")]
+
+    # Même contenu sous un autre nom : déjà en file
+    copie = tmp_path / "copie_2025.pdf"
+    copie.write_bytes(pdfs[0].read_bytes())
+    assert file_travail.ajouter_taches(conn, [copie]) == (0, [])
+
+
+def test_reservation_exclusive_puis_resultat(conn, pdfs):
+    file_travail.ajouter_taches(conn, pdfs[:2])
+
+    premiere = file_travail.reserver_tache(conn, "t1")
+    seconde = file_travail.reserver_tache(conn, "t2")
+
+    assert premiere[1:] == (str(pdfs[0].resolve()), "alpha", "2023")
+    assert seconde[0] != premiere[0]
+    assert file_travail.reserver_tache(conn, "t3") is None
+
+    file_travail.terminer_tache(conn, premiere[0], "t1", RESULTATS)
+    assert _statut(conn, premiere[0]) == ('terminee', 1)
+
+
+def test_bail_expire_repris_par_un_autre_travailleur(conn, pdfs):
+    file_travail.ajouter_taches(conn, pdfs[:1])
+    id_tache = file_travail.reserver_tache(conn, "t1", duree_bail=-1)[0]
+
+    assert file_travail.reserver_tache(conn, "t2")[0] == id_tache
+
+    # Le premier travailleur, en retard, n'écrase pas la tâche reprise
+    file_travail.terminer_tache(conn, id_tache, "t1", RESULTATS)
+    assert _statut(conn, id_tache) == ('en_cours', 2)
+
+
+def test_lettre_morte_apres_trop_de_baux_expires(conn, pdfs):
+    file_travail.ajouter_taches(conn, pdfs[:1])
+    for travailleur in ("t1", "t2"):
+        id_tache = file_travail.reserver_tache(conn, travailleur, duree_bail=-1, max_tentatives=2)[0]
+
+    assert file_travail.reserver_tache(conn, "t3", max_tentatives=2) is None
+    assert _statut(conn, id_tache) == ('echec_definitif', 2)
+    assert file_travail.rapport(conn)['lettres_mortes'] == [(str(pdfs[0].resolve()), "bail expiré 2 fois")]
+
+    assert file_travail.relancer_lettres_mortes(conn) == 1
+    assert _statut(conn, id_tache) == ('en_attente', 0)
+
+
+def test_echec_remis_en_file_puis_definitif(conn, pdfs):
+    file_travail.ajouter_taches(conn, pdfs[:1])
+
+    id_tache = file_travail.reserver_tache(conn, "t1")[0]
+    file_travail.terminer_tache(conn, id_tache, "t1", None, "PDF illisible", max_tentatives=2)
+    assert _statut(conn, id_tache) == ('en_attente', 1)
+
+    file_travail.reserver_tache(conn, "t1")
+    file_travail.terminer_tache(conn, id_tache, "t1", None, "PDF illisible", max_tentatives=2)
+    assert _statut(conn, id_tache) == ('echec_definitif', 2)
+
+
+def test_resultats_par_entreprise(conn, pdfs):
+    file_travail.ajouter_taches(conn, pdfs[:2])
+    for _ in range(2):
+        id_tache = file_travail.reserver_tache(conn, "t1")[0]
+        file_travail.terminer_tache(conn, id_tache, "t1", RESULTATS)
+
+    (entreprise, donnees_par_annee), = file_travail.iterer_resultats(conn)
+
+    assert entreprise == "alpha"
+    assert sorted(donnees_par_annee) == ["2023", "2024"]
+    assert donnees_par_annee["2024"]['actif'] == [("Total général", 100.0)]
+    infos = file_travail.rapport(conn)
+    assert infos['statuts']['terminee'] == 2
+    assert infos['travailleurs'][0][:2] == ("t1", 2)
@@ -0,0 +1,83 @@
+"""Index des codes comptables compilé depuis codes_comptables.xlsx et son cache binaire."""
+import os
+
+import pytest
+
+import main
+
+
+def _classeur(chemin, lignes):
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Catégorie", "Code", "Description"])
+    for ligne in lignes:
+        ws.append(ligne)
+    wb.save(chemin)
+    return chemin
+
+
+def test_ordre_des_formulaires_et_codes_ajoutes():
+    index = main.compiler_index_codes({'BILAN PASSIF': [("ZZ", "Nouvelle ligne"), ("DL", "Capitaux propres"),
+                                                        ("DA", "Capital")]})
+
+    assert list(index['tables']['BILAN PASSIF']) == ["DA", "DL", "ZZ"]
+    assert index['tables']['BILAN PASSIF']['DA'] == "Capital"
+    assert index['regles']['ZZ'] == ('passif', 'passif')
+    assert index['tables']['BILAN ACTIF'] == main.CATEGORIES_CODES['BILAN ACTIF']
+
+
+def test_page_des_codes_du_compte_de_resultat():
+    regles = main.compiler_index_codes({})['regles']
+
+    assert regles['FL'] == ('cr', 'cr_page1')
+    assert regles['GW'] == ('cr', 'cr_page1')
+    assert regles['HN'] == ('cr', 'cr_page2')
+
+
+def test_premier_code_d_un_libelle_partage():
+    index = main.compiler_index_codes({})
+
+    assert index['code_par_libelle']['cr'][main.CODES_COMPTE_RESULTAT['GM']] == 'GM'
+
+
+@pytest.fixture
+def classeur(tmp_path):
+    return _classeur(tmp_path / "codes.xlsx", [("BILAN PASSIF", "DA", "Capital"), ("BILAN PASSIF", "EE", "Total")])
+
+
+def test_cache_reutilise_sans_relire_le_classeur(classeur, tmp_path, monkeypatch):
+    cache = tmp_path / "index.pickle"
+    index = main.charger_index_codes(classeur, cache)
+
+    def relecture(chemin):
+        raise AssertionError("classeur relu")
+
+    monkeypatch.setattr(main, '_lire_classeur_codes', relecture)
+    assert main.charger_index_codes(classeur, cache) == index
+
+    # Même contenu, date différente : l'empreinte évite la recompilation
+    os.utime(classeur, ns=(0, 0))
+    assert main.charger_index_codes(classeur, cache) == index
+
+
+def test_classeur_modifie_recompile(classeur, tmp_path):
+    cache = tmp_path / "index.pickle"
+    main.charger_index_codes(classeur, cache)
+    _classeur(classeur, [("BILAN PASSIF", "DA", "Capital appelé")])
+
+    index = main.charger_index_codes(classeur, cache)
+
+    assert index['tables']['BILAN PASSIF'] == {'DA': "Capital appelé"}
+
+
+def test_cache_illisible_ignore(classeur, tmp_path):
+    cache = tmp_path / "index.pickle"
+    cache.write_bytes(b"corrompu")
+
+    assert main.charger_index_codes(classeur, cache)['tables']['BILAN PASSIF']['DA'] == "Capital"
+
+
+def test_classeur_absent(tmp_path):
+    assert main.charger_index_codes(tmp_path / "absent.xlsx", tmp_path / "index.pickle") is None
@@ -0,0 +1,48 @@
+"""Instantanés des tableaux bruts et rejeu des tables de codes sans relire les PDFs."""
+import gzip
+import json
+
+import main
+
+
+def _instantane(dossier, sha, fichier, annee, horodatage, montant):
+    tableaux = {role: None for role in main.CRITERES_PAGES}
+    tableaux['actif'] = [["Total général", "CO", str(montant)]]
+    instantane = {'fichier': fichier, 'nb_pages': 1, 'pages': {}, 'textes': {}, 'tableaux': tableaux, 'sha256': sha}
+    chemin = main.sauvegarder_instantane(dossier, instantane, annee)
+    contenu = main.charger_instantane(chemin)
+    contenu['horodatage'] = horodatage
+    with gzip.open(chemin, 'wt', encoding='utf-8') as f:
+        json.dump(contenu, f)
+    return chemin
+
+
+def test_rejeu_identique_a_l_extraction(liasse_vierge, tmp_path):
+    resultats = main.extraire_un_pdf(liasse_vierge, dossier_instantanes=tmp_path, annee="2024")
+
+    chemins = list(tmp_path.glob("*.json.gz"))
+    assert [chemin.name for chemin in chemins] == [f"{main.empreinte_fichier(liasse_vierge)}.json.gz"]
+    assert main.rejouer_instantanes(tmp_path) == [(liasse_vierge.name, "2024", resultats)]
+
+
+def test_seul_le_dernier_instantane_d_un_fichier_est_rejoue(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'extraire_depuis_tableaux', lambda chemin_pdf, tableaux: tableaux['actif'])
+    _instantane(tmp_path, "ancien", "liasse.pdf", "2023", 100.0, 1)
+    _instantane(tmp_path, "recent", "liasse.pdf", "2024", 200.0, 2)
+    _instantane(tmp_path, "autre", "autre.pdf", None, 50.0, 3)
+
+    rejeux = main.rejouer_instantanes(tmp_path)
+
+    assert [(fichier, annee) for fichier, annee, _ in rejeux] == [("autre.pdf", None), ("liasse.pdf", "2024")]
+    assert rejeux[1][2] == [["Total général", "CO", "2"]]
+
+
+def test_instantane_d_une_autre_version_ignore(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'extraire_depuis_tableaux', lambda chemin_pdf, tableaux: tableaux['actif'])
+    chemin = _instantane(tmp_path, "ancien", "liasse.pdf", "2023", 100.0, 1)
+    contenu = main.charger_instantane(chemin)
+    contenu['version'] = main.VERSION_INSTANTANE + 1
+    with gzip.open(chemin, 'wt', encoding='utf-8') as f:
+        json.dump(contenu, f)
+
+    assert main.rejouer_instantanes(tmp_path) == []
@@ -0,0 +1,59 @@
+"""Contrôles préalables des PDF et extraction isolée (limites de ressources)."""
+import main
+
+
+class FileMemoire:
+    """File de sortie minimale pour appeler le point d'entrée du sous-processus dans le test."""
+
+    def __init__(self):
+        self.messages = []
+
+    def put(self, message):
+        self.messages.append(message)
+
+
+def test_liasse_d_exemple_acceptee(liasse_vierge):
+    mesures, anomalies = main.controler_pdf_brut(liasse_vierge)
+
+    assert anomalies == []
+    assert mesures['nb_pages'] > 0
+
+
+def test_fichier_qui_n_est_pas_un_pdf(tmp_path):
+    chemin = tmp_path / "texte.pdf"
+    chemin.write_bytes(b"bonjour")
+
+    _, anomalies = main.controler_pdf_brut(chemin)
+
+    assert anomalies == ["en-tête %PDF absent (ce n'est pas un PDF)"]
+
+
+def test_limite_de_pages(liasse_vierge, monkeypatch):
+    monkeypatch.setattr(main, 'LIMITE_NB_PAGES', 1)
+
+    _, anomalies = main.controler_pdf_brut(liasse_vierge)
+
+    assert any("pages" in anomalie for anomalie in anomalies)
+
+
+def test_limite_memoire_signalee(liasse_vierge, monkeypatch, capsys):
+    def analyser_trop_gros(*args, **kwargs):
+        raise MemoryError
+
+    monkeypatch.setattr(main, 'analyser_pdf', analyser_trop_gros)
+
+    assert main.extraire_un_pdf(liasse_vierge, verifier=False) is None
+    assert "Limite mémoire atteinte" in capsys.readouterr().out
+
+
+def test_sous_processus_renvoie_toujours_un_resultat(liasse_vierge, monkeypatch):
+    def analyser_trop_gros(*args, **kwargs):
+        raise MemoryError
+
+    monkeypatch.setattr(main, 'analyser_pdf', analyser_trop_gros)
+    monkeypatch.setattr(main, '_appliquer_limites_ressources', lambda temps_cpu, memoire: None)
+    file_sortie = FileMemoire()
+
+    main._extraire_dans_sous_processus(file_sortie, liasse_vierge, 1, 1, {})
+
+    assert file_sortie.messages[-1] == ('resultat', None)
@@ -0,0 +1,81 @@
+"""Journal des traitements par lot et reprise d'un lot interrompu (--resume)."""
+import main
+
+RESULTATS = {'actif': [("Total général", 100.0)], 'passif': [], 'cr': [], 'controles': {}}
+
+
+def test_resultat_relu_avec_ses_tuples(tmp_path):
+    main.journaliser_resultat(tmp_path, tmp_path / "a.pdf", "sha-a", "2023", RESULTATS)
+
+    entree = main.lire_journal(tmp_path, "sha-a")
+
+    assert entree == {'fichier': "a.pdf", 'sha256': "sha-a", 'annee': "2023", 'statut': 'reussi', 'resultats': RESULTATS}
+    assert list(tmp_path.iterdir()) == [tmp_path / "sha-a.json.gz"]
+
+
+def test_statuts_echoue_et_partiel(tmp_path):
+    main.journaliser_resultat(tmp_path, tmp_path / "a.pdf", "sha-a", "2023", None)
+    main.journaliser_resultat(tmp_path, tmp_path / "b.pdf", "sha-b", "2024",
+                              dict(RESULTATS, niveaux_ignores=[{'etape': 'cr', 'niveau': 'libelles'}]))
+
+    assert main.lire_journal(tmp_path, "sha-a")['statut'] == 'echoue'
+    assert main.lire_journal(tmp_path, "sha-b")['statut'] == 'partiel'
+
+
+def test_entree_absente_ou_illisible(tmp_path):
+    (tmp_path / "sha-a.json.gz").write_bytes(b"tronque")
+
+    assert main.lire_journal(tmp_path, "sha-a") is None
+    assert main.lire_journal(tmp_path, "sha-b") is None
+
+
+def _lot(tmp_path, monkeypatch):
+    """Dossier de travail avec deux PDFs ; renvoie la liste des PDFs réellement extraits."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "liasses").mkdir()
+    for nom in ("a.pdf", "b.pdf"):
+        (tmp_path / "liasses" / nom).write_bytes(b"%PDF-1.4 " + nom.encode())
+    extraits = []
+
+    def extraire(chemin_pdf, **options):
+        extraits.append((chemin_pdf.name, options['annee']))
+        return RESULTATS
+
+    monkeypatch.setattr(main, 'extraire_un_pdf', extraire)
+    monkeypatch.setattr(main, 'creer_fichier_excel', lambda donnees_par_annee, nom_excel: None)
+    return extraits
+
+
+def test_reprise_n_extrait_que_les_fichiers_non_reussis(tmp_path, monkeypatch):
+    extraits = _lot(tmp_path, monkeypatch)
+    journal = tmp_path / "journal"
+    main.journaliser_resultat(journal, "a.pdf", main.empreinte_fichier(tmp_path / "liasses" / "a.pdf"), "2023", RESULTATS)
+    main.journaliser_resultat(journal, "b.pdf", main.empreinte_fichier(tmp_path / "liasses" / "b.pdf"), "2024", None)
+
+    main.main(["--resume", "--journal", str(journal)])
+
+    assert extraits == [("b.pdf", "2024")]
+    assert main.lire_journal(journal, main.empreinte_fichier(tmp_path / "liasses" / "b.pdf"))['statut'] == 'reussi'
+
+
+def test_sans_reprise_tout_est_extrait(tmp_path, monkeypatch):
+    extraits = _lot(tmp_path, monkeypatch)
+    journal = tmp_path / "journal"
+    main.journaliser_resultat(journal, "a.pdf", main.empreinte_fichier(tmp_path / "liasses" / "a.pdf"), "2023", RESULTATS)
+
+    main.main(["--journal", str(journal)])
+
+    assert extraits == [("a.pdf", "2023"), ("b.pdf", "2024")]
+
+
+def test_annee_journalisee_fait_foi(tmp_path, monkeypatch, capsys):
+    _lot(tmp_path, monkeypatch)
+    journal = tmp_path / "journal"
+    main.journaliser_resultat(journal, "b.pdf", main.empreinte_fichier(tmp_path / "liasses" / "b.pdf"), "2025", RESULTATS)
+    annees = []
+    monkeypatch.setattr(main, 'creer_fichier_excel', lambda donnees_par_annee, nom_excel: annees.extend(donnees_par_annee))
+
+    main.main(["--resume", "--journal", str(journal)])
+
+    assert sorted(annees) == ["2023", "2025"]
+    assert "Année 2025 reprise du journal" in capsys.readouterr().out
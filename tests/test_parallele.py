@@ -0,0 +1,35 @@
+"""Extraction des tableaux d'un PDF section par section, en parallèle."""
+import pytest
+
+import main
+
+
+@pytest.fixture
+def pool_sections(monkeypatch):
+    # Le parallélisme est désactivé sur une machine mono-cœur : on simule plusieurs cœurs
+    monkeypatch.setattr(main.os, 'cpu_count', lambda: 4)
+    yield
+    if main._pool_sections is not None:
+        main._pool_sections.shutdown()
+        main._pool_sections = None
+
+
+def test_tableaux_identiques_en_parallele(liasse_vierge, pool_sections):
+    sequentiel = main.analyser_pdf(liasse_vierge, budget=main.BudgetTemps(None, None))
+    budget = main.BudgetTemps(None, None)
+
+    parallele = main.analyser_pdf(liasse_vierge, parallele=True, budget=budget)
+
+    assert parallele['pages'] == sequentiel['pages']
+    assert parallele['tableaux'] == sequentiel['tableaux']
+    assert budget.niveaux_ignores == []
+
+
+def test_progression_par_tableau(liasse_vierge, pool_sections):
+    evenements = []
+    signaler = main._creer_signaleur(evenements.append, liasse_vierge.name)
+
+    instantane = main.analyser_pdf(liasse_vierge, parallele=True, signaler=signaler)
+
+    roles_extraits = sorted(evenement['role'] for evenement in evenements if evenement['etape'] == 'tableau_extrait')
+    assert roles_extraits == sorted(role for role, page in instantane['pages'].items() if page != -1)
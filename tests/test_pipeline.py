@@ -0,0 +1,93 @@
+"""Pipeline d'extraction par lot : résultats, reprise, worker tué et abandon du lot."""
+import csv
+import os
+import shutil
+import threading
+
+import pytest
+
+import main
+import pipeline
+
+_ANALYSER = pipeline._analyser
+
+
+def _analyser_fragile(chemin_pdf, *args):
+    """Tue le worker à la première analyse de liasse_2024.pdf (fonction transmise au pool, donc au niveau du module)."""
+    marqueur = os.environ["MARQUEUR_WORKER_TUE"]
+    if chemin_pdf.name == "liasse_2024.pdf" and not os.path.exists(marqueur):
+        open(marqueur, 'w').close()
+        os._exit(1)
+    return _ANALYSER(chemin_pdf, *args)
+
+
+@pytest.fixture
+def lot(liasse_vierge, tmp_path):
+    """Deux liasses d'une entreprise et un faux PDF d'une autre."""
+    taches = []
+    for annee in ("2023", "2024"):
+        chemin = tmp_path / f"liasse_{annee}.pdf"
+        shutil.copy(liasse_vierge, chemin)
+        taches.append((chemin, "alpha", annee))
+    faux = tmp_path / "faux_2024.pdf"
+    faux.write_bytes(b"pas un pdf")
+    taches.append((faux, "beta", "2024"))
+    return taches
+
+
+def _executer(tmp_path, taches, **options):
+    return pipeline.executer_pipeline(taches, nb_processus=1, chemin_csv=tmp_path / "valeurs.csv",
+                                      dossier_journal=tmp_path / "journal", intervalle=60, **options)
+
+
+def _bilans(bilans):
+    return {bilan['etage']: (bilan['traites'], bilan['echecs']) for bilan in bilans}
+
+
+def test_resultats_identiques_a_l_extraction_directe(lot, tmp_path, liasse_vierge):
+    donnees_par_entreprise, bilans = _executer(tmp_path, lot)
+
+    reference = main.extraire_un_pdf(liasse_vierge)
+    assert donnees_par_entreprise == {'alpha': {'2023': reference, '2024': reference}}
+    assert _bilans(bilans) == {'lecture': (3, 1), 'analyse': (2, 0), 'correspondance': (2, 0), 'écriture': (3, 1)}
+    with open(tmp_path / "valeurs.csv", encoding='utf-8-sig', newline='') as f:
+        assert next(csv.reader(f, delimiter=';')) == ['entreprise', 'annee', 'fichier', 'section', 'code', 'montant']
+    assert main.lire_journal(tmp_path / "journal", main.empreinte_fichier(liasse_vierge))['statut'] == 'reussi'
+
+
+def test_reprise_sans_nouvelle_analyse(lot, tmp_path):
+    _executer(tmp_path, lot[:1])
+
+    donnees_par_entreprise, bilans = _executer(tmp_path, lot[:1], reprendre=True)
+
+    assert list(donnees_par_entreprise['alpha']) == ['2023']
+    assert _bilans(bilans)['analyse'] == (0, 0)
+
+
+def test_worker_tue_fichier_extrait_en_isole(lot, tmp_path, monkeypatch):
+    marqueur = tmp_path / "worker_tue"
+    monkeypatch.setenv("MARQUEUR_WORKER_TUE", str(marqueur))
+    monkeypatch.setattr(pipeline, '_analyser', _analyser_fragile)
+
+    donnees_par_entreprise, _ = _executer(tmp_path, lot[:2])
+
+    assert marqueur.exists()
+    assert sorted(donnees_par_entreprise['alpha']) == ['2023', '2024']
+
+
+def test_etage_en_erreur_abandonne_le_lot(lot, tmp_path, monkeypatch):
+    def correspondance_defaillante(*args):
+        raise RuntimeError("bogue")
+
+    monkeypatch.setattr(pipeline, '_etage_correspondance', correspondance_defaillante)
+    resultat = []
+
+    # Le lot doit s'arrêter : aucun étage ne reste bloqué sur une file pleine ou vide
+    execution = threading.Thread(target=lambda: resultat.append(_executer(tmp_path, lot * 3, taille_files=1)))
+    execution.start()
+    execution.join(timeout=120)
+
+    assert not execution.is_alive()
+    donnees_par_entreprise, bilans = resultat[0]
+    assert donnees_par_entreprise == {}
+    assert _bilans(bilans)['écriture'] == (0, 0)
@@ -0,0 +1,83 @@
+"""Pool d'extraction partagé : tourniquet entre sessions, annulation et worker tué."""
+import os
+import signal
+import time
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pool_extraction import PoolExtraction
+
+
+def _horodater(attente=0.0):
+    time.sleep(attente)
+    return time.time()
+
+
+def _tuer_le_worker():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+@pytest.fixture
+def pool():
+    pool = PoolExtraction(nb_workers=1)
+    yield pool
+    pool.fermer()
+
+
+def test_sessions_servies_a_tour_de_role(pool):
+    bloquant = pool.soumettre("a", _horodater, 0.5)
+    lot = [pool.soumettre("a", _horodater) for _ in range(3)]
+    autre = pool.soumettre("b", _horodater)
+
+    assert pool.instantane()['en_attente'] == {"a": 3, "b": 1}
+    bloquant.result(timeout=30)
+    horodatages = [ticket.result(timeout=30) for ticket in lot]
+
+    # Le fichier de la session b passe juste après le premier fichier du lot de a
+    assert horodatages[0] < autre.result(timeout=30) < horodatages[1]
+
+
+def test_limite_de_fichiers_en_attente_par_session():
+    pool = PoolExtraction(nb_workers=1, max_en_attente_par_session=1)
+    try:
+        pool.soumettre("a", _horodater, 0.5)
+        pool.soumettre("a", _horodater)
+
+        with pytest.raises(RuntimeError):
+            pool.soumettre("a", _horodater)
+        pool.soumettre("b", _horodater)
+    finally:
+        pool.fermer()
+
+
+def test_travail_annule_pendant_l_attente(pool):
+    bloquant = pool.soumettre("a", _horodater, 0.3)
+    annule = pool.soumettre("a", _horodater)
+    suivant = pool.soumettre("a", _horodater)
+
+    assert annule.cancel()
+    bloquant.result(timeout=30)
+    assert suivant.result(timeout=30)
+    assert pool.instantane()['en_cours_par_session'] == {}
+
+
+def test_worker_tue_pool_recree(pool):
+    ticket = pool.soumettre("a", _tuer_le_worker)
+
+    with pytest.raises(BrokenProcessPool):
+        ticket.result(timeout=30)
+    assert pool.soumettre("b", _horodater).result(timeout=30)
+
+
+def test_fermeture_annule_les_travaux_en_attente(pool):
+    pool.soumettre("a", _horodater, 0.3)
+    en_attente = pool.soumettre("a", _horodater)
+
+    pool.fermer()
+
+    with pytest.raises(CancelledError):
+        en_attente.result(timeout=5)
+    with pytest.raises(RuntimeError):
+        pool.soumettre("a", _horodater)
@@ -0,0 +1,42 @@
+"""Classeur de portefeuille écrit en flux, une entreprise après l'autre."""
+import openpyxl
+
+import main
+
+CA = main.CODES_COMPTE_RESULTAT['FL']
+
+
+def _donnees(chiffre_affaires):
+    return {'actif': [], 'passif': [], 'cr': [(CA, chiffre_affaires)]}
+
+
+def test_blocs_et_ratios_par_entreprise(tmp_path):
+    chemin = tmp_path / "portefeuille.xlsx"
+
+    def entreprises():
+        yield 'alpha', {'2023': _donnees(1000.0), '2024': _donnees(2000.0)}
+        yield 'beta', {'2024': _donnees(500.0)}
+
+    assert main.creer_fichier_portefeuille(entreprises(), chemin) == 2
+
+    wb = openpyxl.load_workbook(chemin, read_only=True)
+    donnees = list(wb["Données Fiscales"].iter_rows(values_only=True))
+    ratios = list(wb["Ratios"].iter_rows(values_only=True))
+    wb.close()
+
+    categorie_cr = main.PRESENTATION_SECTIONS['cr'][0]
+    assert donnees == [
+        ('alpha', "Libellé", '2023', '2024'), (categorie_cr, CA, 1000.0, 2000.0), (),
+        ('beta', "Libellé", '2024'), (categorie_cr, CA, 500.0), (),
+    ]
+
+    entetes = ratios[0]
+    assert entetes[:2] == ("Entreprise", "Année")
+    lignes = {(ligne[0], ligne[1]): dict(zip(entetes, ligne)) for ligne in ratios[1:]}
+    assert list(lignes) == [('alpha', '2023'), ('alpha', '2024'), ('beta', '2024')]
+    assert lignes[('alpha', '2024')]['ca'] == main.calculer_ratios_financiers({'2024': _donnees(2000.0)})['2024']['ca']
+
+
+def test_portefeuille_vide(tmp_path):
+    assert main.creer_fichier_portefeuille({}, tmp_path / "vide.xlsx") == 0
+    assert (tmp_path / "vide.xlsx").exists()
@@ -0,0 +1,62 @@
+"""Profilage à la demande : artefacts conservés au-delà d'un seuil de durée."""
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def profilage(tmp_path):
+    reglages = dict(main.PROFILAGE)
+    yield tmp_path
+    main.PROFILAGE.update(reglages)
+
+
+def _attendre():
+    time.sleep(0.2)
+
+
+def test_echantillonnage_ecrit_piles_et_resume(tmp_path):
+    with main.profiler("lent liasse.pdf", tmp_path, seuil=0, methode='echantillonnage'):
+        _attendre()
+
+    (piles,) = tmp_path.glob("*_lent_liasse.pdf.piles.txt")
+    (resume,) = tmp_path.glob("*_lent_liasse.pdf.resume.txt")
+    assert "_attendre" in piles.read_text(encoding='utf-8')
+    assert resume.read_text(encoding='utf-8').startswith("lent liasse.pdf : ")
+
+
+def test_cprofile_ecrit_un_profil_pstats(tmp_path):
+    import pstats
+
+    with main.profiler("exact", tmp_path, seuil=0, methode='cprofile'):
+        _attendre()
+
+    (profil,) = tmp_path.glob("*_exact.prof")
+    assert any(fonction[2] == "_attendre" for fonction in pstats.Stats(str(profil)).stats)
+
+
+def test_appel_rapide_sans_artefact(tmp_path):
+    with main.profiler("rapide", tmp_path, seuil=60):
+        pass
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_methode_inconnue():
+    with pytest.raises(ValueError):
+        main.activer_profilage(methode='perf')
+
+
+def test_decorateur_nomme_l_artefact_d_apres_le_fichier(profilage):
+    @main.profilable('chemin_pdf')
+    def extraire(chemin_pdf, option=None):
+        return option
+
+    assert extraire(main.Path("liasse_2024.pdf"), option=1) == 1
+    assert list(profilage.iterdir()) == []
+
+    main.activer_profilage(profilage, seuil=0)
+    assert extraire(main.Path("liasse_2024.pdf"), option=2) == 2
+    assert len(list(profilage.glob("*_extraire_liasse_2024.resume.txt"))) == 1
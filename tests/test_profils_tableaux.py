@@ -0,0 +1,61 @@
+"""Profils table_settings par formulaire et par éditeur, et leur étalonnage."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import etalonnage_tableaux
+import main
+
+STRICT = {"vertical_strategy": "lines_strict", "horizontal_strategy": "lines_strict"}
+TEXTE = {"vertical_strategy": "text", "horizontal_strategy": "text"}
+
+
+@pytest.mark.parametrize("producteur, editeur", [
+    ("LibreOffice 7.2", "LibreOffice"),
+    ("Sage Liasse (v12)", "Sage Liasse"),
+    ("", main.EDITEUR_PAR_DEFAUT),
+    (None, main.EDITEUR_PAR_DEFAUT),
+])
+def test_editeur_sans_version(producteur, editeur):
+    assert main.editeur_pdf(SimpleNamespace(metadata={'Producer': producteur})) == editeur
+
+
+def test_profil_de_l_editeur_prioritaire(monkeypatch):
+    monkeypatch.setattr(main, 'PROFILS_TABLEAUX', {
+        main.EDITEUR_PAR_DEFAUT: {'actif': {'table_settings': STRICT}},
+        "LibreOffice": {'actif': {'table_settings': TEXTE}},
+    })
+
+    assert main.parametres_tableau('actif', "LibreOffice") == TEXTE
+    assert main.parametres_tableau('actif', "Sage") == STRICT
+    assert main.parametres_tableau('passif', "LibreOffice") is None
+
+
+def test_profils_enregistres_puis_fusionnes(tmp_path):
+    chemin = tmp_path / "profils.json"
+    etalonnage_tableaux.enregistrer_profils_tableaux({'*': {'actif': {'table_settings': STRICT}}}, chemin)
+    etalonnage_tableaux.enregistrer_profils_tableaux({'*': {'passif': {'table_settings': TEXTE}}}, chemin)
+
+    assert main.charger_profils_tableaux(chemin) == {'*': {'actif': {'table_settings': STRICT},
+                                                           'passif': {'table_settings': TEXTE}}}
+
+
+def test_profils_d_une_autre_version_ignores(tmp_path):
+    chemin = tmp_path / "profils.json"
+    chemin.write_text(json.dumps({'version': main.VERSION_PROFILS_TABLEAUX + 1, 'profils': {'*': {}}}))
+
+    assert main.charger_profils_tableaux(chemin) == {}
+    assert main.charger_profils_tableaux(tmp_path / "absent.json") == {}
+
+
+def test_etalonnage_sur_la_liasse_d_exemple(liasse_vierge):
+    candidats = {'defaut': {}, 'aussi_defaut': {}}
+
+    profils, mesures = etalonnage_tableaux.etalonner([liasse_vierge], candidats, repetitions=1)
+
+    assert set(profils) == {main.EDITEUR_PAR_DEFAUT}
+    for role, profil in profils[main.EDITEUR_PAR_DEFAUT].items():
+        assert mesures[main.EDITEUR_PAR_DEFAUT][role]['defaut'][2] == 1
+        assert profil['candidat'] in candidats
+        assert profil['nb_fichiers'] == 1
@@ -0,0 +1,68 @@
+"""Suivi de la progression d'un lot et estimation du temps restant."""
+import main
+
+
+def _evenement(etape, fichier, horodatage, **details):
+    return {'etape': etape, 'fichier': fichier, 'horodatage': horodatage, **details}
+
+
+def test_avancement_et_temps_restant():
+    suivi = main.SuiviProgression(2)
+
+    suivi(_evenement('page_classee', "a.pdf", 100.0, role='actif'))
+    suivi(_evenement('page_classee', "a.pdf", 102.0, role='passif'))
+
+    assert suivi.fait == 2
+    assert suivi.fraction == 2 / (2 * main.ETAPES_PAR_FICHIER)
+    assert suivi.vitesse == 1.0
+    assert suivi.temps_restant == 2 * main.ETAPES_PAR_FICHIER - 2
+    assert suivi.description().startswith("a.pdf – page 'passif' classée")
+
+
+def test_fichier_en_echec_compte_comme_termine():
+    suivi = main.SuiviProgression(2)
+
+    suivi(_evenement('page_classee', "a.pdf", 100.0, role='actif'))
+    suivi(_evenement('fichier_termine', "a.pdf", 101.0))
+
+    assert suivi.fait == main.ETAPES_PAR_FICHIER
+    assert suivi.fraction == 0.5
+
+
+def test_etapes_plafonnees_par_fichier():
+    suivi = main.SuiviProgression(1)
+
+    for index in range(main.ETAPES_PAR_FICHIER + 5):
+        suivi(_evenement('tableau_extrait', "a.pdf", 100.0 + index, role='actif'))
+
+    assert suivi.fraction == 1.0
+    assert suivi.temps_restant == 0
+
+
+def test_fichier_deja_traite_hors_vitesse():
+    suivi = main.SuiviProgression(2)
+
+    suivi.terminer("a.pdf")
+
+    assert suivi.fraction == 0.5
+    assert suivi.vitesse is None
+    assert suivi.description() == " – en attente • 50%"
+
+
+def test_erreur_du_suivi_sans_effet_sur_l_extraction():
+    def progression_defaillante(evenement):
+        raise RuntimeError("affichage indisponible")
+
+    signaler = main._creer_signaleur(progression_defaillante, "a.pdf")
+
+    signaler('page_classee', role='actif')
+
+
+def test_progression_d_une_extraction(liasse_vierge):
+    affichages = []
+    suivi = main.SuiviProgression(1, afficher=lambda suivi: affichages.append(suivi.fraction))
+
+    main.extraire_un_pdf(liasse_vierge, progression=suivi)
+
+    assert affichages == sorted(affichages)
+    assert suivi.fraction == 1.0
@@ -0,0 +1,82 @@
+"""Recherche des pages de la liasse à leur position standard, puis dans le voisinage."""
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+TEXTES_FORMULAIRES = {
+    'actif': "Brut Amortissements Net",
+    'passif': "Capital social ou individuel",
+    'cr_page1': "Ventes de marchandises",
+    'cr_page2': "Produits exceptionnels",
+    'echeances': "État des échéances",
+    'affectation': "Affectation du résultat",
+}
+
+
+class DocumentFactice:
+    """Document aux pages réduites à leur texte, qui compte les lectures de page."""
+
+    def __init__(self, textes):
+        self.lectures = []
+        self.pages = [SimpleNamespace(extract_text=lambda index=index, texte=texte: self._lire(index, texte))
+                      for index, texte in enumerate(textes)]
+
+    def _lire(self, index, texte):
+        self.lectures.append(index)
+        return texte
+
+
+def _liasse(decalage=0, nb_pages=14):
+    textes = ["Annexe"] * nb_pages
+    for role, index in main.PAGES_ATTENDUES.items():
+        textes[index + decalage] = TEXTES_FORMULAIRES[role]
+    return ["Page de garde"] * decalage + textes[decalage:] if decalage else textes
+
+
+@pytest.fixture(autouse=True)
+def statistiques():
+    main.statistiques_recherche_pages(reinitialiser=True)
+    yield
+    main.statistiques_recherche_pages(reinitialiser=True)
+
+
+def test_liasse_standard_lue_a_la_position_attendue():
+    document = DocumentFactice(_liasse())
+
+    pages = main.identifier_pages(document)
+
+    assert pages == main.PAGES_ATTENDUES
+    assert sorted(document.lectures) == sorted(main.PAGES_ATTENDUES.values())
+    assert main.statistiques_recherche_pages()['position_attendue'] == len(main.PAGES_ATTENDUES)
+
+
+def test_page_de_garde_suivie_par_le_decalage():
+    document = DocumentFactice(_liasse(decalage=1, nb_pages=15))
+
+    pages = main.identifier_pages(document)
+
+    assert pages == {role: index + 1 for role, index in main.PAGES_ATTENDUES.items()}
+    stats = main.statistiques_recherche_pages()
+    assert stats['voisinage'] == 1
+    assert stats['balayage_complet'] == 0
+
+
+def test_page_absente_apres_balayage_complet():
+    textes = _liasse()
+    textes[main.PAGES_ATTENDUES['echeances']] = "Annexe"
+    document = DocumentFactice(textes)
+
+    pages = main.identifier_pages(document)
+
+    assert pages['echeances'] == -1
+    assert main.statistiques_recherche_pages()['non_trouvee'] == 1
+    assert len(document.lectures) == len(set(document.lectures))
+
+
+def test_ordre_des_ecarts_autour_de_la_position_attendue():
+    document = DocumentFactice(["Annexe"] * 5 + [TEXTES_FORMULAIRES['passif']])
+
+    assert main.trouver_page(document, 'passif', 4) == 5
+    assert document.lectures == [4, 5]
@@ -0,0 +1,92 @@
+"""Service HTTP : refus des lots invalides et capacité de la file."""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def serveur():
+    serveur = service.creer_serveur("127.0.0.1", 0, nb_workers=1, taille_file=1)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+    serveur.etat.pool.shutdown()
+
+
+def _url(serveur, chemin):
+    return f"http://127.0.0.1:{serveur.server_address[1]}{chemin}"
+
+
+def _envoyer(serveur, chemin, corps=None, type_contenu="application/pdf"):
+    requete = urllib.request.Request(_url(serveur, chemin), data=corps, headers={"Content-Type": type_contenu})
+    try:
+        with urllib.request.urlopen(requete, timeout=10) as reponse:
+            return reponse.status, json.loads(reponse.read())
+    except urllib.error.HTTPError as erreur:
+        return erreur.code, json.loads(erreur.read())
+
+
+def _multipart(annees):
+    separateur = "frontiere"
+    corps = b"".join(f'--{separateur}\r\nContent-Disposition: form-data; name="{annee}"; filename="{annee}.pdf"\r\n'
+                     f'Content-Type: application/pdf\r\n\r\n%PDF-1.4\r\n'.encode() for annee in annees)
+    return corps + f"--{separateur}--\r\n".encode(), f"multipart/form-data; boundary={separateur}"
+
+
+def test_sante(serveur):
+    assert _envoyer(serveur, "/sante") == (200, {'statut': 'ok', 'workers': 1})
+
+
+def test_route_inconnue(serveur):
+    assert _envoyer(serveur, "/inconnue")[0] == 404
+
+
+def test_lot_plus_grand_que_la_capacite(serveur):
+    statut, _ = _envoyer(serveur, "/lot", *_multipart(["2021", "2022", "2023"]))
+
+    assert statut == 413
+    metriques = serveur.etat.instantane()
+    assert metriques['rejets_413'] == 1
+    assert metriques['en_cours'] == 0
+
+
+def test_lot_avec_annee_en_double(serveur):
+    statut, contenu = _envoyer(serveur, "/lot", *_multipart(["2021", "2021"]))
+
+    assert statut == 400
+    assert "2021" in contenu['erreur']
+    assert serveur.etat.instantane()['en_cours'] == 0
+
+
+def test_format_inconnu(serveur):
+    assert _envoyer(serveur, "/lot?format=csv", *_multipart(["2021"]))[0] == 400
+
+
+def test_service_sature(serveur):
+    assert serveur.etat.reserver(serveur.etat.capacite)
+
+    statut, _ = _envoyer(serveur, "/extraire?annee=2024", b"%PDF-1.4")
+
+    assert statut == 429
+    assert serveur.etat.instantane()['rejets_429'] == 1
+    serveur.etat.liberer(serveur.etat.capacite)
+
+
+def test_places_rendues_apres_echec_d_extraction(serveur):
+    statut, _ = _envoyer(serveur, "/extraire?annee=2024", b"pas un pdf")
+
+    assert statut == 422
+    assert serveur.etat.instantane()['fichiers_echoues'] == 1
+    # La place est rendue par le rappel du pool, qui peut suivre de peu la réponse
+    limite = time.time() + 5
+    while serveur.etat.instantane()['en_cours'] and time.time() < limite:
+        time.sleep(0.01)
+    assert serveur.etat.instantane()['en_cours'] == 0
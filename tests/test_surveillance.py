@@ -0,0 +1,114 @@
+"""Surveillance du dossier des liasses : années en conflit et écriture des résultats."""
+from concurrent.futures import Future
+
+import pytest
+
+import surveillance
+
+RESULTATS = {'actif': [], 'passif': [], 'cr': [], 'controles': {}}
+
+
+@pytest.fixture
+def surveillance_test(tmp_path):
+    dossier = tmp_path / "liasses"
+    dossier.mkdir()
+    suivi = surveillance.Surveillance(dossier, tmp_path / "extraction.xlsx", nb_workers=1,
+                                      chemin_index=tmp_path / "surveillance.json")
+    yield suivi
+    suivi.pool.shutdown()
+
+
+def _terminer(suivi, nom, annee, resultats=RESULTATS):
+    """Simule une extraction terminée pour le fichier nom."""
+    chemin = suivi.dossier / nom
+    chemin.write_bytes(b"%PDF-1.4 " + nom.encode())
+    future = Future()
+    future.set_result(resultats)
+    suivi.index.enregistrer(nom, None, annee, 'en_cours')
+    suivi.en_cours[future] = (chemin, "sha-" + nom, chemin.stat().st_mtime, annee, 0.0)
+    return chemin
+
+
+def test_annee_libre_attribuee_sans_annee_dans_le_nom(tmp_path):
+    index = surveillance.IndexTraitements(tmp_path / "index.json")
+    index.enregistrer("liasse_2023.pdf", "a", "2023", 'reussi')
+
+    assert index.annee("liasse_2024.pdf") == "2024"
+    assert index.annee("liasse.pdf") == "2024"
+
+
+def test_annee_deja_attribuee_a_un_autre_fichier(tmp_path):
+    index = surveillance.IndexTraitements(tmp_path / "index.json")
+    index.enregistrer("a_2023.pdf", "a", "2023", 'reussi')
+    index.enregistrer("b_2023.pdf", "b", "2023", 'conflit_annee')
+
+    assert index.proprietaire("2023", "b_2023.pdf") == "a_2023.pdf"
+    assert index.proprietaire("2023", "a_2023.pdf") is None
+
+
+def test_fichier_en_conflit_non_extrait(surveillance_test):
+    surveillance_test.index.enregistrer("a_2023.pdf", "a", "2023", 'reussi')
+    chemin = surveillance_test.dossier / "b_2023.pdf"
+    chemin.write_bytes(b"%PDF-1.4 b")
+
+    surveillance_test._soumettre(chemin)
+
+    assert not surveillance_test.en_cours
+    assert surveillance_test.index.fichiers["b_2023.pdf"]['statut'] == 'conflit_annee'
+    assert surveillance_test.metriques['conflits_annee'] == 1
+
+
+def test_excel_verrouille_resultats_gardes_puis_ecrits(surveillance_test, monkeypatch):
+    ecritures = []
+
+    def ecrire(nom_excel, nouvelles_annees):
+        if not ecritures:
+            ecritures.append(None)
+            raise PermissionError("classeur ouvert dans Excel")
+        ecritures.append(dict(nouvelles_annees))
+        return nouvelles_annees
+
+    monkeypatch.setattr(surveillance, "ajouter_resultats_excel", ecrire)
+    _terminer(surveillance_test, "liasse_2024.pdf", "2024")
+
+    surveillance_test._collecter()
+
+    assert set(surveillance_test.a_ecrire) == {"2024"}
+    assert surveillance_test.metriques['echecs_ecriture'] == 1
+    infos = surveillance.IndexTraitements(surveillance_test.index.chemin).fichiers["liasse_2024.pdf"]
+    assert infos['statut'] == 'ecriture_en_attente' and infos['sha256'] is None
+
+    surveillance_test.prochaine_ecriture = 0.0
+    surveillance_test._collecter()
+
+    assert ecritures[1] == {"2024": RESULTATS}
+    assert not surveillance_test.a_ecrire
+    assert surveillance_test.index.fichiers["liasse_2024.pdf"]['statut'] == 'reussi'
+    assert surveillance_test.index.est_a_jour("liasse_2024.pdf", "sha-liasse_2024.pdf")
+
+
+def test_fichier_en_attente_d_ecriture_non_resoumis(surveillance_test, monkeypatch):
+    def ecrire(nom_excel, nouvelles_annees):
+        raise OSError("disque indisponible")
+
+    monkeypatch.setattr(surveillance, "ajouter_resultats_excel", ecrire)
+    chemin = _terminer(surveillance_test, "liasse_2024.pdf", "2024")
+    surveillance_test._collecter()
+
+    surveillance_test.scruter()
+
+    assert chemin not in surveillance_test.observes
+
+
+def test_debit_concurrent_sans_perte(surveillance_test):
+    import threading
+
+    maintenant = surveillance.time.time()
+    surveillance_test.fins.extend([maintenant - 2 * surveillance.FENETRE_DEBIT] * 1000 + [maintenant] * 5)
+    threads = [threading.Thread(target=surveillance_test.instantane) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert list(surveillance_test.fins) == [maintenant] * 5
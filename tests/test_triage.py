@@ -0,0 +1,48 @@
+"""Triage : lecture des seules pages nécessaires aux codes et ratios demandés."""
+import csv
+
+import pytest
+
+import main
+
+
+def test_plan_des_codes():
+    plan = main.planifier_triage([' fl', 'EE'])
+
+    assert plan == {'codes': ['FL', 'EE'], 'ratios': [], 'sections': ['passif', 'cr'], 'roles': ['passif', 'cr_page1']}
+
+
+def test_plan_des_ratios():
+    plan = main.planifier_triage(ratios=['ca'])
+
+    assert main.dependances_ratios()['ca'] == {('cr', 'FL')}
+    assert plan['sections'] == ['cr']
+    assert plan['roles'] == ['cr_page1']
+
+
+@pytest.mark.parametrize("codes, ratios", [(['ZZ'], ()), ((), ['ratio_inconnu'])])
+def test_demande_inconnue(codes, ratios):
+    with pytest.raises(ValueError):
+        main.planifier_triage(codes, ratios)
+
+
+def test_seules_les_pages_du_plan_sont_cherchees(liasse_vierge):
+    evenements = []
+
+    resultats = main.trier_pdf(liasse_vierge, ['FL', 'EE'], progression=evenements.append)
+
+    assert resultats == {'codes': {'FL': 0, 'EE': 0}, 'ratios': {}}
+    roles = [evenement['role'] for evenement in evenements if evenement['etape'] == 'page_classee']
+    assert roles == ['passif', 'cr_page1']
+
+
+def test_csv_du_triage(liasse_vierge, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'trier_pdf', lambda chemin_pdf, codes, ratios: None if chemin_pdf.name == "b.pdf"
+                        else {'codes': {'FL': 120.0}, 'ratios': {'ca': 120.0}})
+    nom_csv = tmp_path / "triage" / "triage.csv"
+
+    main.trier_dossier([tmp_path / "a.pdf", tmp_path / "b.pdf"], ['FL'], ['ca'], nom_csv)
+
+    with open(nom_csv, encoding='utf-8-sig', newline='') as f:
+        lignes = list(csv.reader(f, delimiter=';'))
+    assert lignes == [['fichier', 'FL', 'ca'], ['a.pdf', '120.0', '120.0'], ['b.pdf', '', '']]